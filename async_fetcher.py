@@ -0,0 +1,224 @@
+"""Asynchronous URL fetching backend.
+
+This module provides an asyncio alternative to ``ContentFetcher`` that keeps
+many requests in flight on a single event loop, with per-host concurrency
+limits. Fetched bodies are handed as raw bytes to a process pool for
+extraction so that CPU-bound parsing never blocks the event loop.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import AsyncIterator, Iterable, List, Optional
+
+import aiohttp
+
+from http_cache import CachedResponse
+from url_extractor import (
+    ContentDispatcher,
+    ExtractionResult,
+    URLExtractionError,
+    URLValidator,
+)
+
+logger = logging.getLogger(__name__)
+
+# Default limits for in-flight requests
+DEFAULT_MAX_IN_FLIGHT = 200
+DEFAULT_PER_HOST_LIMIT = 8
+
+class AsyncContentFetcher:
+    """Fetches content from URLs on an asyncio event loop."""
+
+    def __init__(self, timeout: int = 30,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 per_host_limit: int = DEFAULT_PER_HOST_LIMIT):
+        """Initialize the async content fetcher.
+
+        Args:
+            timeout: Request timeout in seconds
+            max_in_flight: Maximum number of concurrent connections overall
+            per_host_limit: Maximum number of concurrent connections per host
+        """
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.per_host_limit = per_host_limit
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "AsyncContentFetcher":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        """Create the pooled client session."""
+        if self.session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_in_flight,
+                limit_per_host=self.per_host_limit,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+
+    async def close(self) -> None:
+        """Close the client session and its connections."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def fetch_response(self, url: str) -> CachedResponse:
+        """Fetch the raw body and headers of a URL.
+
+        Args:
+            url: The URL to fetch content from
+
+        Returns:
+            CachedResponse: Raw body, encoding and validators
+
+        Raises:
+            URLExtractionError: If content cannot be fetched
+        """
+        await self.open()
+        try:
+            async with self.session.get(url) as response:
+                response.raise_for_status()
+                return CachedResponse(
+                    url=url,
+                    content=await response.read(),
+                    encoding=response.charset,
+                    content_type=response.headers.get("Content-Type", ""),
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    stored_at=time.time(),
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise URLExtractionError(f"Failed to fetch content: {str(e) or type(e).__name__}")
+
+    async def fetch(self, url: str) -> str:
+        """Fetch content from a URL.
+
+        Args:
+            url: The URL to fetch content from
+
+        Returns:
+            str: Raw HTML content
+
+        Raises:
+            URLExtractionError: If content cannot be fetched
+        """
+        await self.open()
+        try:
+            async with self.session.get(url) as response:
+                response.raise_for_status()
+                return await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise URLExtractionError(f"Failed to fetch content: {str(e) or type(e).__name__}")
+
+class AsyncURLTextExtractor:
+    """Extracts text from many URLs using async fetching and pooled parsing."""
+
+    def __init__(self, timeout: int = 30,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                 executor: Optional[Executor] = None,
+                 dispatcher: Optional[ContentDispatcher] = None):
+        """Initialize the async URL text extractor.
+
+        Args:
+            timeout: Request timeout in seconds
+            max_in_flight: Maximum number of URLs processed concurrently
+            per_host_limit: Maximum number of concurrent connections per host
+            executor: Pool used for text extraction; a process pool sized
+                to the available cores is created if omitted
+            dispatcher: Routes each body to the HTML, XML, PDF or text
+                extractor; with a process pool its extractors must be
+                picklable module-level functions
+        """
+        self.validator = URLValidator()
+        self.dispatcher = dispatcher or ContentDispatcher()
+        self.fetcher = AsyncContentFetcher(
+            timeout=timeout,
+            max_in_flight=max_in_flight,
+            per_host_limit=per_host_limit,
+        )
+        self.max_in_flight = max_in_flight
+        self.executor = executor
+
+    async def _extract_result(self, url: str, executor: Executor) -> ExtractionResult:
+        """Extract a single URL, capturing failures in the result."""
+        try:
+            validated_url = self.validator.validate(url)
+            response = await self.fetcher.fetch_response(validated_url)
+            loop = asyncio.get_running_loop()
+            text = await loop.run_in_executor(
+                executor, self.dispatcher.extract,
+                response.content, response.content_type, response.encoding,
+            )
+            return ExtractionResult(url, text=text)
+        except URLExtractionError as e:
+            logger.error(f"Extraction failed for URL {url}: {str(e)}")
+            return ExtractionResult(url, error=e)
+        except Exception as e:
+            logger.error(f"Unexpected failure for URL {url}: {str(e)}")
+            return ExtractionResult(url, error=URLExtractionError(str(e)))
+
+    async def extract_many(self, urls: Iterable[str]) -> AsyncIterator[ExtractionResult]:
+        """Extract text from many URLs concurrently.
+
+        Up to ``max_in_flight`` URLs are fetched at once; ``urls`` is consumed
+        lazily, so it may be an iterable of any length.
+
+        Args:
+            urls: The URLs to extract text from
+
+        Yields:
+            ExtractionResult: One result per input URL, in completion order
+        """
+        owns_executor = self.executor is None
+        executor = self.executor or ProcessPoolExecutor()
+        url_iter = iter(urls)
+        results: asyncio.Queue = asyncio.Queue()
+        done_marker = object()
+
+        async def worker() -> None:
+            for url in url_iter:
+                await results.put(await self._extract_result(url, executor))
+            await results.put(done_marker)
+
+        try:
+            async with self.fetcher:
+                workers = [asyncio.create_task(worker()) for _ in range(self.max_in_flight)]
+                remaining = len(workers)
+                try:
+                    while remaining:
+                        item = await results.get()
+                        if item is done_marker:
+                            remaining -= 1
+                        else:
+                            yield item
+                finally:
+                    for task in workers:
+                        task.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+        finally:
+            if owns_executor:
+                executor.shutdown()
+
+    def run(self, urls: Iterable[str]) -> List[ExtractionResult]:
+        """Synchronously extract text from many URLs.
+
+        Args:
+            urls: The URLs to extract text from
+
+        Returns:
+            List[ExtractionResult]: One result per input URL, in completion order
+        """
+        async def collect() -> List[ExtractionResult]:
+            return [result async for result in self.extract_many(urls)]
+
+        return asyncio.run(collect())
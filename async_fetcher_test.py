@@ -0,0 +1,114 @@
+"""Unit tests for the asynchronous fetching backend."""
+
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from async_fetcher import AsyncContentFetcher, AsyncURLTextExtractor
+from url_extractor import URLExtractionError
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Serves small HTML pages and tracks concurrent requests."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        time.sleep(server.delay)
+        # Leave the count before responding so a client reusing the
+        # connection is not counted twice
+        with server.lock:
+            server.active -= 1
+        if self.path.startswith("/missing"):
+            self.send_error(404)
+            return
+        body = f"<html><body><p>Page {self.path}</p></body></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class AsyncFetcherTestCase(unittest.TestCase):
+    """Runs a local HTTP stand-in server for the duration of each test."""
+
+    def setUp(self):
+        """Set up test cases."""
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+        self.server.lock = threading.Lock()
+        self.server.active = 0
+        self.server.peak = 0
+        self.server.delay = 0.05
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        """Tear down test cases."""
+        self.server.shutdown()
+        self.server.server_close()
+
+class TestAsyncContentFetcher(AsyncFetcherTestCase):
+    """Test the async content fetcher component."""
+
+    def test_successful_fetch(self):
+        """Test successful content fetch."""
+        async def fetch():
+            async with AsyncContentFetcher() as fetcher:
+                return await fetcher.fetch(f"{self.base_url}/a")
+
+        self.assertIn("Page /a", asyncio.run(fetch()))
+
+    def test_http_error(self):
+        """Test HTTP error handling."""
+        async def fetch():
+            async with AsyncContentFetcher() as fetcher:
+                return await fetcher.fetch(f"{self.base_url}/missing")
+
+        with self.assertRaises(URLExtractionError):
+            asyncio.run(fetch())
+
+class TestAsyncURLTextExtractor(AsyncFetcherTestCase):
+    """Test the async URL text extractor."""
+
+    def test_extract_many_with_errors(self):
+        """Test batch extraction returns per-URL results and errors."""
+        urls = [f"{self.base_url}/{i}" for i in range(5)] + [f"{self.base_url}/missing"]
+        extractor = AsyncURLTextExtractor(executor=ThreadPoolExecutor(2))
+
+        results = {r.url: r for r in extractor.run(urls)}
+
+        self.assertEqual(set(results), set(urls))
+        self.assertTrue(results[urls[0]].ok)
+        self.assertIn("Page /0", results[urls[0]].text)
+        self.assertFalse(results[urls[-1]].ok)
+
+    def test_per_host_limit(self):
+        """Test that concurrency to one host never exceeds the limit."""
+        urls = [f"{self.base_url}/{i}" for i in range(20)]
+        extractor = AsyncURLTextExtractor(per_host_limit=3,
+                                          executor=ThreadPoolExecutor(2))
+
+        results = extractor.run(urls)
+
+        self.assertEqual(len(results), 20)
+        self.assertLessEqual(self.server.peak, 3)
+        self.assertGreater(self.server.peak, 1)
+
+    def test_process_pool_extraction(self):
+        """Test extraction through the default process pool."""
+        extractor = AsyncURLTextExtractor()
+
+        results = extractor.run([f"{self.base_url}/pooled"])
+
+        self.assertTrue(results[0].ok)
+        self.assertIn("Page /pooled", results[0].text)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+"""Parallel execution of per-document pipeline stages.
+
+Local stages (PDF parsing, OCR, layout models) are bound by CPU and run
+across a process pool with no throttling. Stages that call a remote
+endpoint pass a rate limit, which paces only the submission of their own
+tasks. Progress, throughput and an ETA are reported as tasks complete.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Tasks kept in flight per worker, so results stream back while later
+# tasks wait for the rate limit
+TASKS_PER_WORKER = 2
+
+class Progress(NamedTuple):
+    """Progress of a run after a task completes."""
+    done: int
+    failed: int
+    total: Optional[int]
+    elapsed: float
+
+    @property
+    def throughput(self) -> float:
+        """Completed tasks per second."""
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds until every task completes, if the total is known."""
+        if self.total is None or not self.throughput:
+            return None
+        return (self.total - self.done) / self.throughput
+
+    def __str__(self) -> str:
+        total = "?" if self.total is None else self.total
+        eta = "?" if self.eta is None else f"{self.eta:.0f}s"
+        return (f"{self.done}/{total} done ({self.failed} failed) | "
+                f"{self.throughput:.2f}/s | ETA {eta}")
+
+class ProgressTracker:
+    """Thread-safe counter of completed tasks."""
+
+    def __init__(self, total: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize the tracker.
+
+        Args:
+            total: Number of tasks in the run, if known
+            clock: Monotonic clock in seconds
+        """
+        self.total = total
+        self._clock = clock
+        self._start = clock()
+        self._done = 0
+        self._failed = 0
+        self._lock = threading.Lock()
+
+    def update(self, ok: bool = True) -> Progress:
+        """Record a completed task.
+
+        Args:
+            ok: Whether the task succeeded
+
+        Returns:
+            Progress: Progress including this task
+        """
+        with self._lock:
+            self._done += 1
+            if not ok:
+                self._failed += 1
+            return Progress(self._done, self._failed, self.total, self._clock() - self._start)
+
+class TaskResult(NamedTuple):
+    """Outcome of one task."""
+    item: Any
+    value: Any
+    elapsed: float
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the task completed without error."""
+        return self.error is None
+
+def _timed_call(func: Callable[[Any], Any], item: Any) -> Tuple[Any, float, Optional[str]]:
+    """Run a task, returning its value, time and error message.
+
+    Errors are returned as text, so exceptions that cannot be pickled do not
+    break the pool.
+    """
+    start = time.perf_counter()
+    try:
+        return func(item), time.perf_counter() - start, None
+    except Exception as e:
+        return None, time.perf_counter() - start, str(e)
+
+def run_tasks(func: Callable[[Any], Any], items: Iterable[Any],
+              max_workers: Optional[int] = None,
+              executor: Optional[Executor] = None,
+              rate_limit: Optional[Callable[[], None]] = None,
+              on_progress: Optional[Callable[[Progress], None]] = None) -> Iterator[TaskResult]:
+    """Run a function over items in parallel, yielding results as they complete.
+
+    Args:
+        func: Module-level function applied to each item
+        items: Task inputs; a sized collection gives progress an ETA
+        max_workers: Number of worker processes, which also bounds the
+            tasks in flight; defaults to the number of available cores.
+            With one worker and no executor, tasks run in the calling process
+        executor: Pool to run tasks in; a process pool is created for the
+            run if omitted
+        rate_limit: Blocks until the next task may start; pass it only for
+            stages that call a remote endpoint
+        on_progress: Called with the run's progress after every task
+
+    Yields:
+        TaskResult: One result per item, in completion order
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    tracker = ProgressTracker(len(items) if hasattr(items, "__len__") else None)
+
+    def finished(result: TaskResult) -> TaskResult:
+        progress = tracker.update(result.ok)
+        if not result.ok:
+            logger.warning(f"Task {result.item!r} failed: {result.error}")
+        if on_progress is not None:
+            on_progress(progress)
+        return result
+
+    if executor is None and max_workers == 1:
+        for item in items:
+            if rate_limit is not None:
+                rate_limit()
+            yield finished(TaskResult(item, *_timed_call(func, item)))
+        return
+
+    owned = executor is None
+    if owned:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    pending: Dict[Future, Any] = {}
+    try:
+        for item in items:
+            while len(pending) >= max_workers * TASKS_PER_WORKER:
+                yield from _collect(pending, finished)
+            if rate_limit is not None:
+                rate_limit()
+            pending[executor.submit(_timed_call, func, item)] = item
+        while pending:
+            yield from _collect(pending, finished)
+    finally:
+        for future in pending:
+            future.cancel()
+        if owned:
+            executor.shutdown()
+
+def _collect(pending: Dict[Future, Any],
+             finished: Callable[[TaskResult], TaskResult]) -> Iterator[TaskResult]:
+    """Wait for at least one pending task and yield the completed ones."""
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        item = pending.pop(future)
+        try:
+            value, elapsed, error = future.result()
+        except Exception as e:
+            # The worker died or the task could not be pickled
+            value, elapsed, error = None, 0.0, str(e)
+        yield finished(TaskResult(item, value, elapsed, error))
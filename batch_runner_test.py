@@ -0,0 +1,99 @@
+"""Tests for the parallel batch runner."""
+
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from batch_runner import Progress, ProgressTracker, run_tasks
+
+def square(value):
+    """Square a number, failing on negative ones."""
+    if value < 0:
+        raise ValueError(f"negative value {value}")
+    return value * value
+
+class TestRunTasks(unittest.TestCase):
+    """Test cases for run_tasks."""
+
+    def test_inline(self):
+        """Test that a single worker runs tasks in order in this process."""
+        results = list(run_tasks(square, [1, 2, 3], max_workers=1))
+        self.assertEqual([(result.item, result.value) for result in results],
+                         [(1, 1), (2, 4), (3, 9)])
+        self.assertTrue(all(result.ok and result.elapsed >= 0 for result in results))
+
+    def test_process_pool(self):
+        """Test that every task runs once in a process pool."""
+        results = run_tasks(square, range(20), max_workers=2)
+        self.assertEqual(sorted(result.value for result in results),
+                         [value * value for value in range(20)])
+
+    def test_failures_do_not_stop_the_run(self):
+        """Test that a failing task is reported and the others complete."""
+        results = {result.item: result
+                   for result in run_tasks(square, [2, -1, 3], max_workers=2)}
+        self.assertEqual(results[2].value, 4)
+        self.assertEqual(results[3].value, 9)
+        self.assertFalse(results[-1].ok)
+        self.assertIn("negative value -1", results[-1].error)
+
+    def test_rate_limit_paces_submissions(self):
+        """Test that the rate limit runs before each task, bounded in flight."""
+        in_flight = []
+        lock = threading.Lock()
+        running = [0]
+
+        def tracked(value):
+            with lock:
+                running[0] += 1
+                in_flight.append(running[0])
+            try:
+                return square(value)
+            finally:
+                with lock:
+                    running[0] -= 1
+
+        calls = []
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(run_tasks(tracked, range(10), max_workers=2, executor=executor,
+                                     rate_limit=lambda: calls.append(1)))
+        self.assertEqual(len(results), 10)
+        self.assertEqual(len(calls), 10)
+        self.assertLessEqual(max(in_flight), 2)
+
+    def test_progress_reports(self):
+        """Test that progress is reported after every task."""
+        reports = []
+        list(run_tasks(square, [1, -2, 3], max_workers=1, on_progress=reports.append))
+        self.assertEqual([(report.done, report.failed, report.total) for report in reports],
+                         [(1, 0, 3), (2, 1, 3), (3, 1, 3)])
+
+        reports = []
+        list(run_tasks(square, iter([1, 2]), max_workers=1, on_progress=reports.append))
+        self.assertIsNone(reports[-1].total)
+        self.assertIsNone(reports[-1].eta)
+
+class TestProgress(unittest.TestCase):
+    """Test cases for progress tracking."""
+
+    def test_throughput_and_eta(self):
+        """Test throughput and ETA from a fake clock."""
+        now = [100.0]
+        tracker = ProgressTracker(total=10, clock=lambda: now[0])
+        now[0] = 104.0
+        tracker.update()
+        progress = tracker.update(ok=False)
+
+        self.assertEqual(progress, Progress(2, 1, 10, 4.0))
+        self.assertEqual(progress.throughput, 0.5)
+        self.assertEqual(progress.eta, 16.0)
+        self.assertEqual(str(progress), "2/10 done (1 failed) | 0.50/s | ETA 16s")
+
+    def test_no_eta_before_time_passes(self):
+        """Test that no ETA is given without elapsed time."""
+        progress = Progress(0, 0, 10, 0.0)
+        self.assertEqual(progress.throughput, 0.0)
+        self.assertIsNone(progress.eta)
+
+if __name__ == '__main__':
+    unittest.main()
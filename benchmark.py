@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""Benchmarks for the extraction pipeline.
+
+Each benchmark runs against local stand-ins (an in-process HTTP server or
+generated documents) so results do not depend on network conditions.
+
+Usage:
+    python benchmark.py fetch [--urls N] [--latency SECONDS]
+    python benchmark.py extract [--docs N]
+    python benchmark.py pdf [--pages N] [--workers N]
+    python benchmark.py batch [--docs N] [--pages N] [--workers N]
+    python benchmark.py docling [--docs N] [--pages N] [--workers N]
+    python benchmark.py limiter [--calls N] [--quota N] [--latency SECONDS]
+    python benchmark.py packing [--docs N] [--output-ratio R]
+    python benchmark.py tiers [--pages N]
+    python benchmark.py ocr [--pages N] [--workers N]
+    python benchmark.py similarity [--tokens N] [--legacy-tokens N] [--docs N] [--methods N]
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Tuple
+
+SAMPLE_PAGE = (
+    "<html><head><title>Filing</title></head><body>"
+    + "".join(f"<p>Paragraph {i} of the pricing supplement.</p>" for i in range(200))
+    + "</body></html>"
+).encode()
+
+class _LatencyHandler(BaseHTTPRequestHandler):
+    """Serves a fixed page after a configurable delay."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(SAMPLE_PAGE)))
+        self.end_headers()
+        self.wfile.write(SAMPLE_PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(latency: float) -> ThreadingHTTPServer:
+    """Start a local HTTP server that answers every request after ``latency``."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _LatencyHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def make_prose_document(paragraphs: int = 300) -> str:
+    """Build an article-style page that trafilatura handles well."""
+    body = "".join(
+        f"<p>Paragraph {i}: the notes are senior unsecured obligations of the "
+        f"issuer and are subject to the credit risk of the guarantor.</p>"
+        for i in range(paragraphs)
+    )
+    return (f"<html><head><title>Filing</title><script>var x = 1;</script></head>"
+            f"<body><nav>Menu</nav><article>{body}</article>"
+            f"<footer>Footer</footer></body></html>")
+
+def make_table_document(rows: int = 400) -> str:
+    """Build an EDGAR-style 424B2 page laid out almost entirely in tables."""
+    table = "".join(
+        f"<tr><td>Observation date {i}</td><td>Coupon barrier</td>"
+        f"<td>{70 + i % 10}.00%</td><td>${1000 + i:,}</td></tr>"
+        for i in range(rows)
+    )
+    return (f"<html><head><title>424B2</title></head><body>"
+            f"<p>Pricing supplement</p><table>{table}</table></body></html>")
+
+def make_pdf_document(pages: int = 300, lines: int = 40) -> bytes:
+    """Build a text-only PDF with ``lines`` lines of Helvetica per page."""
+    def text_stream(page: int) -> bytes:
+        rows = b" ".join(
+            b"0 -14 Td (Page %d line %d: the notes are subject to the credit risk "
+            b"of the issuer.) Tj" % (page, line) for line in range(lines))
+        return b"BT /F1 10 Tf 72 760 Td " + rows + b" ET"
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(pages)), pages),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i in range(pages):
+        stream = text_stream(i + 1)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+                       % (5 + 2 * i))
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, xref)
+    return bytes(pdf)
+
+def make_scanned_pdf_document(pages: int = 10,
+                              font_sizes: Tuple[int, ...] = (7, 10, 14)) -> bytes:
+    """Build a PDF of page images of text, cycling through ``font_sizes``."""
+    import pymupdf
+
+    document = pymupdf.open()
+    for i in range(pages):
+        source = pymupdf.open()
+        source_page = source.new_page(width=612, height=792)
+        source_page.insert_textbox(
+            pymupdf.Rect(72, 72, 540, 720),
+            " ".join(f"Page {i + 1}: the notes are subject to the credit risk of the issuer."
+                     for _ in range(15)),
+            fontsize=font_sizes[i % len(font_sizes)])
+        page = document.new_page(width=612, height=792)
+        page.insert_image(page.rect, pixmap=source_page.get_pixmap(dpi=200))
+        source.close()
+    return document.tobytes()
+
+def legacy_extract(html: str) -> str:
+    """The original two-parse extraction path, kept for comparison."""
+    import trafilatura
+    from bs4 import BeautifulSoup
+
+    text = trafilatura.extract(html)
+    if text is None:
+        soup = BeautifulSoup(html, "html.parser")
+        for script in soup(["script", "style"]):
+            script.decompose()
+        text = soup.get_text(separator="\n")
+        lines = (line.strip() for line in text.splitlines())
+        text = "\n".join(line for line in lines if line)
+    return text
+
+def legacy_weighted_token_similarity(ground_truth: str, output: str) -> float:
+    """The original quadratic similarity score, kept for comparison."""
+    import re
+
+    def is_number(token):
+        try:
+            float(token)
+            return True
+        except ValueError:
+            return False
+
+    gt_tokens = re.findall(r'\w+', ground_truth)
+    out_tokens = re.findall(r'\w+', output)
+
+    total_weight = 0
+    matched_weight = 0
+
+    for token in gt_tokens:
+        weight = 2 if is_number(token) else 1
+        total_weight += weight
+        if token.lower() in (t.lower() for t in out_tokens):
+            matched_weight += weight
+
+    similarity = (matched_weight / total_weight) * 100 if total_weight > 0 else 0
+    return similarity
+
+def make_filing_text(tokens: int, seed: int = 0) -> str:
+    """Build filing-like text of ``tokens`` words and figures."""
+    import random
+
+    rng = random.Random(seed)
+    words = ["notes", "issuer", "coupon", "barrier", "Observation", "Date", "USD",
+             "principal", "Jefferies", "payment", "maturity", "underlying"]
+    return " ".join(
+        f"{rng.randint(1, 99999)}" if rng.random() < 0.3
+        else f"{rng.choice(words)}{rng.randint(0, 500)}" for _ in range(tokens))
+
+def report(name: str, count: int, elapsed: float, unit: str = "docs") -> None:
+    """Print one benchmark line."""
+    rate = count / elapsed if elapsed else float("inf")
+    print(f"{name:<32} {count:>6} {unit} in {elapsed:8.3f}s  ({rate:10.1f} {unit}/s)")
+
+def bench_fetch(args: argparse.Namespace) -> None:
+    """Compare the sync thread-pool path with the asyncio backend."""
+    from async_fetcher import AsyncURLTextExtractor
+    from url_extractor import URLTextExtractor
+
+    server = start_server(args.latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base_url}/doc/{i}" for i in range(args.urls)]
+    try:
+        start = time.perf_counter()
+        for url in urls:
+            URLTextExtractor().extract_text(url)
+        report("sync extract_text (serial)", len(urls), time.perf_counter() - start)
+
+        extractor = URLTextExtractor(max_workers=args.workers)
+        start = time.perf_counter()
+        list(extractor.extract_many(urls))
+        report(f"sync extract_many ({args.workers} threads)", len(urls),
+               time.perf_counter() - start)
+
+        async_extractor = AsyncURLTextExtractor(per_host_limit=args.per_host)
+        start = time.perf_counter()
+        async_extractor.run(urls)
+        report(f"async extract_many ({args.per_host}/host)", len(urls),
+               time.perf_counter() - start)
+    finally:
+        server.shutdown()
+
+def bench_extract(args: argparse.Namespace) -> None:
+    """Compare the legacy two-parse extraction with the single-parse path."""
+    from url_extractor import TextExtractor
+
+    documents = {
+        "prose": make_prose_document(),
+        "edgar tables": make_table_document(),
+    }
+    for kind, html in documents.items():
+        for name, extract in (("legacy", legacy_extract),
+                              ("single-parse", TextExtractor.extract)):
+            start = time.perf_counter()
+            for _ in range(args.docs):
+                extract(html)
+            report(f"{name} ({kind})", args.docs, time.perf_counter() - start)
+
+def bench_pdf(args: argparse.Namespace) -> None:
+    """Compare the serial pdfplumber loop with page-parallel extraction."""
+    import pdfplumber
+    from pdf_extractor import PDFExtractor
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as document:
+        document.write(make_pdf_document(args.pages))
+        document.flush()
+
+        start = time.perf_counter()
+        with pdfplumber.open(document.name) as pdf:
+            text = ""
+            for page in pdf.pages:
+                text += page.extract_text() or ""
+        report("serial pdfplumber loop", args.pages, time.perf_counter() - start, "pages")
+
+        for workers in sorted({1, 2, 4, args.workers}):
+            result = PDFExtractor(max_workers=workers).extract(document.name)
+            report(f"page-parallel ({workers} workers)", len(result.pages),
+                   result.elapsed, "pages")
+
+def extract_document_text(path: str) -> str:
+    """Extract a whole PDF in the calling process, as one batch task."""
+    from pdf_extractor import PDFExtractor
+
+    return PDFExtractor(max_workers=1).extract(path).text
+
+def bench_batch(args: argparse.Namespace) -> None:
+    """Compare the batched loop with fixed sleeps against the document pool."""
+    from batch_runner import run_tasks
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = []
+        for i in range(args.docs):
+            paths.append(os.path.join(folder, f"doc{i}.pdf"))
+            with open(paths[-1], "wb") as document:
+                document.write(make_pdf_document(args.pages))
+
+        start = time.perf_counter()
+        for path in paths:
+            extract_document_text(path)
+        elapsed = time.perf_counter() - start
+        report("serial loop", args.docs, elapsed)
+        # The old loop also slept 40s after every batch of 3 documents
+        sleeps = 40 * ((args.docs + 2) // 3)
+        report("serial loop + batch sleeps", args.docs, elapsed + sleeps)
+
+        for workers in sorted({1, args.workers}):
+            start = time.perf_counter()
+            list(run_tasks(extract_document_text, paths, max_workers=workers))
+            report(f"run_tasks ({workers} workers)", args.docs, time.perf_counter() - start)
+
+def bench_docling(args: argparse.Namespace) -> None:
+    """Compare a new Docling converter per PDF with the warm converter pool."""
+    from docling_pool import DoclingPool, make_docling_converter
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = []
+        for i in range(args.docs):
+            paths.append(os.path.join(folder, f"doc{i}.pdf"))
+            with open(paths[-1], "wb") as document:
+                document.write(make_pdf_document(args.pages))
+
+        start = time.perf_counter()
+        for path in paths:
+            make_docling_converter().convert(path)
+        report("new converter per PDF", args.docs, time.perf_counter() - start)
+
+        with DoclingPool(max_workers=args.workers) as pool:
+            start = time.perf_counter()
+            for path in paths:
+                pool.convert(path)
+            report(f"DoclingPool ({args.workers} workers)", args.docs, time.perf_counter() - start)
+            stats = pool.stats()
+        report("  model loads", stats["model_loads"], stats["model_load_seconds"], "loads")
+        report("  conversions", stats["documents"], stats["conversion_seconds"])
+
+class _Throttled(Exception):
+    """Raised by the stand-in endpoint when its quota is exceeded."""
+
+class _QuotaEndpoint:
+    """Stands in for a model endpoint that throttles beyond a concurrency quota."""
+
+    def __init__(self, quota: int, latency: float):
+        self.quota = quota
+        self.latency = latency
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def invoke(self) -> None:
+        with self.lock:
+            if self.in_flight >= self.quota:
+                raise _Throttled("Too many requests")
+            self.in_flight += 1
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+
+def bench_limiter(args: argparse.Namespace) -> None:
+    """Compare one model call at a time with the adaptive rate limiter."""
+    from concurrent.futures import ThreadPoolExecutor
+    from rate_limiter import RateLimiter, call_with_retry
+
+    # Throttling is expected here; keep the retry warnings out of the report
+    logging.getLogger("rate_limiter").setLevel(logging.ERROR)
+
+    endpoint = _QuotaEndpoint(args.quota, args.latency)
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        endpoint.invoke()
+    report("one call at a time", args.calls, time.perf_counter() - start, "calls")
+
+    limiter = RateLimiter(args.calls_per_minute, max_concurrency=args.workers)
+
+    def invoke(_):
+        call_with_retry(endpoint.invoke, limiter,
+                        lambda e: isinstance(e, _Throttled),
+                        max_retries=100, min_backoff=args.latency, max_backoff=args.latency)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        list(executor.map(invoke, range(args.calls)))
+    report(f"RateLimiter ({args.workers} threads)", args.calls, time.perf_counter() - start, "calls")
+    stats = limiter.stats()
+    print(f"  throttled {stats['throttles']} times, final window {stats['concurrency']:.1f}")
+
+def bench_packing(args: argparse.Namespace) -> None:
+    """Compare one model call per document with packed invocations."""
+    import random
+    from context_packer import ContextPacker
+
+    rng = random.Random(0)
+    page = " ".join(["word"] * 400)
+    documents = {}
+    for i in range(args.docs):
+        # Mostly short term sheets, with the occasional long prospectus
+        pages = rng.randint(80, 300) if rng.random() < 0.1 else rng.randint(1, 8)
+        documents[f"doc{i}"] = [page] * pages
+    packer = ContextPacker("Clean up the text of each chunk.", args.max_input_words,
+                           args.max_output_words, output_ratio=args.output_ratio)
+
+    start = time.perf_counter()
+    per_document = sum(len(packer.pack(packer.split(doc_id, pages)))
+                       for doc_id, pages in documents.items())
+    packed = len(packer.schedule(documents))
+    elapsed = time.perf_counter() - start
+
+    for name, calls in (("one document per call", per_document), ("packed", packed)):
+        print(f"{name:<32} {calls:>6} calls  "
+              f"({calls / args.calls_per_minute:6.1f} min at {args.calls_per_minute} calls/min)")
+    print(f"scheduling took {elapsed:.3f}s")
+
+def bench_tiers(args: argparse.Namespace) -> None:
+    """Compare pdfplumber with the tiered PyMuPDF-first extractor."""
+    from pdf_extractor import PDFExtractor
+    from tiered_extractor import TieredPDFExtractor
+
+    document = make_pdf_document(args.pages)
+    result = PDFExtractor(max_workers=1).extract(document)
+    report("pdfplumber", len(result.pages), result.elapsed, "pages")
+
+    extractor = TieredPDFExtractor()
+    result = extractor.extract(document)
+    report("tiered", len(result.pages), result.elapsed, "pages")
+    for tier, totals in extractor.stats().items():
+        report(f"  {tier} tier", totals["pages"], totals["seconds"], "pages")
+
+def skip_recognition(image, dpi: int) -> Tuple[str, float]:
+    """Stands in for Tesseract when it is not installed, so only rendering is timed."""
+    return "", -1.0
+
+def bench_ocr(args: argparse.Namespace) -> None:
+    """Compare serial fixed-DPI OCR with the OCR pool and Docling's OCR."""
+    import importlib.util
+    import shutil
+    import pymupdf
+    from docling_pool import DoclingPool
+    from ocr_pool import OcrPool, tesseract_recognize
+    from tiered_extractor import OCR_DPI, tesseract_ocr
+
+    if shutil.which("tesseract"):
+        recognize, ocr = tesseract_recognize, tesseract_ocr
+    else:
+        print("tesseract not found: timing rendering and preprocessing only")
+        recognize, ocr = skip_recognition, lambda image: ""
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "scanned.pdf")
+        with open(path, "wb") as document:
+            document.write(make_scanned_pdf_document(args.pages))
+
+        # The tiered extractor's OCR tier: every page as a PNG at one resolution
+        start = time.perf_counter()
+        with pymupdf.open(path) as document:
+            for page in document:
+                ocr(page.get_pixmap(dpi=OCR_DPI).tobytes("png"))
+        report(f"serial, {OCR_DPI} dpi", args.pages, time.perf_counter() - start, "pages")
+
+        for workers in sorted({1, args.workers}):
+            with OcrPool(max_workers=workers, recognizer=recognize) as pool:
+                start = time.perf_counter()
+                pages = pool.ocr_pages(path)
+                report(f"OcrPool ({workers} workers)", len(pages), time.perf_counter() - start,
+                       "pages")
+                stats = pool.stats()
+        for name in ("render", "preprocess", "recognize"):
+            report(f"  {name}", stats["pages"], stats[f"{name}_seconds"], "pages")
+        print(f"  dpi by page: {[page.dpi for page in pages]}, "
+              f"mean confidence {stats['mean_confidence']:.1f}")
+
+        if importlib.util.find_spec("docling") is None:
+            print("docling not installed: skipping Docling OCR")
+            return
+        # Model loading is left out, as the pipeline keeps Docling warm
+        with DoclingPool(do_ocr=True) as pool:
+            pool.convert(path)
+            stats = pool.stats()
+        report("Docling OCR", args.pages, stats["conversion_seconds"], "pages")
+
+def bench_similarity(args: argparse.Namespace) -> None:
+    """Compare the quadratic similarity score with the hashed one."""
+    from similarity import corpus_similarity, score_many, weighted_token_similarity
+
+    small = (make_filing_text(args.legacy_tokens, 1), make_filing_text(args.legacy_tokens, 2))
+    start = time.perf_counter()
+    legacy = legacy_weighted_token_similarity(*small)
+    report(f"legacy ({args.legacy_tokens} tokens)", 1, time.perf_counter() - start)
+    start = time.perf_counter()
+    assert weighted_token_similarity(*small) == legacy
+    report(f"hashed ({args.legacy_tokens} tokens)", 1, time.perf_counter() - start)
+
+    large = (make_filing_text(args.tokens, 1), make_filing_text(args.tokens, 2))
+    start = time.perf_counter()
+    weighted_token_similarity(*large)
+    report(f"hashed ({args.tokens} tokens)", 1, time.perf_counter() - start)
+
+    # One output scored against every ground truth, as when comparing methods
+    pairs = [(make_filing_text(args.tokens // 10, seed), large[1]) for seed in range(args.docs)]
+    start = time.perf_counter()
+    [weighted_token_similarity(*pair) for pair in pairs]
+    report("weighted_token_similarity loop", len(pairs), time.perf_counter() - start)
+    start = time.perf_counter()
+    score_many(pairs)
+    report("score_many", len(pairs), time.perf_counter() - start)
+
+    # Every method's output for every document, as in the comparison table
+    size = args.tokens // 10
+    ground_truths = {f"doc{i}": make_filing_text(size, i) for i in range(args.docs)}
+    outputs = {f"method{m}": {sample_id: make_filing_text(size, 1000 * (m + 1) + i)
+                              for i, sample_id in enumerate(ground_truths)}
+               for m in range(args.methods)}
+    start = time.perf_counter()
+    [weighted_token_similarity(ground_truths[sample_id], text)
+     for texts in outputs.values() for sample_id, text in texts.items()]
+    report("weighted_token_similarity corpus loop", args.docs * args.methods,
+           time.perf_counter() - start)
+    start = time.perf_counter()
+    corpus_similarity(ground_truths, outputs)
+    report("corpus_similarity (sparse)", args.docs * args.methods, time.perf_counter() - start)
+
+BENCHMARKS: Dict[str, Callable[[argparse.Namespace], None]] = {
+    "fetch": bench_fetch,
+    "extract": bench_extract,
+    "pdf": bench_pdf,
+    "batch": bench_batch,
+    "docling": bench_docling,
+    "limiter": bench_limiter,
+    "packing": bench_packing,
+    "tiers": bench_tiers,
+    "ocr": bench_ocr,
+    "similarity": bench_similarity,
+}
+
+def main():
+    """Command line interface for the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    fetch = subparsers.add_parser("fetch", help=bench_fetch.__doc__)
+    fetch.add_argument("--urls", type=int, default=100)
+    fetch.add_argument("--latency", type=float, default=0.1)
+    fetch.add_argument("--workers", type=int, default=8)
+    fetch.add_argument("--per-host", type=int, default=64)
+
+    extract = subparsers.add_parser("extract", help=bench_extract.__doc__)
+    extract.add_argument("--docs", type=int, default=20)
+
+    pdf = subparsers.add_parser("pdf", help=bench_pdf.__doc__)
+    pdf.add_argument("--pages", type=int, default=300)
+    pdf.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+
+    batch = subparsers.add_parser("batch", help=bench_batch.__doc__)
+    batch.add_argument("--docs", type=int, default=12)
+    batch.add_argument("--pages", type=int, default=10)
+    batch.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+
+    docling = subparsers.add_parser("docling", help=bench_docling.__doc__)
+    docling.add_argument("--docs", type=int, default=5)
+    docling.add_argument("--pages", type=int, default=5)
+    docling.add_argument("--workers", type=int, default=1)
+
+    limiter = subparsers.add_parser("limiter", help=bench_limiter.__doc__)
+    limiter.add_argument("--calls", type=int, default=200)
+    limiter.add_argument("--quota", type=int, default=4)
+    limiter.add_argument("--latency", type=float, default=0.05)
+    limiter.add_argument("--calls-per-minute", type=float, default=6000)
+    limiter.add_argument("--workers", type=int, default=8)
+
+    packing = subparsers.add_parser("packing", help=bench_packing.__doc__)
+    packing.add_argument("--docs", type=int, default=500)
+    packing.add_argument("--max-input-words", type=int, default=150000)
+    packing.add_argument("--max-output-words", type=int, default=6200)
+    packing.add_argument("--calls-per-minute", type=int, default=10)
+    packing.add_argument("--output-ratio", type=float, default=1.1)
+
+    tiers = subparsers.add_parser("tiers", help=bench_tiers.__doc__)
+    tiers.add_argument("--pages", type=int, default=100)
+
+    ocr = subparsers.add_parser("ocr", help=bench_ocr.__doc__)
+    ocr.add_argument("--pages", type=int, default=12)
+    ocr.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+
+    similarity = subparsers.add_parser("similarity", help=bench_similarity.__doc__)
+    similarity.add_argument("--tokens", type=int, default=100000)
+    similarity.add_argument("--legacy-tokens", type=int, default=5000)
+    similarity.add_argument("--docs", type=int, default=50)
+    similarity.add_argument("--methods", type=int, default=3)
+
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Packing of document pages into as few model invocations as possible.
+
+Model calls are limited per minute, not per word, so a call carrying one
+short term sheet costs as much quota as one filled to the context limit.
+This module splits large filings into runs of whole pages that fit one
+call, packs chunks from many documents into each call within the input and
+output word budgets, and routes every part of a response back to the
+document and pages it came from.
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+# Words added by the tags around each chunk, in the prompt and in the response
+CHUNK_OVERHEAD_WORDS = 8
+
+CHUNK_PATTERN = re.compile(r'<chunk id="(\d+)"[^>]*>\n?(.*?)\n?</chunk>', re.DOTALL)
+
+def count_words(text: str) -> int:
+    """Count number of words in text."""
+    return len(text.split())
+
+class Chunk(NamedTuple):
+    """A run of consecutive pages of one document."""
+    doc_id: str
+    first_page: int
+    last_page: int
+    text: str
+    words: int
+    # Index of this slice when a single page is too large for one call
+    part: int = 0
+
+    @property
+    def pages(self) -> str:
+        """Page range, e.g. ``"3-5"``."""
+        if self.first_page == self.last_page:
+            return str(self.first_page)
+        return f"{self.first_page}-{self.last_page}"
+
+class Invocation(NamedTuple):
+    """Chunks sent together in one model call."""
+    chunks: List[Chunk]
+    input_words: int
+    output_words: int
+
+class ContextPacker:
+    """Schedules document pages into model invocations under word budgets."""
+
+    def __init__(self, instruction: str, max_input_words: int, max_output_words: int,
+                 output_ratio: float = 1.0):
+        """Initialize the packer.
+
+        Args:
+            instruction: Task given to the model ahead of the chunks
+            max_input_words: Words allowed in one prompt
+            max_output_words: Words allowed in one response
+            output_ratio: Expected response words per input word of a chunk
+
+        Raises:
+            ValueError: If the budgets leave no room for any page text
+        """
+        self.instruction = instruction
+        self.max_input_words = max_input_words
+        self.max_output_words = max_output_words
+        self.output_ratio = output_ratio
+        self.prompt_words = count_words(self.prompt(Invocation([], 0, 0)))
+        if self.chunk_words <= 0:
+            raise ValueError("Word budgets leave no room for page text")
+
+    @property
+    def chunk_words(self) -> int:
+        """Largest number of page words a single chunk may hold."""
+        by_input = self.max_input_words - self.prompt_words - CHUNK_OVERHEAD_WORDS
+        by_output = (self.max_output_words - CHUNK_OVERHEAD_WORDS) / self.output_ratio
+        return int(min(by_input, by_output))
+
+    def split(self, doc_id: str, pages: Iterable[str]) -> List[Chunk]:
+        """Split a document into runs of consecutive pages that each fit one call.
+
+        Pages are read one at a time, so they may come straight from a
+        generator without the whole document being held at once.
+
+        Args:
+            doc_id: Document identifier
+            pages: Text of each page, in order
+
+        Returns:
+            List[Chunk]: Chunks covering every page in order; a page too large
+            for one call is split into several parts
+        """
+        limit = self.chunk_words
+        chunks: List[Chunk] = []
+        run: List[str] = []
+        run_words = 0
+        first = 1
+        number = 0
+        for number, text in enumerate(pages, start=1):
+            words = count_words(text)
+            if run and run_words + words > limit:
+                chunks.append(Chunk(doc_id, first, number - 1, "\n".join(run), run_words))
+                run, run_words = [], 0
+            if words > limit:
+                tokens = text.split()
+                for part, start in enumerate(range(0, words, limit)):
+                    piece = tokens[start:start + limit]
+                    chunks.append(Chunk(doc_id, number, number, " ".join(piece), len(piece), part))
+                first = number + 1
+                continue
+            if not run:
+                first = number
+            run.append(text)
+            run_words += words
+        if run:
+            chunks.append(Chunk(doc_id, first, number, "\n".join(run), run_words))
+        return chunks
+
+    def pack(self, chunks: Iterable[Chunk]) -> List[Invocation]:
+        """Pack chunks into invocations, first fit by decreasing size.
+
+        Args:
+            chunks: Chunks no larger than ``chunk_words``
+
+        Returns:
+            List[Invocation]: Invocations within both word budgets, each
+            holding its chunks in document and page order
+        """
+        bins: List[Tuple[List[Chunk], int, float]] = []
+        for chunk in sorted(chunks, key=lambda chunk: chunk.words, reverse=True):
+            input_words = chunk.words + CHUNK_OVERHEAD_WORDS
+            output_words = chunk.words * self.output_ratio + CHUNK_OVERHEAD_WORDS
+            for i, (members, used_input, used_output) in enumerate(bins):
+                if used_input + input_words <= self.max_input_words and \
+                        used_output + output_words <= self.max_output_words:
+                    members.append(chunk)
+                    bins[i] = (members, used_input + input_words, used_output + output_words)
+                    break
+            else:
+                bins.append(([chunk], self.prompt_words + input_words, output_words))
+        return [Invocation(sorted(members, key=lambda chunk: (chunk.doc_id, chunk.first_page, chunk.part)),
+                           used_input, int(used_output))
+                for members, used_input, used_output in bins]
+
+    def schedule(self, documents: Mapping[str, Sequence[str]]) -> List[Invocation]:
+        """Split and pack every document.
+
+        Args:
+            documents: Page texts by document identifier
+
+        Returns:
+            List[Invocation]: The invocations covering every page
+        """
+        return self.pack(chunk for doc_id, pages in documents.items()
+                         for chunk in self.split(doc_id, pages))
+
+    def prompt(self, invocation: Invocation) -> str:
+        """Build the prompt of an invocation.
+
+        Args:
+            invocation: Chunks to send
+
+        Returns:
+            str: Instruction, answer format and tagged chunks
+        """
+        parts = [
+            self.instruction,
+            'Answer for every chunk separately, as <chunk id="N">answer</chunk> '
+            'with the id of the chunk it answers, in the same order.',
+        ]
+        for i, chunk in enumerate(invocation.chunks):
+            parts.append(f'<chunk id="{i}" document="{chunk.doc_id}" pages="{chunk.pages}">\n'
+                         f'{chunk.text}\n</chunk>')
+        return "\n\n".join(parts)
+
+    @staticmethod
+    def route(invocation: Invocation, response: str) -> List[Tuple[Chunk, Optional[str]]]:
+        """Match the parts of a response to the chunks they answer.
+
+        Args:
+            invocation: The invocation the response answers
+            response: Model output
+
+        Returns:
+            List[Tuple[Chunk, Optional[str]]]: Every chunk with its answer,
+            or None when the response has no part for it
+        """
+        answers: Dict[int, str] = {}
+        for match in CHUNK_PATTERN.finditer(response):
+            index = int(match.group(1))
+            if index < len(invocation.chunks):
+                answers.setdefault(index, match.group(2).strip())
+        return [(chunk, answers.get(i)) for i, chunk in enumerate(invocation.chunks)]
+
+def assemble(routed: Iterable[Tuple[Chunk, str]]) -> Dict[str, str]:
+    """Join the answers of each document's chunks in page order.
+
+    Args:
+        routed: Chunks with their answers, from any number of invocations
+
+    Returns:
+        Dict[str, str]: Joined answer text by document identifier
+    """
+    by_document: Dict[str, List[Tuple[Chunk, str]]] = defaultdict(list)
+    for chunk, answer in routed:
+        by_document[chunk.doc_id].append((chunk, answer))
+    return {doc_id: "\n".join(answer for _, answer in
+                              sorted(parts, key=lambda item: (item[0].first_page, item[0].part)))
+            for doc_id, parts in by_document.items()}
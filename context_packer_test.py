@@ -0,0 +1,95 @@
+"""Tests for packing document pages into model invocations."""
+
+import random
+import unittest
+
+from context_packer import ContextPacker, assemble, count_words
+
+def page(words, label="w"):
+    """Build page text of a given number of words."""
+    return " ".join(f"{label}{i}" for i in range(words))
+
+class TestContextPacker(unittest.TestCase):
+    """Test cases for ContextPacker."""
+
+    def setUp(self):
+        self.packer = ContextPacker("Clean up the text of each chunk.",
+                                    max_input_words=1000, max_output_words=400)
+
+    def test_chunk_budget(self):
+        """Test that the output budget bounds the chunk size."""
+        self.assertEqual(self.packer.chunk_words, 392)
+        packer = ContextPacker("Summarize.", max_input_words=300, max_output_words=10000)
+        self.assertEqual(packer.chunk_words, 300 - packer.prompt_words - 8)
+        with self.assertRaises(ValueError):
+            ContextPacker("Summarize.", max_input_words=10, max_output_words=10)
+
+    def test_split_keeps_whole_pages(self):
+        """Test that pages are grouped into runs under the chunk budget."""
+        chunks = self.packer.split("doc", [page(150), page(150), page(150), page(0), page(10)])
+        self.assertEqual([(chunk.first_page, chunk.last_page) for chunk in chunks],
+                         [(1, 2), (3, 5)])
+        self.assertEqual([chunk.words for chunk in chunks], [300, 160])
+        self.assertEqual(chunks[0].pages, "1-2")
+
+    def test_split_reads_pages_lazily(self):
+        """Test that a generator of pages is split like a list."""
+        texts = [page(150), page(150), page(150), page(0), page(10)]
+        self.assertEqual(self.packer.split("doc", (text for text in texts)),
+                         self.packer.split("doc", texts))
+        self.assertEqual(self.packer.split("doc", iter([])), [])
+
+    def test_split_oversized_page(self):
+        """Test that a page larger than one call is cut into parts."""
+        chunks = self.packer.split("doc", [page(50), page(1000), page(50)])
+        self.assertEqual([(chunk.first_page, chunk.last_page, chunk.part, chunk.words)
+                          for chunk in chunks],
+                         [(1, 1, 0, 50), (2, 2, 0, 392), (2, 2, 1, 392), (2, 2, 2, 216),
+                          (3, 3, 0, 50)])
+
+    def test_packing_fills_calls(self):
+        """Test that small documents share calls within both budgets."""
+        rng = random.Random(0)
+        documents = {f"jefferies{i}": [page(rng.randint(5, 60)) for _ in range(rng.randint(1, 4))]
+                     for i in range(40)}
+        invocations = self.packer.schedule(documents)
+
+        total_words = sum(count_words(text) for pages in documents.values() for text in pages)
+        self.assertLess(len(invocations), len(documents))
+        # First fit decreasing never needs more than 11/9 of the optimum plus one
+        self.assertLessEqual(len(invocations), total_words / self.packer.chunk_words * 11 / 9 + 2)
+        for invocation in invocations:
+            self.assertLessEqual(count_words(self.packer.prompt(invocation)), 1000)
+            self.assertLessEqual(invocation.output_words, 400)
+        chunks = [chunk for invocation in invocations for chunk in invocation.chunks]
+        self.assertEqual(sorted((chunk.doc_id, chunk.first_page) for chunk in chunks),
+                         sorted((doc_id, 1) for doc_id in documents))
+
+    def test_prompt_and_routing(self):
+        """Test that answers return to their document and pages."""
+        documents = {"a": ["alpha one", "alpha two"], "b": ["beta"]}
+        invocation, = self.packer.schedule(documents)
+        prompt = self.packer.prompt(invocation)
+        self.assertIn('<chunk id="0" document="a" pages="1-2">\nalpha one\nalpha two\n</chunk>', prompt)
+        self.assertIn('<chunk id="1" document="b" pages="1">\nbeta\n</chunk>', prompt)
+
+        response = 'Sure.\n<chunk id="1">\nBETA\n</chunk>\n<chunk id="0">ALPHA</chunk>'
+        routed = self.packer.route(invocation, response)
+        self.assertEqual([(chunk.doc_id, answer) for chunk, answer in routed],
+                         [("a", "ALPHA"), ("b", "BETA")])
+
+    def test_missing_answers(self):
+        """Test that chunks without an answer are reported as None."""
+        invocation, = self.packer.schedule({"a": ["alpha"], "b": ["beta"]})
+        routed = self.packer.route(invocation, '<chunk id="0">ALPHA</chunk><chunk id="7">x</chunk>')
+        self.assertEqual([answer for _, answer in routed], ["ALPHA", None])
+
+    def test_assemble_in_page_order(self):
+        """Test that chunk answers are joined per document in page order."""
+        chunks = self.packer.split("doc", [page(300), page(300), page(500)])
+        routed = [(chunk, f"{chunk.first_page}.{chunk.part}") for chunk in reversed(chunks)]
+        self.assertEqual(assemble(routed), {"doc": "1.0\n2.0\n3.0\n3.1"})
+        self.assertEqual(assemble([]), {})
+
+if __name__ == '__main__':
+    unittest.main()
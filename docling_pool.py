@@ -0,0 +1,242 @@
+"""Warm, reusable Docling converters.
+
+Building a ``DocumentConverter`` loads Docling's layout and OCR models,
+which takes far longer than converting a typical filing. This module keeps
+one converter per worker process, built on the worker's first document and
+reused for every later one. Each worker is replaced on its own after a set
+number of documents, since model state grows with every conversion, and a
+pool left broken by a worker that died is rebuilt on the next document.
+
+Replacing single workers needs ``max_tasks_per_child``, new in Python 3.11,
+which also makes the pool start workers with ``spawn``. On older
+interpreters the whole pool is replaced instead once every worker has had
+its share of documents.
+"""
+
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, NamedTuple, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Documents each worker converts before it is replaced
+DEFAULT_MAX_DOCS_PER_WORKER = 25
+
+# ProcessPoolExecutor replaces single workers (max_tasks_per_child) from 3.11
+PER_WORKER_RECYCLING = sys.version_info >= (3, 11)
+
+ConverterFactory = Callable[[], Any]
+
+class DoclingError(Exception):
+    """Raised when Docling cannot convert a document."""
+    pass
+
+class ConversionResult(NamedTuple):
+    """Markdown converted from one document, with timings."""
+    text: Optional[str]
+    seconds: float
+    load_seconds: float = 0.0
+    pid: int = 0
+    error: Optional[str] = None
+
+def make_docling_converter(do_ocr: bool = True):
+    """Build a PDF converter with its models loaded.
+
+    Args:
+        do_ocr: Run OCR on bitmap content
+
+    Returns:
+        DocumentConverter: A converter ready to convert PDFs
+    """
+    from docling.datamodel.base_models import InputFormat
+    from docling.datamodel.pipeline_options import PdfPipelineOptions
+    from docling.document_converter import DocumentConverter, PdfFormatOption
+
+    pipeline_options = PdfPipelineOptions(do_ocr=do_ocr)
+    converter = DocumentConverter(
+        format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)}
+    )
+    # Load the models now rather than inside the first conversion
+    converter.initialize_pipeline(InputFormat.PDF)
+    return converter
+
+# Converter of this worker process, built on its first document
+_converter = None
+
+def _convert(factory: ConverterFactory, path: str) -> ConversionResult:
+    """Convert a document with this process's converter, building it if needed."""
+    global _converter
+    load_seconds = 0.0
+    try:
+        if _converter is None:
+            start = time.perf_counter()
+            _converter = factory()
+            load_seconds = time.perf_counter() - start
+            logger.info(f"Loaded Docling models in {load_seconds:.1f}s (pid {os.getpid()})")
+        start = time.perf_counter()
+        text = _converter.convert(path).document.export_to_markdown().strip()
+        return ConversionResult(text, time.perf_counter() - start, load_seconds, os.getpid())
+    except Exception as e:
+        return ConversionResult(None, 0.0, load_seconds, os.getpid(), str(e))
+
+class DoclingPool:
+    """Converts documents on worker processes that keep their models loaded."""
+
+    def __init__(self, max_workers: int = 1,
+                 max_docs_per_worker: int = DEFAULT_MAX_DOCS_PER_WORKER,
+                 do_ocr: bool = True,
+                 converter_factory: Optional[ConverterFactory] = None):
+        """Initialize the converter pool.
+
+        Args:
+            max_workers: Number of worker processes, each holding one
+                converter and its models
+            max_docs_per_worker: Documents each worker converts before it
+                is replaced by a fresh process that loads its models again
+            do_ocr: Run OCR on bitmap content
+            converter_factory: Picklable, module-level callable building a
+                converter; defaults to ``make_docling_converter``
+        """
+        self.max_workers = max_workers
+        self.max_docs_per_worker = max_docs_per_worker
+        self.converter_factory = converter_factory or functools.partial(
+            make_docling_converter, do_ocr=do_ocr)
+        self.documents = 0
+        self.failures = 0
+        self.conversion_seconds = 0.0
+        self.model_loads = 0
+        self.model_load_seconds = 0.0
+        self.pools_rebuilt = 0
+        self._worker_pids = set()
+        self._submitted = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def convert(self, path: Union[str, os.PathLike]) -> str:
+        """Convert a PDF to Markdown on a warm worker.
+
+        Safe to call from several threads; each call blocks until its
+        document is converted. A document whose worker died is tried once
+        more on a rebuilt pool.
+
+        Args:
+            path: Path of the PDF
+
+        Returns:
+            str: The document as Markdown
+
+        Raises:
+            DoclingError: If the document cannot be converted
+        """
+        for attempt in range(2):
+            executor = self._current_executor()
+            try:
+                result = executor.submit(_convert, self.converter_factory,
+                                         os.fspath(path)).result()
+                break
+            except BrokenProcessPool as e:
+                # A worker died, e.g. out of memory; every document in flight
+                # on this pool fails with it
+                logger.warning(f"Docling worker died converting {path}: {str(e)}")
+                self._discard(executor)
+                result = ConversionResult(None, 0.0, error=f"Docling worker died: {str(e)}")
+            except Exception as e:
+                result = ConversionResult(None, 0.0, error=str(e))
+                break
+        self._record(result)
+        if result.error is not None:
+            raise DoclingError(f"Failed to convert {path}: {result.error}")
+        return result.text
+
+    def _current_executor(self) -> ProcessPoolExecutor:
+        """Return the live pool, starting one if there is none.
+
+        Each worker is replaced by the pool itself after
+        ``max_docs_per_worker`` documents. Without per-worker recycling,
+        the pool is retired once it has been given ``max_workers`` times
+        that many; documents already on it still finish there.
+        """
+        retired = None
+        with self._lock:
+            if not PER_WORKER_RECYCLING and self._executor is not None and \
+                    self._submitted >= self.max_workers * self.max_docs_per_worker:
+                retired, self._executor = self._executor, None
+            if self._executor is None:
+                self._executor = self._new_executor()
+                self._submitted = 0
+            self._submitted += 1
+            executor = self._executor
+        if retired is not None:
+            retired.shutdown(wait=False)
+        return executor
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        """Start a pool of worker processes."""
+        if PER_WORKER_RECYCLING:
+            return ProcessPoolExecutor(max_workers=self.max_workers,
+                                       max_tasks_per_child=self.max_docs_per_worker)
+        return ProcessPoolExecutor(max_workers=self.max_workers)
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        """Drop a broken pool so the next document starts a new one."""
+        with self._lock:
+            if self._executor is not executor:
+                # Another caller already replaced it
+                return
+            self._executor = None
+            self.pools_rebuilt += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _record(self, result: ConversionResult) -> None:
+        """Add a conversion's timings to the totals."""
+        with self._lock:
+            self.documents += 1
+            self.conversion_seconds += result.seconds
+            if result.pid:
+                self._worker_pids.add(result.pid)
+            if result.error is not None:
+                self.failures += 1
+            if result.load_seconds:
+                self.model_loads += 1
+                self.model_load_seconds += result.load_seconds
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Return totals for this pool's lifetime.
+
+        Model loading is counted apart from conversion, so
+        ``conversion_seconds`` is the cost of the documents alone.
+
+        Returns:
+            Dict[str, Union[int, float]]: Documents, failures, conversion
+            seconds, model loads, model-load seconds, workers that
+            converted a document, and pools rebuilt after a worker died
+        """
+        with self._lock:
+            return {
+                "documents": self.documents,
+                "failures": self.failures,
+                "conversion_seconds": self.conversion_seconds,
+                "model_loads": self.model_loads,
+                "model_load_seconds": self.model_load_seconds,
+                "workers_started": len(self._worker_pids),
+                "pools_rebuilt": self.pools_rebuilt,
+            }
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __enter__(self) -> "DoclingPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
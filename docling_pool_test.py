@@ -0,0 +1,118 @@
+"""Tests for the warm Docling converter pool."""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from docling_pool import DoclingError, DoclingPool
+
+class FakeConverter:
+    """Stands in for a DocumentConverter, returning each file's text."""
+
+    def convert(self, path):
+        with open(path, encoding="utf-8") as file:
+            text = file.read()
+        if text == "broken":
+            raise ValueError("unreadable document")
+        if text == "crash":
+            # Dies the way an out-of-memory worker does
+            os._exit(1)
+        markdown = f"# {text}\n(pid {os.getpid()})"
+        return SimpleNamespace(document=SimpleNamespace(export_to_markdown=lambda: markdown))
+
+def make_fake_converter():
+    """Build a fake converter after a simulated model load."""
+    time.sleep(0.05)
+    return FakeConverter()
+
+class TestDoclingPool(unittest.TestCase):
+    """Test cases for DoclingPool."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.paths = []
+        for i in range(6):
+            self.paths.append(os.path.join(self.tmp_dir, f"jefferies{i}.pdf"))
+            with open(self.paths[-1], "w", encoding="utf-8") as file:
+                file.write(f"Document {i}")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_converter_is_reused(self):
+        """Test that one worker loads its models once for many documents."""
+        with DoclingPool(max_workers=1, converter_factory=make_fake_converter) as pool:
+            outputs = [pool.convert(path) for path in self.paths]
+            stats = pool.stats()
+
+        self.assertEqual([output.split("\n")[0] for output in outputs],
+                         [f"# Document {i}" for i in range(6)])
+        self.assertEqual(len({output.split("\n")[1] for output in outputs}), 1)
+        self.assertEqual(stats["documents"], 6)
+        self.assertEqual(stats["model_loads"], 1)
+        self.assertGreaterEqual(stats["model_load_seconds"], 0.05)
+        self.assertLess(stats["conversion_seconds"], stats["model_load_seconds"])
+
+    def test_workers_are_recycled(self):
+        """Test that workers are replaced after their document quota."""
+        with DoclingPool(max_workers=1, max_docs_per_worker=2,
+                         converter_factory=make_fake_converter) as pool:
+            outputs = [pool.convert(path) for path in self.paths[:5]]
+            stats = pool.stats()
+
+        self.assertEqual(stats["workers_started"], 3)
+        self.assertEqual(stats["model_loads"], 3)
+        self.assertEqual(len({output.split("\n")[1] for output in outputs}), 3)
+
+    def test_whole_pool_recycled_without_per_worker_recycling(self):
+        """Test that older interpreters replace the whole pool after its quota."""
+        with patch("docling_pool.PER_WORKER_RECYCLING", False):
+            with DoclingPool(max_workers=1, max_docs_per_worker=2,
+                             converter_factory=make_fake_converter) as pool:
+                outputs = [pool.convert(path) for path in self.paths[:5]]
+                stats = pool.stats()
+
+        self.assertEqual(stats["workers_started"], 3)
+        self.assertEqual(stats["model_loads"], 3)
+        self.assertEqual(len({output.split("\n")[1] for output in outputs}), 3)
+
+    def test_concurrent_callers(self):
+        """Test converting from several threads at once."""
+        with DoclingPool(max_workers=2, converter_factory=make_fake_converter) as pool:
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                outputs = list(executor.map(pool.convert, self.paths))
+            self.assertEqual(pool.stats()["documents"], 6)
+        self.assertEqual([output.split("\n")[0] for output in outputs],
+                         [f"# Document {i}" for i in range(6)])
+
+    def test_conversion_error(self):
+        """Test that failed conversions raise DoclingError and keep the worker."""
+        with open(self.paths[0], "w", encoding="utf-8") as file:
+            file.write("broken")
+        with DoclingPool(converter_factory=make_fake_converter) as pool:
+            with self.assertRaises(DoclingError):
+                pool.convert(self.paths[0])
+            self.assertTrue(pool.convert(self.paths[1]).startswith("# Document 1"))
+            stats = pool.stats()
+        self.assertEqual((stats["documents"], stats["failures"], stats["model_loads"]), (2, 1, 1))
+
+    def test_dead_worker(self):
+        """Test that a worker dying fails its document and the pool is rebuilt."""
+        with open(self.paths[0], "w", encoding="utf-8") as file:
+            file.write("crash")
+        with DoclingPool(converter_factory=make_fake_converter) as pool:
+            with self.assertRaises(DoclingError):
+                pool.convert(self.paths[0])
+            self.assertTrue(pool.convert(self.paths[1]).startswith("# Document 1"))
+            self.assertTrue(pool.convert(self.paths[2]).startswith("# Document 2"))
+            stats = pool.stats()
+        self.assertEqual((stats["documents"], stats["failures"]), (3, 1))
+        self.assertEqual(stats["pools_rebuilt"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
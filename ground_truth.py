@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""Ground-truth builder for the Jefferies workbooks.
+
+This module reads the ``jefferies{i}.xls`` ground-truth workbooks once each
+and produces both ground-truth CSVs from that single read: one with all
+rows of a workbook flattened into a string, and one with a JSON object of
+non-empty rows per sheet. Workbooks are parsed in a process pool with their
+sheets loaded on demand. A manifest records each workbook's size,
+modification time and hash next to its parsed text, so later runs only
+parse new or changed workbooks.
+
+It also provides a local, keyed cache of the ground truth published to a
+Google Sheet, for constant-time lookups by PDF name.
+"""
+
+import argparse
+import contextlib
+import csv
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Boilerplate stamped into every exported workbook
+UNWANTED_TEXT = "Created by EDGAR Online, Inc."
+
+# Headers of the two ground-truth CSVs
+FLAT_CSV_HEADER = ["pdf name", "groundTruth"]
+JSON_CSV_HEADER = ["pdfName", "groundTruth"]
+
+# Number of parsed workbooks committed to the manifest together
+DEFAULT_BATCH_SIZE = 50
+
+# Bytes read at a time when hashing a workbook
+READ_CHUNK_SIZE = 64 * 1024
+
+class WorkbookText(NamedTuple):
+    """Text of a ground-truth workbook in both output formats."""
+    name: str
+    flat: str
+    sheets: Dict[str, List[str]]
+
+    @property
+    def sheets_json(self) -> str:
+        """The per-sheet rows as a JSON string."""
+        return json.dumps(self.sheets, ensure_ascii=False)
+
+def file_digest(path: str) -> str:
+    """Compute the SHA-256 digest of a file.
+
+    Args:
+        path: The file to hash
+
+    Returns:
+        str: Hex digest
+    """
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def parse_workbook(path: str) -> WorkbookText:
+    """Read a workbook once and build both ground-truth formats.
+
+    Sheets are loaded one at a time and unloaded after reading. Each row
+    is its cells joined with spaces, with the EDGAR Online stamp removed.
+    The flat text joins every row, including empty ones; the per-sheet
+    rows skip empty rows.
+
+    Args:
+        path: Path of the ``.xls`` workbook
+
+    Returns:
+        WorkbookText: Flat and per-sheet text of the workbook
+    """
+    import xlrd
+
+    flat_rows = []
+    sheets = {}
+    workbook = xlrd.open_workbook(path, on_demand=True)
+    try:
+        for index, sheet_name in enumerate(workbook.sheet_names()):
+            sheet = workbook.sheet_by_index(index)
+            sheet_rows = []
+            for row_idx in range(sheet.nrows):
+                row_text = " ".join(map(str, sheet.row_values(row_idx)))
+                row_text = row_text.replace(UNWANTED_TEXT, "").strip()
+                flat_rows.append(row_text)
+                if row_text:
+                    sheet_rows.append(row_text)
+            sheets[sheet_name] = sheet_rows
+            workbook.unload_sheet(index)
+    finally:
+        workbook.release_resources()
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    return WorkbookText(name, " ".join(flat_rows), sheets)
+
+def _parse_and_hash(path: str) -> Tuple[str, WorkbookText]:
+    """Hash and parse a workbook; the unit of work run in each pool process."""
+    return file_digest(path), parse_workbook(path)
+
+class GroundTruthBuilder:
+    """Incrementally parses ground-truth workbooks and exports the CSVs."""
+
+    def __init__(self, folder_path: str, manifest_path: Optional[str] = None,
+                 max_workers: Optional[int] = None,
+                 executor: Optional[Executor] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        """Initialize the ground-truth builder.
+
+        Args:
+            folder_path: Directory holding the workbooks
+            manifest_path: SQLite manifest of parsed workbooks; defaults to
+                ``groundTruth.sqlite`` in ``folder_path``
+            max_workers: Number of parsing processes; defaults to the
+                number of available cores
+            executor: Pool to parse workbooks in; a process pool is
+                created for each build if omitted
+            batch_size: Number of parsed workbooks committed together
+        """
+        self.folder_path = folder_path
+        self.max_workers = max_workers
+        self.executor = executor
+        self.batch_size = batch_size
+        self._db = sqlite3.connect(
+            manifest_path or os.path.join(folder_path, "groundTruth.sqlite")
+        )
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS workbooks (
+                file_name TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                digest TEXT NOT NULL,
+                flat TEXT NOT NULL,
+                sheets TEXT NOT NULL,
+                parsed_at REAL NOT NULL
+            )"""
+        )
+        self._db.commit()
+
+    def __enter__(self) -> "GroundTruthBuilder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def stale(self, file_names: Iterable[str]) -> List[str]:
+        """Find the workbooks that are new or changed since they were parsed.
+
+        A workbook whose size and modification time match the manifest is
+        current. One whose timestamp changed but whose content hash did
+        not is current too; its manifest entry is refreshed.
+
+        Args:
+            file_names: Workbook file names within ``folder_path``
+
+        Returns:
+            List[str]: File names that need parsing, skipping missing files
+        """
+        stale = []
+        for file_name in file_names:
+            path = self._path(file_name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                print(f"File not found: {path}, skipping...")
+                continue
+            row = self._db.execute(
+                "SELECT size, mtime, digest FROM workbooks WHERE file_name = ?", (file_name,)
+            ).fetchone()
+            if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime:
+                continue
+            if row is not None and row[0] == stat.st_size and row[2] == file_digest(path):
+                self._db.execute("UPDATE workbooks SET mtime = ? WHERE file_name = ?",
+                                 (stat.st_mtime, file_name))
+                continue
+            stale.append(file_name)
+        self._db.commit()
+        return stale
+
+    def build(self, file_names: Iterable[str]) -> Dict[str, int]:
+        """Parse every new or changed workbook and record it in the manifest.
+
+        Args:
+            file_names: Workbook file names within ``folder_path``
+
+        Returns:
+            Dict[str, int]: Numbers of workbooks requested, parsed and failed
+        """
+        file_names = list(file_names)
+        stale = self.stale(file_names)
+        failed = 0
+        if stale:
+            owns_executor = self.executor is None
+            executor = self.executor or ProcessPoolExecutor(max_workers=self.max_workers)
+            try:
+                futures = {executor.submit(_parse_and_hash, self._path(file_name)): file_name
+                           for file_name in stale}
+                pending = 0
+                for future in as_completed(futures):
+                    file_name = futures[future]
+                    try:
+                        digest, workbook = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to parse {file_name}: {str(e)}")
+                        failed += 1
+                        continue
+                    self._record(file_name, digest, workbook)
+                    pending += 1
+                    if pending >= self.batch_size:
+                        self._db.commit()
+                        pending = 0
+                self._db.commit()
+            finally:
+                if owns_executor:
+                    executor.shutdown()
+        return {"workbooks": len(file_names), "parsed": len(stale) - failed, "failed": failed}
+
+    def _path(self, file_name: str) -> str:
+        return os.path.join(self.folder_path, file_name)
+
+    def _record(self, file_name: str, digest: str, workbook: WorkbookText) -> None:
+        """Store a parsed workbook in the manifest. The caller commits."""
+        stat = os.stat(self._path(file_name))
+        self._db.execute(
+            "INSERT OR REPLACE INTO workbooks VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (file_name, stat.st_size, stat.st_mtime, digest,
+             workbook.flat, workbook.sheets_json, time.time()),
+        )
+
+    def export(self, file_names: Iterable[str], flat_csv: Optional[str] = None,
+               json_csv: Optional[str] = None) -> int:
+        """Write the ground-truth CSVs for workbooks in the manifest.
+
+        Args:
+            file_names: Workbook file names, in output order; names that
+                were never parsed are skipped
+            flat_csv: Destination of the flattened-string CSV
+            json_csv: Destination of the JSON-per-sheet CSV
+
+        Returns:
+            int: Number of rows written to each CSV
+        """
+        targets = [(path, header, column) for path, header, column in (
+            (flat_csv, FLAT_CSV_HEADER, 0), (json_csv, JSON_CSV_HEADER, 1)) if path]
+        count = 0
+        with contextlib.ExitStack() as stack:
+            writers = []
+            for path, header, column in targets:
+                writer = csv.writer(stack.enter_context(
+                    open(path, "w", newline="", encoding="utf-8")))
+                writer.writerow(header)
+                writers.append((writer, column))
+
+            for file_name in file_names:
+                row = self._db.execute(
+                    "SELECT flat, sheets FROM workbooks WHERE file_name = ?", (file_name,)
+                ).fetchone()
+                if row is None:
+                    continue
+                pdf_name = os.path.splitext(file_name)[0]
+                for writer, column in writers:
+                    writer.writerow([pdf_name, row[column]])
+                count += 1
+        return count
+
+    def close(self) -> None:
+        """Close the manifest."""
+        self._db.close()
+
+class GroundTruthIndex:
+    """Local, keyed cache of ground-truth records fetched from a sheet.
+
+    Records are stored in SQLite per source and loaded into a dict, so a
+    lookup by PDF name is a hash lookup. The source is downloaded again
+    only when its version changes or its cached copy is too old.
+    """
+
+    def __init__(self, cache_path: str, key_field: str = "pdfName",
+                 value_field: str = "groundTruth"):
+        """Initialize the ground-truth index.
+
+        Args:
+            cache_path: Path of the SQLite cache
+            key_field: Record field holding the PDF name
+            value_field: Record field holding the ground truth
+        """
+        self.key_field = key_field
+        self.value_field = value_field
+        self.values: Dict[str, str] = {}
+        self._db = sqlite3.connect(cache_path)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS sources (
+                source TEXT PRIMARY KEY,
+                version TEXT,
+                fetched_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS ground_truth (
+                source TEXT NOT NULL,
+                pdf_name TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (source, pdf_name)
+            )"""
+        )
+        self._db.commit()
+
+    def __enter__(self) -> "GroundTruthIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __getitem__(self, pdf_name: str) -> str:
+        return self.values[pdf_name]
+
+    def __contains__(self, pdf_name: object) -> bool:
+        return pdf_name in self.values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def get(self, pdf_name: str, default: Optional[str] = None) -> Optional[str]:
+        """Look up the ground truth of a PDF."""
+        return self.values.get(pdf_name, default)
+
+    def is_stale(self, source: str, version: Optional[str] = None,
+                 max_age: Optional[float] = None) -> bool:
+        """Check whether the cached copy of a source must be fetched again.
+
+        Args:
+            source: Identifier of the source, such as the sheet URL
+            version: Current version of the source, such as its last
+                update time; a cached copy of another version is stale
+            max_age: Maximum age of the cached copy in seconds
+
+        Returns:
+            bool: True if the source is not cached or is out of date
+        """
+        row = self._db.execute(
+            "SELECT version, fetched_at FROM sources WHERE source = ?", (source,)
+        ).fetchone()
+        if row is None:
+            return True
+        if version is not None and row[0] != version:
+            return True
+        return max_age is not None and time.time() - row[1] > max_age
+
+    def load(self, source: str, fetch_records: Callable[[], Iterable[Dict]],
+             version: Optional[str] = None, max_age: Optional[float] = None) -> bool:
+        """Load a source's records, fetching them only if the cache is stale.
+
+        When a PDF name appears more than once, its first record wins.
+
+        Args:
+            source: Identifier of the source, such as the sheet URL
+            fetch_records: Downloads the source's records as dicts
+            version: Current version of the source, such as its last
+                update time
+            max_age: Maximum age of the cached copy in seconds
+
+        Returns:
+            bool: True if the records were fetched, False if served from cache
+        """
+        fetched = self.is_stale(source, version, max_age)
+        if fetched:
+            records = fetch_records()
+            with self._db:
+                self._db.execute("DELETE FROM ground_truth WHERE source = ?", (source,))
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO ground_truth VALUES (?, ?, ?)",
+                    ((source, str(record[self.key_field]), str(record[self.value_field]))
+                     for record in records),
+                )
+                self._db.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)",
+                                 (source, version, time.time()))
+            logger.info(f"Fetched ground truth from {source}")
+
+        self.values = dict(self._db.execute(
+            "SELECT pdf_name, value FROM ground_truth WHERE source = ?", (source,)
+        ))
+        return fetched
+
+    def close(self) -> None:
+        """Close the cache."""
+        self._db.close()
+
+def workbook_names(first: int, last: int) -> List[str]:
+    """Build the ``jefferies{i}.xls`` file names for a range of indices."""
+    return [f"jefferies{i}.xls" for i in range(first, last + 1)]
+
+def main():
+    """Command line interface for the ground-truth builder."""
+    parser = argparse.ArgumentParser(description="Build the ground-truth CSVs from the Jefferies workbooks")
+    parser.add_argument("folder", help="Directory holding the jefferies{i}.xls workbooks")
+    parser.add_argument("--first", type=int, default=1, help="First workbook index")
+    parser.add_argument("--last", type=int, default=50, help="Last workbook index")
+    parser.add_argument("--flat-csv", help="Write the flattened-string CSV here")
+    parser.add_argument("--json-csv", help="Write the JSON-per-sheet CSV here")
+    parser.add_argument("--manifest", help="Path of the manifest of parsed workbooks")
+    parser.add_argument("--workers", type=int, help="Number of parsing processes")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    file_names = workbook_names(args.first, args.last)
+    with GroundTruthBuilder(args.folder, args.manifest, max_workers=args.workers) as builder:
+        stats = builder.build(file_names)
+        builder.export(file_names, args.flat_csv, args.json_csv)
+    print(f"Parsed {stats['parsed']} of {stats['workbooks']} workbooks "
+          f"({stats['failed']} failed)")
+
+if __name__ == "__main__":
+    main()
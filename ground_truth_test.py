@@ -0,0 +1,176 @@
+"""Unit tests for the ground-truth builder."""
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+try:
+    import xlwt
+except ImportError:
+    xlwt = None
+
+from ground_truth import GroundTruthBuilder, GroundTruthIndex, parse_workbook, workbook_names
+
+def write_workbook(path, sheets):
+    """Write an .xls workbook with the given rows per sheet."""
+    book = xlwt.Workbook()
+    for sheet_name, rows in sheets.items():
+        sheet = book.add_sheet(sheet_name)
+        for row_idx, row in enumerate(rows):
+            for col_idx, value in enumerate(row):
+                sheet.write(row_idx, col_idx, value)
+    book.save(path)
+
+@unittest.skipIf(xlwt is None, "xlwt is required to write test workbooks")
+class TestGroundTruthBuilder(unittest.TestCase):
+    """Test the ground-truth builder component."""
+
+    def setUp(self):
+        """Set up test cases."""
+        self.folder = tempfile.mkdtemp()
+        self.flat_csv = os.path.join(self.folder, "flat.csv")
+        self.json_csv = os.path.join(self.folder, "json.csv")
+        write_workbook(os.path.join(self.folder, "jefferies1.xls"), {
+            "Terms": [["Issuer", "Jefferies"], ["Created by EDGAR Online, Inc."], ["Coupon", 7.5]],
+            "Dates": [["Pricing date", "2024-01-02"]],
+        })
+        write_workbook(os.path.join(self.folder, "jefferies2.xls"), {
+            "Terms": [["Principal", 1000]],
+        })
+        self.builder = GroundTruthBuilder(self.folder, executor=ThreadPoolExecutor(2))
+
+    def tearDown(self):
+        """Tear down test cases."""
+        self.builder.close()
+        shutil.rmtree(self.folder)
+
+    def read_csv(self, path):
+        with open(path, newline="", encoding="utf-8") as file:
+            return list(csv.reader(file))
+
+    def test_parse_workbook(self):
+        """Test that one read produces both output formats."""
+        workbook = parse_workbook(os.path.join(self.folder, "jefferies1.xls"))
+
+        self.assertEqual(workbook.name, "jefferies1")
+        self.assertEqual(workbook.flat, "Issuer Jefferies  Coupon 7.5 Pricing date 2024-01-02")
+        self.assertEqual(workbook.sheets, {
+            "Terms": ["Issuer Jefferies", "Coupon 7.5"],
+            "Dates": ["Pricing date 2024-01-02"],
+        })
+
+    def test_build_and_export(self):
+        """Test that both CSVs are written with the legacy headers."""
+        names = workbook_names(1, 3)
+        stats = self.builder.build(names)
+        self.assertEqual(stats, {"workbooks": 3, "parsed": 2, "failed": 0})
+
+        self.assertEqual(self.builder.export(names, self.flat_csv, self.json_csv), 2)
+        flat = self.read_csv(self.flat_csv)
+        self.assertEqual(flat[0], ["pdf name", "groundTruth"])
+        self.assertEqual(flat[2], ["jefferies2", "Principal 1000.0"])
+        rows = self.read_csv(self.json_csv)
+        self.assertEqual(rows[0], ["pdfName", "groundTruth"])
+        self.assertEqual(json.loads(rows[1][1])["Dates"], ["Pricing date 2024-01-02"])
+
+    def test_unchanged_workbooks_are_not_reparsed(self):
+        """Test that a rebuild only parses new or changed workbooks."""
+        names = workbook_names(1, 2)
+        self.builder.build(names)
+
+        with mock.patch("ground_truth.parse_workbook") as parse:
+            self.assertEqual(self.builder.build(names)["parsed"], 0)
+            parse.assert_not_called()
+
+        # Touching a workbook without changing it only refreshes the manifest
+        path = os.path.join(self.folder, "jefferies1.xls")
+        os.utime(path, (1, 1))
+        self.assertEqual(self.builder.stale(names), [])
+
+        write_workbook(path, {"Terms": [["Issuer", "Jefferies Financial Group"]]})
+        os.utime(path, (2, 2))
+        self.assertEqual(self.builder.build(names)["parsed"], 1)
+        self.builder.export(names, flat_csv=self.flat_csv)
+        self.assertEqual(self.read_csv(self.flat_csv)[1],
+                         ["jefferies1", "Issuer Jefferies Financial Group"])
+
+    def test_unreadable_workbook(self):
+        """Test that a corrupt workbook is counted as failed."""
+        with open(os.path.join(self.folder, "jefferies3.xls"), "wb") as file:
+            file.write(b"not a workbook")
+        stats = self.builder.build(workbook_names(1, 3))
+        self.assertEqual(stats, {"workbooks": 3, "parsed": 2, "failed": 1})
+
+    def test_process_pool(self):
+        """Test parsing in the default process pool."""
+        with GroundTruthBuilder(self.folder, os.path.join(self.folder, "other.sqlite"),
+                                max_workers=2) as builder:
+            self.assertEqual(builder.build(workbook_names(1, 2))["parsed"], 2)
+
+class TestGroundTruthIndex(unittest.TestCase):
+    """Test the ground-truth index component."""
+
+    def setUp(self):
+        """Set up test cases."""
+        self.folder = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.folder, "index.sqlite")
+        self.index = GroundTruthIndex(self.cache_path)
+        self.fetches = 0
+        self.records = [
+            {"pdfName": "jefferies1", "groundTruth": "Issuer Jefferies"},
+            {"pdfName": "jefferies2", "groundTruth": 1000},
+            {"pdfName": "jefferies1", "groundTruth": "duplicate"},
+        ]
+
+    def tearDown(self):
+        """Tear down test cases."""
+        self.index.close()
+        shutil.rmtree(self.folder)
+
+    def fetch(self):
+        self.fetches += 1
+        return self.records
+
+    def test_lookup(self):
+        """Test keyed lookups after loading a source."""
+        self.assertTrue(self.index.load("sheet", self.fetch, version="v1"))
+
+        self.assertEqual(self.index["jefferies1"], "Issuer Jefferies")
+        self.assertEqual(self.index["jefferies2"], "1000")
+        self.assertIn("jefferies2", self.index)
+        self.assertIsNone(self.index.get("jefferies3"))
+        self.assertEqual(len(self.index), 2)
+
+    def test_cached_source_is_not_fetched_again(self):
+        """Test that an unchanged source is served from the local cache."""
+        self.index.load("sheet", self.fetch, version="v1")
+        self.index.close()
+
+        self.index = GroundTruthIndex(self.cache_path)
+        self.assertFalse(self.index.load("sheet", self.fetch, version="v1"))
+        self.assertEqual(self.fetches, 1)
+        self.assertEqual(self.index["jefferies1"], "Issuer Jefferies")
+
+    def test_new_version_is_fetched(self):
+        """Test that a changed source replaces the cached records."""
+        self.index.load("sheet", self.fetch, version="v1")
+        self.records = [{"pdfName": "jefferies3", "groundTruth": "New"}]
+
+        self.assertTrue(self.index.load("sheet", self.fetch, version="v2"))
+        self.assertEqual(dict(self.index.values), {"jefferies3": "New"})
+
+    def test_max_age(self):
+        """Test that an old cached copy is fetched again."""
+        self.index.load("sheet", self.fetch)
+        self.assertFalse(self.index.is_stale("sheet", max_age=60))
+        with mock.patch("ground_truth.time.time", return_value=time.time() + 120):
+            self.assertTrue(self.index.is_stale("sheet", max_age=60))
+
+if __name__ == '__main__':
+    unittest.main()
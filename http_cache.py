@@ -0,0 +1,350 @@
+"""Persistent HTTP response cache.
+
+This module provides an on-disk, content-addressed cache for fetched
+documents. Response bodies are stored once per SHA-256 digest, while a small
+SQLite index maps each URL to its body and validators (ETag/Last-Modified)
+so that later fetches can revalidate with a conditional request instead of
+downloading the document again.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import BinaryIO, Dict, NamedTuple, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Default cache size cap (1 GiB)
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Chunk size used when copying bodies to and from disk
+CHUNK_SIZE = 64 * 1024
+
+# Least recently used entries read per eviction query
+EVICTION_BATCH = 256
+
+class CachedResponse(NamedTuple):
+    """A cached response body and its validators."""
+    url: str
+    content: bytes
+    encoding: Optional[str]
+    content_type: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+    @property
+    def text(self) -> str:
+        """The body decoded with the response's encoding."""
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+class StreamedResponse(NamedTuple):
+    """A response body exposed as a seekable binary file.
+
+    The body is either a spooled temporary file or an open cache object, so
+    it can be consumed without holding the whole document in memory. Use it
+    as a context manager to close the file when done.
+    """
+    url: str
+    body: BinaryIO
+    encoding: Optional[str]
+    content_type: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+    def __enter__(self) -> "StreamedResponse":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying body file."""
+        self.body.close()
+
+class ResponseCache:
+    """On-disk, content-addressed response cache with LRU eviction."""
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Initialize the response cache.
+
+        Args:
+            cache_dir: Directory holding the index and response bodies
+            max_bytes: Size cap for stored bodies; least recently used
+                entries are evicted once it is exceeded
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+        self._db = sqlite3.connect(
+            os.path.join(cache_dir, "index.sqlite"), check_same_thread=False
+        )
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                encoding TEXT,
+                content_type TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (accessed_at)")
+        self._db.commit()
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "objects", digest[:2], digest)
+
+    def _lookup(self, url: str) -> Optional[tuple]:
+        """Fetch the index row for a URL."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT digest, encoding, content_type, etag, last_modified, stored_at "
+                "FROM entries WHERE url = ?",
+                (url,),
+            ).fetchone()
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """Look up the cached response for a URL.
+
+        Args:
+            url: The URL to look up
+
+        Returns:
+            Optional[CachedResponse]: The cached response, or None if the URL
+            is not cached or its body has gone missing
+        """
+        entry = self.open(url)
+        if entry is None:
+            return None
+        with entry:
+            content = entry.body.read()
+        return CachedResponse(url, content, *entry[2:])
+
+    def open(self, url: str) -> Optional[StreamedResponse]:
+        """Open the cached body for a URL without reading it into memory.
+
+        Args:
+            url: The URL to look up
+
+        Returns:
+            Optional[StreamedResponse]: The cached response with its body
+            opened for reading, or None if the URL is not cached
+        """
+        row = self._lookup(url)
+        if row is None:
+            return None
+        digest, encoding, content_type, etag, last_modified, stored_at = row
+        try:
+            body = open(self._object_path(digest), "rb")
+        except FileNotFoundError:
+            logger.warning(f"Cached body missing for {url}, dropping entry")
+            self.delete(url)
+            return None
+        return StreamedResponse(url, body, encoding, content_type or "",
+                                etag, last_modified, stored_at)
+
+    @staticmethod
+    def conditional_headers(
+        entry: Optional[Union[CachedResponse, StreamedResponse]]
+    ) -> Dict[str, str]:
+        """Build revalidation headers for a cached response.
+
+        Args:
+            entry: The cached response, if any
+
+        Returns:
+            Dict[str, str]: If-None-Match/If-Modified-Since headers
+        """
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def record_hit(self, url: str, revalidated: bool = False) -> None:
+        """Count a response served from the cache and mark it recently used.
+
+        Args:
+            url: The URL that was served
+            revalidated: Whether the server confirmed the entry is current,
+                which also resets its age
+        """
+        now = time.time()
+        with self._lock:
+            self.hits += 1
+            if revalidated:
+                self._db.execute(
+                    "UPDATE entries SET accessed_at = ?, stored_at = ? WHERE url = ?",
+                    (now, now, url),
+                )
+            else:
+                self._db.execute(
+                    "UPDATE entries SET accessed_at = ? WHERE url = ?", (now, url)
+                )
+            self._db.commit()
+
+    def put(self, url: str, content: bytes, encoding: Optional[str] = None,
+            content_type: str = "", etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> None:
+        """Store a freshly downloaded response, counting it as a miss.
+
+        Args:
+            url: The URL the response was fetched from
+            content: Raw response body
+            encoding: Character encoding of the body
+            content_type: Content-Type header value
+            etag: ETag header value
+            last_modified: Last-Modified header value
+        """
+        self.put_stream(url, io.BytesIO(content), encoding, content_type,
+                        etag, last_modified)
+
+    def put_stream(self, url: str, body: BinaryIO, encoding: Optional[str] = None,
+                   content_type: str = "", etag: Optional[str] = None,
+                   last_modified: Optional[str] = None) -> None:
+        """Store a response body read from a file, counting it as a miss.
+
+        The body is copied in chunks and rewound afterwards so the caller can
+        keep consuming it.
+
+        Args:
+            url: The URL the response was fetched from
+            body: Seekable binary file positioned at the start of the body
+            encoding: Character encoding of the body
+            content_type: Content-Type header value
+            etag: ETag header value
+            last_modified: Last-Modified header value
+        """
+        objects_dir = os.path.join(self.cache_dir, "objects")
+        tmp_path = os.path.join(
+            objects_dir, f"incoming.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        hasher = hashlib.sha256()
+        size = 0
+        with open(tmp_path, "wb") as f:
+            for chunk in iter(lambda: body.read(CHUNK_SIZE), b""):
+                hasher.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        body.seek(0)
+
+        digest = hasher.hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            self.misses += 1
+            old = self._db.execute(
+                "SELECT digest FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, size, encoding, content_type, etag,
+                 last_modified, now, now),
+            )
+            if old is not None and old[0] != digest:
+                self._release_object(old[0])
+            self._evict()
+            self._db.commit()
+
+    def delete(self, url: str) -> None:
+        """Remove a URL from the cache.
+
+        Args:
+            url: The URL to remove
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            if row is not None:
+                self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+                self._release_object(row[0])
+                self._db.commit()
+
+    def _release_object(self, digest: str) -> bool:
+        """Delete a body once no entry references it. Caller holds the lock.
+
+        Returns:
+            bool: Whether the body was released
+        """
+        in_use = self._db.execute(
+            "SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)
+        ).fetchone()
+        if in_use is not None:
+            return False
+        try:
+            os.remove(self._object_path(digest))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def _total_bytes(self) -> int:
+        """Size of all distinct stored bodies. Caller holds the lock."""
+        row = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM "
+            "(SELECT digest, MAX(size) AS size FROM entries GROUP BY digest)"
+        ).fetchone()
+        return row[0]
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until under the size cap."""
+        excess = self._total_bytes() - self.max_bytes
+        while excess > 0:
+            rows = self._db.execute(
+                "SELECT url, digest, size FROM entries ORDER BY accessed_at LIMIT ?",
+                (EVICTION_BATCH,),
+            ).fetchall()
+            if not rows:
+                break
+            for url, digest, size in rows:
+                self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+                # A body shared with other URLs frees no space until its last entry goes
+                if self._release_object(digest):
+                    excess -= size
+                self.evictions += 1
+                logger.debug(f"Evicted {url} from response cache")
+                if excess <= 0:
+                    break
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters for this session.
+
+        Returns:
+            Dict[str, int]: Hits, misses, evictions, entry count and bytes stored
+        """
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            total = self._total_bytes()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total,
+        }
+
+    def close(self) -> None:
+        """Close the cache index."""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,146 @@
+"""Unit tests for the persistent HTTP response cache."""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from http_cache import ResponseCache
+from url_extractor import ContentFetcher
+
+class TestResponseCache(unittest.TestCase):
+    """Test the response cache component."""
+
+    def setUp(self):
+        """Set up test cases."""
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.cache_dir, max_bytes=100)
+
+    def tearDown(self):
+        """Tear down test cases."""
+        self.cache.close()
+        shutil.rmtree(self.cache_dir)
+
+    def test_put_and_get(self):
+        """Test storing and reading back a response."""
+        self.cache.put("https://example.com/a", b"body", "utf-8", "text/html",
+                       etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+
+        entry = self.cache.get("https://example.com/a")
+
+        self.assertEqual(entry.content, b"body")
+        self.assertEqual(entry.text, "body")
+        self.assertEqual(ResponseCache.conditional_headers(entry), {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+        })
+
+    def test_missing_url(self):
+        """Test lookup of an uncached URL."""
+        self.assertIsNone(self.cache.get("https://example.com/missing"))
+        self.assertEqual(ResponseCache.conditional_headers(None), {})
+
+    def test_identical_bodies_stored_once(self):
+        """Test that bodies are content-addressed."""
+        self.cache.put("https://example.com/a", b"x" * 40)
+        self.cache.put("https://example.com/b", b"x" * 40)
+
+        stats = self.cache.stats()
+
+        self.assertEqual(stats["entries"], 2)
+        self.assertEqual(stats["bytes"], 40)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        self.cache.put("https://example.com/a", b"a" * 40)
+        self.cache.put("https://example.com/b", b"b" * 40)
+        self.cache.record_hit("https://example.com/a")
+        self.cache.put("https://example.com/c", b"c" * 40)
+
+        self.assertIsNotNone(self.cache.get("https://example.com/a"))
+        self.assertIsNone(self.cache.get("https://example.com/b"))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+        objects = [f for _, _, files in os.walk(self.cache_dir) for f in files
+                   if not f.startswith("index")]
+        self.assertEqual(len(objects), 2)
+
+    def test_eviction_of_shared_body(self):
+        """Test that a shared body is only counted as freed with its last entry."""
+        self.cache.put("https://example.com/a", b"x" * 40)
+        self.cache.put("https://example.com/b", b"x" * 40)
+        self.cache.put("https://example.com/c", b"c" * 70)
+
+        self.assertIsNone(self.cache.get("https://example.com/a"))
+        self.assertIsNone(self.cache.get("https://example.com/b"))
+        self.assertIsNotNone(self.cache.get("https://example.com/c"))
+        stats = self.cache.stats()
+        self.assertEqual((stats["evictions"], stats["bytes"]), (2, 70))
+
+class _ValidatingHandler(BaseHTTPRequestHandler):
+    """Serves one document with an ETag and honours If-None-Match."""
+
+    def do_GET(self):
+        self.server.requests += 1
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = b"<html><body><p>Filing</p></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class TestCachedContentFetcher(unittest.TestCase):
+    """Test content fetching through the response cache."""
+
+    def setUp(self):
+        """Set up test cases."""
+        self.cache_dir = tempfile.mkdtemp()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _ValidatingHandler)
+        self.server.requests = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/doc.htm"
+
+    def tearDown(self):
+        """Tear down test cases."""
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache_dir)
+
+    def test_revalidation(self):
+        """Test that a rerun revalidates instead of downloading."""
+        cache = ResponseCache(self.cache_dir)
+        first = ContentFetcher(cache=cache).fetch(self.url)
+        cache.close()
+
+        cache = ResponseCache(self.cache_dir)
+        second = ContentFetcher(cache=cache).fetch(self.url)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 0)
+        cache.close()
+
+    def test_fresh_entry_skips_network(self):
+        """Test that entries younger than max_age are served directly."""
+        cache = ResponseCache(self.cache_dir)
+        fetcher = ContentFetcher(cache=cache, max_age=3600)
+
+        fetcher.fetch(self.url)
+        fetcher.fetch(self.url)
+
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "evictions": 0,
+                                         "entries": 1, "bytes": 39})
+        cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
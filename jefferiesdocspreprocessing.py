@@ -3,18 +3,19 @@
 
 import os
 import json
-import csv
+import functools
 import re
 import time
-import random
 import logging
 import base64
 import requests
 import difflib
 import botocore.exceptions
-import pandas as pd
 import cv2
-from io import BytesIO
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO, StringIO
+from typing import Any, Dict, NamedTuple, Optional
 from PIL import Image
 from IPython.display import display
 from google.colab.patches import cv2_imshow
@@ -26,13 +27,19 @@ import fitz
 import pytesseract
 import dotenv
 import gspread
-import pdfplumber
 from datasets import load_dataset, DatasetDict, load_from_disk
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.metrics.pairwise import cosine_similarity as sklearn_cosine_similarity
-from docling.datamodel.base_models import DocumentStream, InputFormat
-from docling.document_converter import DocumentConverter, PdfFormatOption
-from docling.datamodel.pipeline_options import PdfPipelineOptions
+from ground_truth import GroundTruthIndex
+from batch_runner import run_tasks
+from context_packer import ContextPacker, assemble
+from docling_pool import DoclingPool
+from model_cache import ModelResponseCache
+from ocr_pool import LOW_CONFIDENCE, OcrPool
+from page_cache import PageCache
+from rate_limiter import RateLimiter, call_with_retry
+from results_journal import ResultsJournal
+from pdf_extractor import PDFExtractor
+from similarity import corpus_similarity, weighted_token_similarity, write_comparison_csv
+from tiered_extractor import TIERS, TieredPDFExtractor
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -46,12 +53,63 @@ MAX_CONTEXT_WORDS = 150000
 MAX_OUTPUT_WORDS = 6200
 MIN_BACKOFF_TIME = 5
 MAX_RETRIES = 15
-DELAY_BETWEEN_CALLS = 1
-MAX_BATCH_SIZE = 3
+MAX_CONCURRENT_CALLS = 4
+# Expected response words per input word when the model rewrites page text
+MODEL_OUTPUT_RATIO = 1.1
+# Share of MAX_OUTPUT_WORDS that packed calls are sized to; the ratio is only
+# an estimate, and a response over the limit is rejected and sent again
+MODEL_OUTPUT_HEADROOM = 0.8
+# The model stage makes billed Bedrock calls, so it only runs when enabled
+RUN_MODEL_STAGE = False
+MODEL_INSTRUCTION = ("Each chunk below is text extracted from pages of a financial filing. "
+                     "Rewrite it as clean plain text: fix broken words and spacing, keep every "
+                     "number, date and term exactly as written, and add nothing.")
+GROUND_TRUTH_MAX_AGE = 24 * 60 * 60
+MODEL_CACHE_TTL = 30 * 24 * 60 * 60
+# Set to re-send every prompt and refresh the cached responses
+MODEL_CACHE_BYPASS = False
 
-# Rate limiting state
-last_call_timestamps = []
-consecutive_failures = 0
+# Shared by every thread calling Bedrock: paces calls to the per-minute
+# quota and widens concurrency until the endpoint starts throttling
+MODEL_LIMITER = RateLimiter(MAX_CALLS_PER_MINUTE, max_concurrency=MAX_CONCURRENT_CALLS)
+
+RESULTS_CSV_FIELDS = ["sample_id", "model_output", "ground_truth", "weighted_token_similarity"]
+
+MAX_RSS_BYTES = 2 * 1024 * 1024 * 1024
+
+# Shards the pages of each PDF across a process pool, a window of pages at a
+# time so 1,000-page prospectuses stay under the memory ceiling
+PDF_EXTRACTOR = PDFExtractor(low_memory=True, max_rss_bytes=MAX_RSS_BYTES)
+
+# Page cache lookups of this run, tallied in the main process from the
+# counts the extraction workers return
+PAGE_CACHE_LOOKUPS = {"hits": 0, "misses": 0}
+
+# Splits page text into model-sized chunks; the extraction workers feed it
+# pages as they are extracted
+MODEL_PACKER = ContextPacker(MODEL_INSTRUCTION, MAX_CONTEXT_WORDS,
+                             int(MAX_OUTPUT_WORDS * MODEL_OUTPUT_HEADROOM),
+                             output_ratio=MODEL_OUTPUT_RATIO)
+
+# Reads text layers with PyMuPDF and sends only weak pages to pdfplumber or OCR
+TIERED_EXTRACTOR = TieredPDFExtractor()
+
+# Pages and seconds by tier of this run, added up in the main process from
+# the totals each extraction worker returns with its PDF
+TIER_STATS = {tier: {"pages": 0, "seconds": 0.0} for tier in TIERS}
+
+# Worker processes extracting PDFs side by side
+EXTRACTION_WORKERS = os.cpu_count() or 1
+
+# Docling workers each hold their own layout and OCR models, so fewer run
+# at once; they are replaced after DOCLING_DOCS_PER_WORKER PDFs
+DOCLING_WORKERS = 2
+DOCLING_DOCS_PER_WORKER = 25
+
+# Scanned pages are OCR'd on one Tesseract process per core; a second PDF
+# is scanned for such pages while the first one's are recognized
+OCR_WORKERS = os.cpu_count() or 1
+OCR_DOCUMENTS_IN_FLIGHT = 2
 
 # Setup Google and AWS connections
 def setup_connections():
@@ -87,102 +145,74 @@ def count_words(text):
     """Count number of words in text."""
     return len(text.split())
 
-def enforce_rate_limit():
-    """Enforce rate limiting for API calls with adaptive backoff."""
-    global consecutive_failures
-    current_time = time.time()
-    
-    dynamic_delay = DELAY_BETWEEN_CALLS * (2 ** consecutive_failures)
-    dynamic_delay = min(dynamic_delay, 30)
-    
-    if last_call_timestamps:
-        time_since_last_call = current_time - last_call_timestamps[-1]
-        if time_since_last_call < dynamic_delay:
-            sleep_time = dynamic_delay - time_since_last_call
-            logger.debug(f"Enforcing dynamic delay: {sleep_time:.2f}s (after {consecutive_failures} failures)")
-            time.sleep(sleep_time)
-    
-    while last_call_timestamps and current_time - last_call_timestamps[0] > 60:
-        last_call_timestamps.pop(0)
-    
-    if len(last_call_timestamps) >= MAX_CALLS_PER_MINUTE:
-        sleep_time = 60 - (current_time - last_call_timestamps[0])
-        if sleep_time > 0:
-            logger.debug(f"Rate limit reached, waiting {sleep_time:.2f} seconds")
-            time.sleep(sleep_time)
-            current_time = time.time()
-            while last_call_timestamps and current_time - last_call_timestamps[0] > 60:
-                last_call_timestamps.pop(0)
-
-def invoke_model_with_retry(payload, model_id, bedrock, max_retries=MAX_RETRIES):
-    """Invoke model with retries, rate limiting, and size checks."""
-    global consecutive_failures
-    retries = 0
+def invoke_model_with_retry(payload, model_id, bedrock, max_retries=MAX_RETRIES, limiter=MODEL_LIMITER,
+                            cache=None, bypass_cache=MODEL_CACHE_BYPASS):
+    """Invoke model with retries, rate limiting, and size checks.
     
+    With a response cache, a payload answered before is returned without
+    calling the model or taking a rate-limit token.
+    """
     if 'messages' in payload and payload['messages'][0]['content']:
         content = payload['messages'][0]['content']
         total_text = ' '.join(item.get('text', '') for item in content if isinstance(item, dict) and 'text' in item)
         if count_words(total_text) > MAX_CONTEXT_WORDS:
             raise ValueError(f"Input exceeds maximum context size of {MAX_CONTEXT_WORDS:,} words")
     
-    while retries < max_retries:
-        try:
-            enforce_rate_limit()
-            last_call_timestamps.append(time.time())
-            
-            if payload.get('max_tokens', 0) > MAX_TOKENS:
-                payload['max_tokens'] = MAX_TOKENS
-            
-            response = bedrock.invoke_model(
-                modelId=model_id,
-                contentType="application/json",
-                body=json.dumps(payload)
-            )
-            output_binary = response["body"].read()
-            output_json = json.loads(output_binary)
-            output_text = output_json["content"][0]["text"]
-            
-            if count_words(output_text) > MAX_OUTPUT_WORDS:
-                raise ValueError(f"Response exceeds maximum size of {MAX_OUTPUT_WORDS:,} words")
-            
-            consecutive_failures = 0
-            return output_text
-            
-        except bedrock.exceptions.ThrottlingException:
-            consecutive_failures += 1
-            wait_time = MIN_BACKOFF_TIME * (2 ** consecutive_failures) + random.uniform(0, 1)
-            logger.warning(f"ThrottlingException (failure #{consecutive_failures}): Retrying in {wait_time:.2f} seconds...")
-            time.sleep(wait_time)
-            retries += 1
-        except ValueError as ve:
-            raise ve
-        except Exception as e:
-            consecutive_failures += 1
-            logger.error(f"Error during model invocation (failure #{consecutive_failures}): {str(e)}")
-            if retries < max_retries - 1:
-                wait_time = MIN_BACKOFF_TIME * (2 ** consecutive_failures) + random.uniform(0, 1)
-                time.sleep(wait_time)
-                retries += 1
-            else:
-                raise
+    if payload.get('max_tokens', 0) > MAX_TOKENS:
+        payload['max_tokens'] = MAX_TOKENS
     
-    raise Exception(f"Max retries ({max_retries}) reached after {consecutive_failures} consecutive failures. Try again later.")
-
-def setup_file_handlers(json_filename, csv_filename):
-    """Initialize JSON and CSV file handlers."""
-    try:
-        with open(json_filename, "r", encoding="utf-8") as f:
-            pdf_results = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        pdf_results = []
+    def invoke():
+        response = bedrock.invoke_model(
+            modelId=model_id,
+            contentType="application/json",
+            body=json.dumps(payload)
+        )
+        output_binary = response["body"].read()
+        output_json = json.loads(output_binary)
+        output_text = output_json["content"][0]["text"]
+        
+        if count_words(output_text) > MAX_OUTPUT_WORDS:
+            raise ValueError(f"Response exceeds maximum size of {MAX_OUTPUT_WORDS:,} words")
+        return output_text
     
-    csv_fields = ["sample_id", "model_output", "ground_truth", "weighted_token_similarity"]
-    csv_file = open(csv_filename, "a", newline="", encoding="utf-8")
-    csv_writer = csv.DictWriter(csv_file, fieldnames=csv_fields)
-    if csv_file.tell() == 0:
-        csv_writer.writeheader()
+    def invoke_with_retry():
+        return call_with_retry(
+            invoke, limiter,
+            is_throttle=lambda e: isinstance(e, bedrock.exceptions.ThrottlingException),
+            max_retries=max_retries, min_backoff=MIN_BACKOFF_TIME,
+        )
+    
+    if cache is None:
+        return invoke_with_retry()
+    return cache.get_or_call(model_id, payload, invoke_with_retry, bypass=bypass_cache)
+
+def open_results_journal(persistent_path, method):
+    """Open the results journal of a method.
     
-    return pdf_results, csv_file, csv_writer
+    Results from a JSON report written before the journal existed are
+    carried over once, so those PDFs are not processed again.
+    """
+    journal = ResultsJournal(os.path.join(persistent_path, f"{method}_results.jsonl"))
+    json_filename = os.path.join(persistent_path, f"{method}_results.json")
+    if not len(journal) and os.path.exists(json_filename):
+        try:
+            imported = journal.import_json(json_filename)
+            print(f"📥 Imported {imported} earlier {method} results into the journal")
+        except json.JSONDecodeError as e:
+            print(f"⚠️ Could not import {json_filename}: {str(e)}")
+    return journal
+
+def write_reports(journal, persistent_path, method):
+    """Write the JSON and CSV reports of a method from its journal."""
+    json_filename = os.path.join(persistent_path, f"{method}_results.json")
+    csv_filename = os.path.join(persistent_path, f"{method}_results.csv")
+    journal.export_json(json_filename)
+    return journal.export_csv(csv_filename, RESULTS_CSV_FIELDS, row=lambda result: {
+        "sample_id": result["sample_id"],
+        "model_output": result["model_output"],
+        "ground_truth": result["ground_truth"],
+        "weighted_token_similarity": result["metrics"]["weighted_token_similarity"],
+    })
 
 def normalize_text(text):
     """Normalize text by trimming whitespace and cleaning punctuation."""
@@ -191,85 +221,219 @@ def normalize_text(text):
     text = re.sub(r'\s*([.,!?;:])\s*', r'\1', text)
     return text
 
-def is_number(token):
-    """Check if a token is a number."""
-    try:
-        float(token)
-        return True
-    except ValueError:
-        return False
-
-def weighted_token_similarity(ground_truth, output):
-    """Compute weighted similarity where numeric tokens have extra weight."""
-    gt_tokens = re.findall(r'\w+', ground_truth)
-    out_tokens = re.findall(r'\w+', output)
+def init_extraction_worker(page_cache_path):
+    """Set up an extraction worker process.
     
-    total_weight = 0
-    matched_weight = 0
-    
-    for token in gt_tokens:
-        weight = 2 if is_number(token) else 1
-        total_weight += weight
-        if token.lower() in (t.lower() for t in out_tokens):
-            matched_weight += weight
+    Each worker opens its own connection to the shared page cache, which
+    runs in WAL mode and treats a locked database as a miss, and extracts
+    its PDFs in-process, since the pool already occupies every core.
+    """
+    PDF_EXTRACTOR.max_workers = 1
+    PDF_EXTRACTOR.cache = PageCache(page_cache_path)
+
+class ExtractionOutput(NamedTuple):
+    """What an extraction worker returns, with its page cache lookups and tier totals."""
+    value: Any
+    cache_hits: int = 0
+    cache_misses: int = 0
+    tier_stats: Optional[Dict[str, Dict[str, float]]] = None
+
+def iter_page_texts(pdf_path, lookups):
+    """Yield the text of each page of a PDF as it is extracted.
     
-    similarity = (matched_weight / total_weight) * 100 if total_weight > 0 else 0
-    return similarity
+    Only one window of pages is held at a time; page cache hits and misses
+    are tallied in ``lookups``.
+    """
+    for page in PDF_EXTRACTOR.iter_pages(pdf_path):
+        lookups["hits" if page.cached else "misses"] += 1
+        yield page.text
 
 def process_pdf_with_pdfplumber(pdf_path):
-    """Extract text from PDF using pdfplumber."""
-    with pdfplumber.open(pdf_path) as pdf:
-        text = ""
-        for page in pdf.pages:
-            text += page.extract_text()
-    return text.strip()
-
-def process_pdf_with_docling(pdf_path):
-    """Process PDF using Docling with OCR."""
-    pipeline_options = PdfPipelineOptions(do_ocr=True)
-    converter = DocumentConverter(
-        format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)}
-    )
-    result = converter.convert(pdf_path)
-    return result.document.export_to_markdown().strip()
+    """Extract text from PDF using pdfplumber, page by page."""
+    lookups = {"hits": 0, "misses": 0}
+    text = StringIO()
+    for i, page_text in enumerate(iter_page_texts(pdf_path, lookups)):
+        if i:
+            text.write("\n")
+        text.write(page_text)
+    pages = lookups["hits"] + lookups["misses"]
+    logger.info(f"{pdf_path}: {lookups['hits']} of {pages} pages from page cache")
+    return ExtractionOutput(text.getvalue(), lookups["hits"], lookups["misses"])
+
+def count_page_cache_lookups(output):
+    """Add a worker's page cache hits and misses to this run's totals."""
+    PAGE_CACHE_LOOKUPS["hits"] += output.cache_hits
+    PAGE_CACHE_LOOKUPS["misses"] += output.cache_misses
+
+def count_tier_stats(output):
+    """Add a worker's pages and seconds by tier to this run's totals."""
+    for tier, totals in (output.tier_stats or {}).items():
+        TIER_STATS[tier]["pages"] += totals["pages"]
+        TIER_STATS[tier]["seconds"] += totals["seconds"]
+
+def process_pdf_tiered(pdf_path):
+    """Extract text from PDF with PyMuPDF, escalating weak pages to pdfplumber or OCR."""
+    result, tier_stats = TIERED_EXTRACTOR.extract_with_stats(pdf_path)
+    logger.info(f"{pdf_path}: " + ", ".join(
+        f"{tier} {totals['pages']} pages in {totals['seconds']:.2f}s"
+        for tier, totals in tier_stats.items()))
+    return ExtractionOutput(result.text, tier_stats=tier_stats)
 
-def process_batch(pdf_batch, df, persistent_path, pdf_results, csv_writer, process_func):
-    """Process a batch of PDFs and save results."""
+def process_batch(pdf_batch, ground_truth, persistent_path, journal, process_func,
+                  executor=None, rate_limit=None, label=""):
+    """Process a batch of PDFs in parallel and journal results as they complete.
+    
+    PDFs already in the journal are skipped. Only stages that call a remote
+    endpoint should pass ``rate_limit``; local extraction runs unthrottled
+    on every worker of ``executor``.
+    """
+    pdf_paths = {}
     for pdf_name in pdf_batch:
+        if pdf_name in journal:
+            continue
         pdf_path = os.path.join(persistent_path, f"{pdf_name}.pdf")
-        
         if not os.path.exists(pdf_path):
             print(f"❌ File not found: {pdf_path}, skipping...")
             continue
+        if pdf_name not in ground_truth:
+            print(f"❌ No ground truth for {pdf_name}, skipping...")
+            continue
+        pdf_paths[pdf_path] = pdf_name
+    
+    def report(progress):
+        print(f"⏱️ {label} {progress}")
+    
+    for task in run_tasks(process_func, list(pdf_paths), max_workers=EXTRACTION_WORKERS,
+                          executor=executor, rate_limit=rate_limit, on_progress=report):
+        pdf_name = pdf_paths[task.item]
+        if not task.ok:
+            print(f"❌ Error processing {pdf_name}: {task.error}")
+            continue
+        text = task.value
+        if isinstance(text, ExtractionOutput):
+            count_page_cache_lookups(text)
+            count_tier_stats(text)
+            text = text.value.strip()
+        record_result(pdf_name, text, task.elapsed, ground_truth, journal)
+    journal.sync()
+
+def record_result(pdf_name, text, elapsed, ground_truth, journal):
+    """Score one PDF's output against its ground truth and append it to the journal."""
+    try:
+        ground_truth_value = ground_truth[pdf_name]
         
-        try:
-            ground_truth_value = df[df["pdfName"] == pdf_name]["groundTruth"].iloc[0]
-            text = process_func(pdf_path)
-            
-            norm_output = normalize_text(text)
-            norm_gt = normalize_text(ground_truth_value)
-            weighted_sim = round(weighted_token_similarity(ground_truth_value, norm_output), 2)
-            
-            result = {
-                "sample_id": pdf_name,
-                "model_output": text,
-                "ground_truth": ground_truth_value,
-                "metrics": {"weighted_token_similarity": weighted_sim}
-            }
-            pdf_results.append(result)
-            
-            csv_result = {
-                "sample_id": pdf_name,
-                "model_output": text,
-                "ground_truth": ground_truth_value,
-                "weighted_token_similarity": weighted_sim
-            }
-            csv_writer.writerow(csv_result)
-            
-            print(f"✅ Processed {pdf_name} | Similarity: {weighted_sim:.2f}%")
-            
-        except Exception as e:
-            print(f"❌ Error processing {pdf_name}: {str(e)}")
+        norm_output = normalize_text(text)
+        weighted_sim = round(weighted_token_similarity(ground_truth_value, norm_output), 2)
+        
+        result = {
+            "sample_id": pdf_name,
+            "model_output": text,
+            "ground_truth": ground_truth_value,
+            "metrics": {"weighted_token_similarity": weighted_sim}
+        }
+        journal.append(result)
+        
+        print(f"✅ Processed {pdf_name} in {elapsed:.1f}s | Similarity: {weighted_sim:.2f}%")
+        
+    except Exception as e:
+        print(f"❌ Error processing {pdf_name}: {str(e)}")
+
+def split_pdf_for_model(pdf_path):
+    """Extract a PDF and split its pages into chunks for the model.
+    
+    Pages go to the packer as they are extracted, so only the chunks, not
+    every page, are held at once.
+    """
+    lookups = {"hits": 0, "misses": 0}
+    pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    chunks = MODEL_PACKER.split(pdf_name, iter_page_texts(pdf_path, lookups))
+    return ExtractionOutput(chunks, lookups["hits"], lookups["misses"])
+
+def model_payload(prompt):
+    """Build a Bedrock Messages API payload for a text prompt."""
+    return {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": MAX_TOKENS,
+        "messages": [{"role": "user", "content": [{"type": "text", "text": prompt}]}],
+    }
+
+def process_batch_with_model(pdf_batch, ground_truth, persistent_path, journal, model_id, bedrock,
+                             executor=None, cache=None, label="model"):
+    """Rewrite the page text of a batch of PDFs with the model in as few calls as possible.
+    
+    Large filings are split into runs of pages and small ones share a call,
+    so each call carries up to the input and output word budgets. Chunks the
+    model leaves unanswered, or whose call failed, are sent once more on
+    their own. Only PDFs with every chunk answered are journaled; the rest
+    are retried on the next run. PDFs already in the journal are skipped.
+    Each PDF is timed by the summed latency of the calls that carried its
+    chunks; PDFs with no text are journaled with empty output.
+    """
+    pdf_paths = {}
+    for pdf_name in pdf_batch:
+        if pdf_name in journal:
+            continue
+        pdf_path = os.path.join(persistent_path, f"{pdf_name}.pdf")
+        if not os.path.exists(pdf_path) or pdf_name not in ground_truth:
+            print(f"❌ Missing PDF or ground truth for {pdf_name}, skipping...")
+            continue
+        pdf_paths[pdf_path] = pdf_name
+    chunks = []
+    extracted = []
+    for task in run_tasks(split_pdf_for_model, list(pdf_paths),
+                          max_workers=EXTRACTION_WORKERS, executor=executor):
+        if task.ok:
+            count_page_cache_lookups(task.value)
+            chunks.extend(task.value.value)
+            extracted.append(pdf_paths[task.item])
+        else:
+            print(f"❌ Error extracting {pdf_paths[task.item]}: {task.error}")
+    
+    def invoke(invocation):
+        return invoke_model_with_retry(model_payload(MODEL_PACKER.prompt(invocation)),
+                                       model_id, bedrock, cache=cache)
+    
+    invocations = MODEL_PACKER.pack(chunks)
+    print(f"📦 {label}: {len({chunk.doc_id for chunk in chunks})} PDFs packed into "
+          f"{len(invocations)} model calls")
+    expected = Counter(chunk.doc_id for invocation in invocations for chunk in invocation.chunks)
+    for pdf_name in extracted:
+        if pdf_name not in expected:
+            print(f"⚠️ {pdf_name}: no text extracted, nothing to send to the model")
+            record_result(pdf_name, "", 0.0, ground_truth, journal)
+    answered = []
+    # Seconds of model calls spent on each PDF, failed calls included
+    model_seconds = Counter()
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CALLS) as model_executor:
+        for attempt in range(2):
+            missing = []
+            for task in run_tasks(invoke, invocations, max_workers=MAX_CONCURRENT_CALLS,
+                                  executor=model_executor):
+                for doc_id in {chunk.doc_id for chunk in task.item.chunks}:
+                    model_seconds[doc_id] += task.elapsed
+                if not task.ok:
+                    print(f"❌ Model call failed: {task.error}")
+                    missing.extend(task.item.chunks)
+                    continue
+                for chunk, answer in MODEL_PACKER.route(task.item, task.value):
+                    if answer is None:
+                        missing.append(chunk)
+                    else:
+                        answered.append((chunk, answer))
+            if not missing:
+                break
+            print(f"⚠️ {len(missing)} chunks unanswered, sending them separately...")
+            invocations = [MODEL_PACKER.pack([chunk])[0] for chunk in missing]
+    
+    received = Counter(chunk.doc_id for chunk, _ in answered)
+    texts = assemble(answered)
+    for pdf_name, count in expected.items():
+        if received[pdf_name] < count:
+            print(f"⚠️ {pdf_name}: {count - received[pdf_name]} of {count} chunks "
+                  f"unanswered, leaving it for the next run")
+            continue
+        record_result(pdf_name, texts[pdf_name], model_seconds[pdf_name], ground_truth, journal)
+    journal.sync()
 
 def main():
     """Main execution function."""
@@ -278,37 +442,114 @@ def main():
     model_id = "anthropic.claude-3-5-sonnet-20240620-v1:0"
     persistent_path = "/content/drive/MyDrive/jefferies/"
     
-    # Load spreadsheet data
-    jsonUrl = 'https://docs.google.com/spreadsheets/d/1fhJ4sMXhN2u2D9EsmFFmeDNSG3o3nFZ9J-aTl_GB9w0/edit?gid=718505010#gid=718505010'
-    regularUrl = 'https://docs.google.com/spreadsheets/d/1I5pCbijNxZqNJ6hqdFpxcdoyXKcZ6Jl2VN9Io2vyr1M/edit?gid=909191242#gid=909191242'
+    # Reuse the text of boilerplate pages already extracted in earlier runs;
+    # every extraction worker opens the same cache
+    page_cache_path = os.path.join(persistent_path, "page_cache.sqlite")
+    executor = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS,
+                                   initializer=init_extraction_worker,
+                                   initargs=(page_cache_path,))
     
-    spreadsheet = gc.open_by_url(regularUrl)
-    worksheet = spreadsheet.sheet1
-    df = pd.DataFrame(worksheet.get_all_records())
+    # Docling converts on its own warm workers; threads only wait on them
+    docling_pool = DoclingPool(max_workers=DOCLING_WORKERS,
+                               max_docs_per_worker=DOCLING_DOCS_PER_WORKER)
+    docling_executor = ThreadPoolExecutor(max_workers=DOCLING_WORKERS)
     
-    # Process PDFs with different methods
-    for method in ['pdfplumber', 'docling']:
-        json_filename = os.path.join(persistent_path, f"{method}_results.json")
-        csv_filename = os.path.join(persistent_path, f"{method}_results.csv")
-        
-        pdf_results, csv_file, csv_writer = setup_file_handlers(json_filename, csv_filename)
-        
-        pdfs_to_process = [f"jefferies{i}" for i in range(8, 11)] + [f"jefferies{i}" for i in range(13, 16)]
-        process_func = process_pdf_with_pdfplumber if method == 'pdfplumber' else process_pdf_with_docling
-        
-        total_pdfs = len(pdfs_to_process)
-        for i in range(0, total_pdfs, MAX_BATCH_SIZE):
-            pdf_batch = pdfs_to_process[i:i + MAX_BATCH_SIZE]
-            print(f"Processing batch: {pdf_batch}")
-            process_batch(pdf_batch, df, persistent_path, pdf_results, csv_writer, process_func)
-            print(f"✅ Batch {i // MAX_BATCH_SIZE + 1} processed. Waiting before next batch...")
-            time.sleep(40)
-        
-        with open(json_filename, "w", encoding="utf-8") as f:
-            json.dump(pdf_results, f, indent=4)
-        
-        csv_file.close()
-        print(f"✅ All PDFs processed and results saved successfully for {method}!")
+    # Only pages without a usable text layer are rendered and OCR'd
+    ocr_pool = OcrPool(max_workers=OCR_WORKERS)
+    ocr_executor = ThreadPoolExecutor(max_workers=OCR_DOCUMENTS_IN_FLIGHT)
+    
+    # Answer prompts already sent in earlier runs without calling the model
+    model_cache = ModelResponseCache(os.path.join(persistent_path, "model_cache.sqlite"),
+                                     ttl=MODEL_CACHE_TTL)
+    
+    # Pools, caches and the ground-truth index are shut down and their
+    # stats reported even if a stage fails
+    ground_truth = None
+    try:
+        # Load spreadsheet data
+        jsonUrl = 'https://docs.google.com/spreadsheets/d/1fhJ4sMXhN2u2D9EsmFFmeDNSG3o3nFZ9J-aTl_GB9w0/edit?gid=718505010#gid=718505010'
+        regularUrl = 'https://docs.google.com/spreadsheets/d/1I5pCbijNxZqNJ6hqdFpxcdoyXKcZ6Jl2VN9Io2vyr1M/edit?gid=909191242#gid=909191242'
+    
+        # Keep a keyed local copy of the sheet, downloaded again only when the
+        # sheet has been updated or the copy is a day old
+        spreadsheet = gc.open_by_url(regularUrl)
+        ground_truth = GroundTruthIndex(os.path.join(persistent_path, "ground_truth_index.sqlite"))
+        ground_truth.load(regularUrl, spreadsheet.sheet1.get_all_records,
+                          version=spreadsheet.lastUpdateTime, max_age=GROUND_TRUTH_MAX_AGE)
+    
+        # Process PDFs with different methods, each on its executor; local stages
+        # are not throttled, and model calls go through MODEL_LIMITER
+        stages = {
+            'pdfplumber': functools.partial(process_batch, process_func=process_pdf_with_pdfplumber,
+                                            executor=executor, label='pdfplumber'),
+            'tiered': functools.partial(process_batch, process_func=process_pdf_tiered,
+                                        executor=executor, label='tiered'),
+            'docling': functools.partial(process_batch, process_func=docling_pool.convert,
+                                         executor=docling_executor, label='docling'),
+            'ocr': functools.partial(process_batch, process_func=ocr_pool.extract,
+                                     executor=ocr_executor, label='ocr'),
+        }
+        if RUN_MODEL_STAGE:
+            stages['claude'] = functools.partial(process_batch_with_model, model_id=model_id,
+                                                 bedrock=bedrock, executor=executor,
+                                                 cache=model_cache, label='claude')
+        ground_truths = {}
+        method_outputs = {}
+        for method, stage in stages.items():
+            # Results are journaled as each PDF finishes, so a rerun after a
+            # crash picks up with the PDFs that have no result yet
+            with open_results_journal(persistent_path, method) as journal:
+                pdfs_to_process = [f"jefferies{i}" for i in range(8, 11)] + [f"jefferies{i}" for i in range(13, 16)]
+            
+                print(f"Processing {len(pdfs_to_process)} PDFs with {method} "
+                      f"({sum(pdf_name in journal for pdf_name in pdfs_to_process)} already done)")
+                stage(pdfs_to_process, ground_truth, persistent_path, journal)
+            
+                count = write_reports(journal, persistent_path, method)
+                print(f"✅ All PDFs processed and {count} results saved successfully for {method}!")
+            
+                method_outputs[method] = {}
+                for result in journal.records():
+                    ground_truths[result["sample_id"]] = result["ground_truth"]
+                    method_outputs[method][result["sample_id"]] = result["model_output"]
+    
+        # Score every method on every PDF over one shared vocabulary
+        scores = corpus_similarity(ground_truths, method_outputs)
+        write_comparison_csv(scores, os.path.join(persistent_path, "method_comparison.csv"))
+        for method in stages:
+            method_scores = [score for score in scores if score.method == method]
+            if method_scores:
+                cosine = sum(score.cosine_similarity for score in method_scores) / len(method_scores)
+                weighted = sum(score.weighted_token_similarity for score in method_scores) / len(method_scores)
+                print(f"📊 {method}: cosine {cosine:.2f}% | weighted token {weighted:.2f}% over {len(method_scores)} PDFs")
+    finally:
+        executor.shutdown()
+        docling_executor.shutdown()
+        docling_pool.close()
+        ocr_executor.shutdown()
+        ocr_pool.close()
+        ocr_stats = ocr_pool.stats()
+        print(f"OCR: {ocr_stats['pages']} pages, mean confidence {ocr_stats['mean_confidence']:.1f}, "
+              f"{ocr_stats['low_confidence']} below {LOW_CONFIDENCE:.0f}, {ocr_stats['failures']} failed | "
+              f"render {ocr_stats['render_seconds']:.1f}s, preprocess {ocr_stats['preprocess_seconds']:.1f}s, "
+              f"recognize {ocr_stats['recognize_seconds']:.1f}s")
+        docling_stats = docling_pool.stats()
+        print(f"Docling: {docling_stats['documents']} PDFs converted in {docling_stats['conversion_seconds']:.1f}s, "
+              f"{docling_stats['model_loads']} model loads in {docling_stats['model_load_seconds']:.1f}s")
+        if ground_truth is not None:
+            ground_truth.close()
+        print(f"Model cache: {model_cache.stats()} | Model calls: {MODEL_LIMITER.stats()}")
+        model_cache.close()
+        page_cache = PageCache(page_cache_path)
+        stats = page_cache.stats()
+        lookups = PAGE_CACHE_LOOKUPS["hits"] + PAGE_CACHE_LOOKUPS["misses"]
+        hit_rate = PAGE_CACHE_LOOKUPS["hits"] / lookups if lookups else 0.0
+        print(f"Page cache: {PAGE_CACHE_LOOKUPS['hits']} hits, {PAGE_CACHE_LOOKUPS['misses']} misses "
+              f"({hit_rate:.1%} hit rate) | {stats['entries']} pages, {stats['bytes']} bytes")
+        page_cache.close()
+        print("Tiers: " + " | ".join(
+            f"{tier} {totals['pages']} pages in {totals['seconds']:.1f}s"
+            for tier, totals in TIER_STATS.items()))
 
 if __name__ == "__main__":
     main()
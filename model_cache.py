@@ -0,0 +1,145 @@
+"""Persistent cache of model responses.
+
+Reruns over unchanged documents send the same prompts again, and every call
+costs rate-limit quota. This module stores each response in a SQLite index
+keyed by a hash of the model ID and the canonical JSON of the payload, so a
+repeated prompt is answered locally without touching the rate limiter.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Union
+
+from sqlite_cache import DEFAULT_MAX_BYTES, SQLiteLRUCache
+
+logger = logging.getLogger(__name__)
+
+# Default age after which a response is fetched again (30 days)
+DEFAULT_TTL = 30 * 24 * 60 * 60
+
+def payload_key(model_id: str, payload: Mapping[str, Any]) -> str:
+    """Hash a model ID and payload, independent of key order and whitespace.
+
+    Args:
+        model_id: Model the payload is sent to
+        payload: Request body
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    canonical = json.dumps({"model_id": model_id, "payload": payload}, sort_keys=True,
+                           separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class ModelResponseCache(SQLiteLRUCache):
+    """SQLite-backed model response cache with TTL and LRU eviction."""
+
+    table = "responses"
+    schema = """
+        key TEXT PRIMARY KEY,
+        model_id TEXT NOT NULL,
+        response TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        stored_at REAL NOT NULL,
+        accessed_at REAL NOT NULL
+    """
+
+    def __init__(self, cache_path: str, ttl: Optional[float] = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 clock: Callable[[], float] = time.time):
+        """Initialize the response cache.
+
+        Args:
+            cache_path: Path of the SQLite database
+            ttl: Seconds a response stays valid; never expires if None
+            max_bytes: Size cap for stored responses; least recently used
+                responses are evicted once it is exceeded
+            clock: Wall clock in seconds
+        """
+        super().__init__(cache_path, max_bytes)
+        self.ttl = ttl
+        self.expirations = 0
+        self._clock = clock
+
+    def get(self, model_id: str, payload: Mapping[str, Any]) -> Optional[str]:
+        """Look up the response to a payload.
+
+        Args:
+            model_id: Model the payload is sent to
+            payload: Request body
+
+        Returns:
+            Optional[str]: The cached response, or None if it is not cached
+            or has expired
+        """
+        key = payload_key(model_id, payload)
+        now = self._clock()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                self.expirations += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, model_id: str, payload: Mapping[str, Any], response: str) -> None:
+        """Store the response to a payload.
+
+        Args:
+            model_id: Model the payload was sent to
+            payload: Request body
+            response: Model output
+        """
+        now = self._clock()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (payload_key(model_id, payload), model_id, response,
+                 len(response.encode("utf-8")), now, now),
+            )
+            self._evict()
+            self._db.commit()
+
+    def get_or_call(self, model_id: str, payload: Mapping[str, Any],
+                    call: Callable[[], str], bypass: bool = False) -> str:
+        """Return the cached response to a payload, calling the model on a miss.
+
+        Args:
+            model_id: Model the payload is sent to
+            payload: Request body
+            call: Sends the payload and returns the response; only runs on
+                a miss, so hits use no rate-limit quota
+            bypass: Ignore any cached response and store the fresh one
+
+        Returns:
+            str: The model output
+        """
+        if not bypass:
+            response = self.get(model_id, payload)
+            if response is not None:
+                return response
+        response = call()
+        self.put(model_id, payload, response)
+        return response
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Return cache counters for this session.
+
+        Returns:
+            Dict[str, Union[int, float]]: Hits, misses, hit rate, expirations,
+            evictions, entry count and bytes stored
+        """
+        stats = super().stats()
+        stats["expirations"] = self.expirations
+        return stats
@@ -0,0 +1,128 @@
+"""Tests for the persistent model response cache."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from model_cache import ModelResponseCache, payload_key
+from rate_limiter import RateLimiter, call_with_retry
+
+MODEL_ID = "anthropic.claude-3-5-sonnet-20240620-v1:0"
+
+def make_payload(text, max_tokens=2000):
+    """Build a Bedrock Messages API payload."""
+    return {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "messages": [{"role": "user", "content": [{"type": "text", "text": text}]}],
+    }
+
+class FakeClock:
+    """Wall clock set by the test."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestModelResponseCache(unittest.TestCase):
+    """Test cases for ModelResponseCache."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.clock = FakeClock()
+        self.cache = ModelResponseCache(os.path.join(self.tmp_dir, "responses.sqlite"),
+                                        ttl=3600, clock=self.clock)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_payload_key_is_canonical(self):
+        """Test that key order does not change the key, but content does."""
+        payload = make_payload("Clean this up")
+        reordered = dict(reversed(list(payload.items())))
+        self.assertEqual(payload_key(MODEL_ID, payload), payload_key(MODEL_ID, reordered))
+        self.assertNotEqual(payload_key(MODEL_ID, payload),
+                            payload_key(MODEL_ID, make_payload("Clean this up", 1000)))
+        self.assertNotEqual(payload_key(MODEL_ID, payload), payload_key("other-model", payload))
+
+    def test_round_trip_persists(self):
+        """Test that responses survive reopening the cache."""
+        self.cache.put(MODEL_ID, make_payload("a"), "answer")
+        self.cache.close()
+        self.cache = ModelResponseCache(os.path.join(self.tmp_dir, "responses.sqlite"),
+                                        clock=self.clock)
+        self.assertEqual(self.cache.get(MODEL_ID, make_payload("a")), "answer")
+        self.assertIsNone(self.cache.get(MODEL_ID, make_payload("b")))
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+
+    def test_ttl(self):
+        """Test that expired responses are dropped."""
+        self.cache.put(MODEL_ID, make_payload("a"), "answer")
+        self.clock.now += 3599
+        self.assertEqual(self.cache.get(MODEL_ID, make_payload("a")), "answer")
+        self.clock.now += 2
+        self.assertIsNone(self.cache.get(MODEL_ID, make_payload("a")))
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_eviction(self):
+        """Test that the least recently used responses are evicted over the size cap."""
+        cache = ModelResponseCache(os.path.join(self.tmp_dir, "small.sqlite"), max_bytes=10,
+                                   clock=self.clock)
+        cache.put(MODEL_ID, make_payload("a"), "12345")
+        self.clock.now += 1
+        cache.put(MODEL_ID, make_payload("b"), "12345")
+        self.clock.now += 1
+        cache.get(MODEL_ID, make_payload("a"))
+        self.clock.now += 1
+        cache.put(MODEL_ID, make_payload("c"), "12345")
+
+        self.assertIsNone(cache.get(MODEL_ID, make_payload("b")))
+        self.assertEqual(cache.get(MODEL_ID, make_payload("a")), "12345")
+        self.assertEqual(cache.stats()["evictions"], 1)
+        cache.close()
+
+    def test_hits_do_not_consume_rate_limit(self):
+        """Test that only misses reach the limiter and the model."""
+        limiter = RateLimiter(calls_per_minute=60, burst=1, clock=lambda: 0.0,
+                              sleep=lambda seconds: None)
+        calls = []
+
+        def invoke(payload):
+            def call():
+                calls.append(payload)
+                return f"answer {len(calls)}"
+            return self.cache.get_or_call(
+                MODEL_ID, payload,
+                lambda: call_with_retry(call, limiter, lambda e: False, sleep=lambda s: None))
+
+        self.assertEqual(invoke(make_payload("a")), "answer 1")
+        self.assertEqual(invoke(make_payload("a")), "answer 1")
+        # Only the miss took the single token; the next one is a second away
+        self.assertEqual(limiter.bucket.reserve(), 1.0)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(limiter.stats()["calls"], 1)
+
+    def test_bypass(self):
+        """Test that bypassing calls the model and refreshes the entry."""
+        self.cache.put(MODEL_ID, make_payload("a"), "stale")
+        response = self.cache.get_or_call(MODEL_ID, make_payload("a"), lambda: "fresh", bypass=True)
+        self.assertEqual(response, "fresh")
+        self.assertEqual(self.cache.get(MODEL_ID, make_payload("a")), "fresh")
+
+    def test_failures_are_not_cached(self):
+        """Test that a failed call stores nothing."""
+        def fail():
+            raise RuntimeError("endpoint down")
+
+        with self.assertRaises(RuntimeError):
+            self.cache.get_or_call(MODEL_ID, make_payload("a"), fail)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
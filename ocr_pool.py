@@ -0,0 +1,385 @@
+"""Parallel OCR of the pages of a PDF that have no usable text layer.
+
+Only the pages ``tiered_extractor.choose_tier`` sends to OCR are rendered.
+Each one is first rendered at a low probe resolution to measure its glyphs,
+then rendered again at the resolution that brings them to the height
+Tesseract reads best: small print gets more pixels, large print fewer.
+Rendering, preprocessing and recognition run on a pool of worker processes,
+one per core, each keeping its open document and preprocessing buffers
+across pages.
+"""
+
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from batch_runner import run_tasks
+from tiered_extractor import OCR_DPI, TIER_OCR, choose_tier, page_signals
+
+logger = logging.getLogger(__name__)
+
+# Resolution pages are rendered at to measure their glyphs
+PROBE_DPI = 150
+
+# Median glyph height, in pixels, pages are rendered to for recognition
+TARGET_GLYPH_PIXELS = 24
+
+# Resolution bounds for recognition
+MIN_OCR_DPI = 150
+MAX_OCR_DPI = 400
+
+# Dark components shorter than this (probe pixels) are specks, and those
+# wider than MAX_GLYPH_ASPECT times their height are rules or joined words
+MIN_GLYPH_PIXELS = 2
+MAX_GLYPH_ASPECT = 3.0
+
+# Pages with fewer glyph-sized components are rendered at OCR_DPI
+MIN_GLYPHS = 20
+
+# Pages recognized with a lower mean word confidence are counted in stats
+LOW_CONFIDENCE = 60.0
+
+Recognizer = Callable[["numpy.ndarray", int], Tuple[str, float]]
+
+class OcrPage(NamedTuple):
+    """Recognized text of one page, with timings and confidence."""
+    page_number: int
+    text: str
+    # Mean word confidence, 0 to 100; -1 when no words were found
+    confidence: float
+    dpi: int
+    # Median glyph height in points, None when too few glyphs were found
+    glyph_points: Optional[float]
+    render_seconds: float
+    preprocess_seconds: float
+    recognize_seconds: float
+    error: Optional[str] = None
+
+    @property
+    def elapsed(self) -> float:
+        """Total time spent on the page."""
+        return self.render_seconds + self.preprocess_seconds + self.recognize_seconds
+
+    @property
+    def ok(self) -> bool:
+        """Whether the page was recognized without error."""
+        return self.error is None
+
+def glyph_height(gray) -> Optional[float]:
+    """Measure the median height of the glyphs in a grayscale page image.
+
+    Args:
+        gray: 2-D uint8 image, dark text on a light background
+
+    Returns:
+        Optional[float]: Median glyph height in pixels, or None if the
+        image holds fewer than ``MIN_GLYPHS`` glyph-sized components
+    """
+    import cv2
+    import numpy as np
+
+    binary = _scratch("probe", gray.shape)
+    cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU, dst=binary)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    glyphs = heights[(heights >= MIN_GLYPH_PIXELS) & (heights <= gray.shape[0] // 10)
+                     & (widths <= heights * MAX_GLYPH_ASPECT)]
+    if len(glyphs) < MIN_GLYPHS:
+        return None
+    return float(np.median(glyphs))
+
+def adaptive_dpi(glyph_points: Optional[float], min_dpi: int = MIN_OCR_DPI,
+                 max_dpi: int = MAX_OCR_DPI) -> int:
+    """Pick the resolution that renders glyphs at ``TARGET_GLYPH_PIXELS``.
+
+    Args:
+        glyph_points: Median glyph height in points, or None if unknown
+        min_dpi: Lowest resolution to render at
+        max_dpi: Highest resolution to render at
+
+    Returns:
+        int: Rendering resolution in dots per inch
+    """
+    if not glyph_points:
+        return OCR_DPI
+    return max(min_dpi, min(max_dpi, round(TARGET_GLYPH_PIXELS * 72 / glyph_points)))
+
+def preprocess(gray, out):
+    """Denoise and binarize a page image for recognition.
+
+    Args:
+        gray: 2-D uint8 page image
+        out: Array of the same shape the result is written to
+
+    Returns:
+        numpy.ndarray: ``out``, black text on white
+    """
+    import cv2
+
+    cv2.medianBlur(gray, 3, dst=out)
+    cv2.threshold(out, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU, dst=out)
+    return out
+
+def tesseract_recognize(image, dpi: int) -> Tuple[str, float]:
+    """Recognize the text of a page image with Tesseract.
+
+    Args:
+        image: 2-D uint8 page image
+        dpi: Resolution the page was rendered at
+
+    Returns:
+        Tuple[str, float]: Recognized text, one line per text line, and the
+        mean word confidence (-1 if no words were found)
+    """
+    import pytesseract
+
+    data = pytesseract.image_to_data(image, config=f"--dpi {dpi}",
+                                     output_type=pytesseract.Output.DICT)
+    lines: Dict[Tuple[int, int, int], List[str]] = {}
+    confidences = []
+    for i, word in enumerate(data["text"]):
+        confidence = float(data["conf"][i])
+        if not word.strip() or confidence < 0:
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        lines.setdefault(key, []).append(word)
+        confidences.append(confidence)
+    text = "\n".join(" ".join(words) for words in lines.values())
+    return text, sum(confidences) / len(confidences) if confidences else -1.0
+
+# Scratch arrays of this process, reused from page to page
+_buffers: Dict[str, "numpy.ndarray"] = {}
+
+# Document open in this process, as (path, document)
+_document: Optional[tuple] = None
+
+def _scratch(name: str, shape: Tuple[int, int]):
+    """Return a scratch array of a shape, growing its buffer only when needed."""
+    import numpy as np
+
+    size = shape[0] * shape[1]
+    buffer = _buffers.get(name)
+    if buffer is None or buffer.size < size:
+        buffer = _buffers[name] = np.empty(size, dtype=np.uint8)
+    return buffer[:size].reshape(shape)
+
+def _open(path: str):
+    """Return this process's open copy of a document, opening it if needed."""
+    global _document
+    import pymupdf
+
+    if _document is None or _document[0] != path:
+        if _document is not None:
+            _document[1].close()
+        _document = (path, pymupdf.open(path))
+    return _document[1]
+
+def _render(page, dpi: int):
+    """Render a page to grayscale, returning the pixmap and a view of its pixels.
+
+    The view is only valid while the pixmap is referenced.
+    """
+    import numpy as np
+    import pymupdf
+
+    pixmap = page.get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY, alpha=False)
+    pixels = np.frombuffer(pixmap.samples_mv, dtype=np.uint8)
+    return pixmap, pixels.reshape(pixmap.height, pixmap.stride)[:, :pixmap.width]
+
+def init_ocr_worker() -> None:
+    """Keep Tesseract to one thread, since the pool already occupies every core."""
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+def ocr_page(path: str, page_number: int, recognizer: Recognizer = tesseract_recognize,
+             min_dpi: int = MIN_OCR_DPI, max_dpi: int = MAX_OCR_DPI) -> OcrPage:
+    """Render, preprocess and recognize one page in this process.
+
+    Args:
+        path: Path of the PDF
+        page_number: 1-based page number
+        recognizer: Picklable, module-level callable returning the text and
+            mean confidence of a page image rendered at a given resolution
+        min_dpi: Lowest resolution to render at
+        max_dpi: Highest resolution to render at
+
+    Returns:
+        OcrPage: The page's text, resolution, timings and confidence
+    """
+    start = time.perf_counter()
+    page = _open(path)[page_number - 1]
+    probe_pixmap, probe = _render(page, PROBE_DPI)
+    height = glyph_height(probe)
+    del probe_pixmap, probe
+    glyph_points = height * 72 / PROBE_DPI if height else None
+    dpi = adaptive_dpi(glyph_points, min_dpi, max_dpi)
+    pixmap, gray = _render(page, dpi)
+    render_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    image = preprocess(gray, _scratch("page", gray.shape))
+    del pixmap, gray
+    preprocess_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    text, confidence = recognizer(image, dpi)
+    return OcrPage(page_number, text.strip(), confidence, dpi, glyph_points,
+                   render_seconds, preprocess_seconds, time.perf_counter() - start)
+
+class OcrPool:
+    """Recognizes the pages of PDFs that need OCR on a pool of worker processes."""
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 recognizer: Recognizer = tesseract_recognize,
+                 min_dpi: int = MIN_OCR_DPI, max_dpi: int = MAX_OCR_DPI):
+        """Initialize the OCR pool.
+
+        Args:
+            max_workers: Number of worker processes; defaults to the number
+                of available cores
+            recognizer: Picklable, module-level callable returning the text
+                and mean confidence of a page image rendered at a given
+                resolution
+            min_dpi: Lowest resolution to render at
+            max_dpi: Highest resolution to render at
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.recognizer = recognizer
+        self.min_dpi = min_dpi
+        self.max_dpi = max_dpi
+        self.pages = 0
+        self.failures = 0
+        self.low_confidence = 0
+        self.confidence_total = 0.0
+        self.render_seconds = 0.0
+        self.preprocess_seconds = 0.0
+        self.recognize_seconds = 0.0
+        self._executor: Optional[ProcessPoolExecutor] = ProcessPoolExecutor(
+            max_workers=self.max_workers, initializer=init_ocr_worker)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def pages_needing_ocr(path: str) -> List[int]:
+        """Find the pages whose text layer is missing or garbled.
+
+        Args:
+            path: Path of the PDF
+
+        Returns:
+            List[int]: 1-based numbers of the pages to OCR
+        """
+        import pymupdf
+
+        with pymupdf.open(path) as document:
+            return [page.number + 1 for page in document
+                    if choose_tier(page_signals(page)) == TIER_OCR]
+
+    def ocr_pages(self, path: Union[str, os.PathLike],
+                  page_numbers: Optional[List[int]] = None) -> List[OcrPage]:
+        """Recognize pages of a PDF in parallel.
+
+        Safe to call from several threads.
+
+        Args:
+            path: Path of the PDF
+            page_numbers: 1-based numbers of the pages to recognize;
+                defaults to the pages that need OCR
+
+        Returns:
+            List[OcrPage]: One result per page, in page order
+        """
+        path = os.fspath(path)
+        if page_numbers is None:
+            page_numbers = self.pages_needing_ocr(path)
+        task = functools.partial(ocr_page, path, recognizer=self.recognizer,
+                                 min_dpi=self.min_dpi, max_dpi=self.max_dpi)
+        pages = []
+        for result in run_tasks(task, page_numbers, max_workers=self.max_workers,
+                                executor=self._executor):
+            if result.ok:
+                pages.append(result.value)
+            else:
+                logger.warning(f"OCR failed for {path} page {result.item}: {result.error}")
+                pages.append(OcrPage(result.item, "", -1.0, 0, None, 0.0, 0.0, result.elapsed,
+                                     result.error))
+        pages.sort(key=lambda page: page.page_number)
+        self._record(pages)
+        return pages
+
+    def extract(self, path: Union[str, os.PathLike]) -> str:
+        """Extract a PDF's text, recognizing only the pages that need OCR.
+
+        Other pages keep their PyMuPDF text layer, as does a page whose
+        recognition fails.
+
+        Args:
+            path: Path of the PDF
+
+        Returns:
+            str: The text of every page, in page order
+        """
+        import pymupdf
+
+        path = os.fspath(path)
+        with pymupdf.open(path) as document:
+            texts = [page.get_text().strip() for page in document]
+            scanned = [page.number + 1 for page in document
+                       if choose_tier(page_signals(page)) == TIER_OCR]
+        for page in self.ocr_pages(path, scanned):
+            logger.info(f"{path} page {page.page_number}: {page.dpi} dpi, "
+                        f"{page.elapsed:.2f}s, confidence {page.confidence:.0f}")
+            if page.ok:
+                texts[page.page_number - 1] = page.text
+        return "\n".join(texts).strip()
+
+    def _record(self, pages: List[OcrPage]) -> None:
+        """Add pages' timings and confidence to the totals."""
+        with self._lock:
+            for page in pages:
+                self.pages += 1
+                self.render_seconds += page.render_seconds
+                self.preprocess_seconds += page.preprocess_seconds
+                self.recognize_seconds += page.recognize_seconds
+                if not page.ok:
+                    self.failures += 1
+                    continue
+                self.confidence_total += max(page.confidence, 0.0)
+                if page.confidence < LOW_CONFIDENCE:
+                    self.low_confidence += 1
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Return totals for this pool's lifetime.
+
+        Returns:
+            Dict[str, Union[int, float]]: Pages, failures, pages below
+            ``LOW_CONFIDENCE``, mean confidence of the recognized pages,
+            and seconds spent rendering, preprocessing and recognizing
+        """
+        with self._lock:
+            recognized = self.pages - self.failures
+            return {
+                "pages": self.pages,
+                "failures": self.failures,
+                "low_confidence": self.low_confidence,
+                "mean_confidence": self.confidence_total / recognized if recognized else 0.0,
+                "render_seconds": self.render_seconds,
+                "preprocess_seconds": self.preprocess_seconds,
+                "recognize_seconds": self.recognize_seconds,
+            }
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def __enter__(self) -> "OcrPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,165 @@
+"""Tests for the parallel OCR pool."""
+
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pymupdf
+
+import ocr_pool
+from ocr_pool import (
+    MAX_OCR_DPI,
+    MIN_OCR_DPI,
+    OcrPool,
+    adaptive_dpi,
+    glyph_height,
+    ocr_page,
+    preprocess,
+)
+from tiered_extractor import OCR_DPI
+
+HAS_CV2 = importlib.util.find_spec("cv2") is not None
+
+PROSE = "The notes are senior unsecured obligations of the issuer"
+
+def fake_recognize(image, dpi):
+    """Stand in for Tesseract, reporting what it was given."""
+    binary = bool(np.isin(image, (0, 255)).all())
+    return f"page {image.shape[1]}x{image.shape[0]} at {dpi} dpi binary={binary}", 87.5
+
+def failing_recognize(image, dpi):
+    """Stand in for Tesseract failing on every page."""
+    raise RuntimeError("tesseract is not installed")
+
+def make_scanned_pdf(path, pages):
+    """Write a PDF whose pages are images of text, or a text layer.
+
+    Each page is given as ``("scan", font_size)``, ``("text", font_size)``
+    or ``("blank", 0)``.
+    """
+    document = pymupdf.open()
+    for kind, font_size in pages:
+        page = document.new_page(width=612, height=792)
+        if kind == "blank":
+            continue
+        source = pymupdf.open()
+        source_page = source.new_page(width=612, height=792)
+        source_page.insert_textbox(pymupdf.Rect(72, 72, 540, 720), (PROSE + ". ") * 20,
+                                   fontsize=font_size)
+        if kind == "text":
+            page.show_pdf_page(page.rect, source, 0)
+        else:
+            page.insert_image(page.rect, pixmap=source_page.get_pixmap(dpi=200))
+        source.close()
+    document.save(path)
+    document.close()
+
+@unittest.skipUnless(HAS_CV2, "opencv is not installed")
+class TestAdaptiveRasterization(unittest.TestCase):
+    """Test cases for glyph measurement and resolution choice."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_adaptive_dpi(self):
+        """Test that smaller glyphs are rendered at higher resolutions."""
+        self.assertEqual(adaptive_dpi(None), OCR_DPI)
+        self.assertEqual(adaptive_dpi(6.0), 288)
+        self.assertGreater(adaptive_dpi(4.0), adaptive_dpi(8.0))
+        self.assertEqual(adaptive_dpi(1.0), MAX_OCR_DPI)
+        self.assertEqual(adaptive_dpi(40.0), MIN_OCR_DPI)
+
+    def test_glyph_height_tracks_font_size(self):
+        """Test that glyphs measured on the probe grow with the font."""
+        path = os.path.join(self.tmp_dir, "scan.pdf")
+        make_scanned_pdf(path, [("scan", 8), ("scan", 16), ("blank", 0)])
+        heights = []
+        with pymupdf.open(path) as document:
+            for page in document:
+                pixmap, gray = ocr_pool._render(page, ocr_pool.PROBE_DPI)
+                heights.append(glyph_height(gray))
+        self.assertIsNone(heights[2])
+        self.assertGreater(heights[1], heights[0] * 1.5)
+
+    def test_preprocess_reuses_buffer(self):
+        """Test that preprocessing writes a binary image into the given buffer."""
+        gray = np.full((40, 60), 200, dtype=np.uint8)
+        gray[10:30, 20:25] = 30
+        out = ocr_pool._scratch("test", gray.shape)
+        self.assertIs(preprocess(gray, out), out)
+        self.assertEqual(set(np.unique(out)), {0, 255})
+        self.assertTrue(np.shares_memory(out, ocr_pool._scratch("test", (20, 30))))
+
+@unittest.skipUnless(HAS_CV2, "opencv is not installed")
+class TestOcrPage(unittest.TestCase):
+    """Test cases for recognizing a single page."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "scan.pdf")
+        make_scanned_pdf(self.path, [("scan", 8), ("scan", 16)])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_small_print_renders_finer(self):
+        """Test that each page is rendered at its own resolution."""
+        small = ocr_page(self.path, 1, recognizer=fake_recognize)
+        large = ocr_page(self.path, 2, recognizer=fake_recognize)
+
+        self.assertGreater(small.dpi, large.dpi)
+        self.assertTrue(MIN_OCR_DPI <= large.dpi < small.dpi <= MAX_OCR_DPI)
+        self.assertIn(f"at {small.dpi} dpi binary=True", small.text)
+        self.assertEqual(small.confidence, 87.5)
+        self.assertGreater(small.elapsed, 0)
+        self.assertTrue(small.ok)
+
+@unittest.skipUnless(HAS_CV2, "opencv is not installed")
+class TestOcrPool(unittest.TestCase):
+    """Test cases for OcrPool class."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "filing.pdf")
+        make_scanned_pdf(self.path, [("text", 11), ("scan", 10), ("blank", 0), ("scan", 12)])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_only_scanned_pages_are_recognized(self):
+        """Test that pages with a text layer are neither rendered nor recognized."""
+        self.assertEqual(OcrPool.pages_needing_ocr(self.path), [2, 4])
+        with OcrPool(max_workers=2, recognizer=fake_recognize) as pool:
+            pages = pool.ocr_pages(self.path)
+            text = pool.extract(self.path)
+            stats = pool.stats()
+
+        self.assertEqual([page.page_number for page in pages], [2, 4])
+        lines = text.split("\n")
+        self.assertTrue(lines[0].startswith(PROSE))
+        self.assertTrue(lines[-1].startswith("page "))
+        self.assertEqual(stats["pages"], 4)
+        self.assertEqual(stats["failures"], 0)
+        self.assertEqual(stats["mean_confidence"], 87.5)
+        self.assertGreater(stats["render_seconds"], 0)
+
+    def test_failed_pages_keep_text_layer(self):
+        """Test that a failed page is reported and the rest of the text kept."""
+        with OcrPool(max_workers=1, recognizer=failing_recognize) as pool:
+            pages = pool.ocr_pages(self.path)
+            text = pool.extract(self.path)
+            stats = pool.stats()
+
+        self.assertEqual([page.ok for page in pages], [False, False])
+        self.assertIn("tesseract is not installed", pages[0].error)
+        self.assertTrue(text.startswith(PROSE))
+        self.assertEqual(stats["failures"], 4)
+
+if __name__ == '__main__':
+    unittest.main()
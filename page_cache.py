@@ -0,0 +1,122 @@
+"""Persistent cache of extracted PDF page text.
+
+Filings reuse whole pages of boilerplate (disclaimers, risk factors, term
+sheet templates). This module stores the text of every extracted page in a
+SQLite index keyed by a fingerprint of the page's content stream, fonts
+and extractor, so a page already seen in any document is returned without
+running layout analysis again.
+"""
+
+import logging
+import sqlite3
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlite_cache import DEFAULT_MAX_BYTES, DEFAULT_TIMEOUT, SQLiteLRUCache
+
+logger = logging.getLogger(__name__)
+
+class PageCache(SQLiteLRUCache):
+    """SQLite-backed page text cache with LRU eviction."""
+
+    table = "pages"
+    schema = """
+        key TEXT PRIMARY KEY,
+        text TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        accessed_at REAL NOT NULL
+    """
+
+    def __init__(self, cache_path: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 timeout: float = DEFAULT_TIMEOUT):
+        """Initialize the page cache.
+
+        Several processes may open the same cache. Readers never wait for a
+        writer, and a lookup or write that still finds the database locked
+        after ``timeout`` is treated as a miss or skipped rather than
+        failing the extraction.
+
+        Args:
+            cache_path: Path of the SQLite database
+            max_bytes: Size cap for stored text; least recently used pages
+                are evicted once it is exceeded
+            timeout: Seconds to wait for another connection's write
+        """
+        super().__init__(cache_path, max_bytes, timeout)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Look up the text of many pages, marking the hits recently used.
+
+        Args:
+            keys: Page fingerprints
+
+        Returns:
+            Dict[str, str]: Text of every page found, by fingerprint
+        """
+        keys = list(keys)
+        unique = list(dict.fromkeys(keys))
+        found: Dict[str, str] = {}
+        now = time.time()
+        with self._lock:
+            try:
+                # Stay under SQLite's bound-parameter limit
+                for start in range(0, len(unique), 500):
+                    batch = unique[start:start + 500]
+                    placeholders = ", ".join("?" * len(batch))
+                    found.update(self._db.execute(
+                        f"SELECT key, text FROM pages WHERE key IN ({placeholders})", batch
+                    ))
+                if found:
+                    self._db.executemany(
+                        "UPDATE pages SET accessed_at = ? WHERE key = ?",
+                        [(now, key) for key in found],
+                    )
+                    self._db.commit()
+            except sqlite3.OperationalError as e:
+                # Locked by another process for longer than the timeout
+                logger.warning(f"Page cache lookup failed, treating as misses: {str(e)}")
+                self._db.rollback()
+                found = {}
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up the text of a single page.
+
+        Args:
+            key: Page fingerprint
+
+        Returns:
+            Optional[str]: The cached text, or None if the page is not cached
+        """
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Iterable[Tuple[str, str]]) -> None:
+        """Store the text of many pages in one transaction.
+
+        Args:
+            items: ``(fingerprint, text)`` pairs
+        """
+        now = time.time()
+        rows = [(key, text, len(text.encode("utf-8")), now) for key, text in items]
+        if not rows:
+            return
+        with self._lock:
+            try:
+                self._db.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)", rows)
+                self._evict()
+                self._db.commit()
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Page cache write of {len(rows)} pages skipped: {str(e)}")
+                self._db.rollback()
+
+    def put(self, key: str, text: str) -> None:
+        """Store the text of a single page.
+
+        Args:
+            key: Page fingerprint
+            text: Extracted text
+        """
+        self.put_many([(key, text)])
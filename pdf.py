@@ -1,10 +1,10 @@
-import requests
 from bs4 import BeautifulSoup
-import csv
 import os
-import pdfplumber
-from lxml import etree
-from io import BytesIO  # Import BytesIO for handling bytes content
+from http_cache import ResponseCache
+from page_cache import PageCache
+from pdf_extractor import PDFExtractor
+from results_store import ResultsStore
+from url_extractor import ContentDispatcher, URLTextExtractor
 
 # List of URLs
 urls = [
@@ -15,63 +15,69 @@ urls = [
 
 ]
 
-# CSV file name
+# Exported CSV and the results store behind it
 csv_filename = 'pdfGroundTruth.csv'
+store_filename = 'pdfGroundTruth.sqlite'
 
-# Check if the CSV file exists to avoid overwriting
-if os.path.exists(csv_filename):
-    # Read existing rows to determine the next index
-    with open(csv_filename, mode='r', encoding='utf-8') as file:
-        reader = csv.reader(file)
-        rows = list(reader)
-        row_index = len(rows)  # Starting row index is the current row count
-else:
-    # Create the file and add headers if it doesn't exist
-    row_index = 2
-    with open(csv_filename, mode='w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(["pdfName", "URL", "Extracted Text"])
+# Largest document we are willing to download (bytes)
+MAX_DOCUMENT_BYTES = 200 * 1024 * 1024
 
-# Process each URL
-for url in urls:
-    # Fetch the webpage content
-    response = requests.get(url)
-    
-    # If the content is HTML
-    if 'html' in response.headers['Content-Type']:
-        soup = BeautifulSoup(response.content, 'html.parser')
-        # Extract text from paragraph tags
-        text = ' '.join(p.get_text() for p in soup.find_all('p'))
-    
-    # If the content is PDF
-    elif 'pdf' in response.headers['Content-Type']:
-        # Use BytesIO to handle the PDF content as a file-like object
-        pdf_file = BytesIO(response.content)
-        with pdfplumber.open(pdf_file) as pdf:
-            text = ''
-            for page in pdf.pages:
-                text += page.extract_text()
-    
-    # If the content is XML (e.g., XSL)
-    elif 'xml' in response.headers['Content-Type']:
-        root = etree.fromstring(response.content)
-        text = ' '.join([elem.text for elem in root.iter() if elem.text])
+# Resident memory ceiling while extracting PDFs (bytes)
+MAX_RSS_BYTES = 1024 * 1024 * 1024
 
-    else:
-        # If it's some other type of content, fallback to plain text
-        text = response.text
+def extract_paragraphs(body, encoding=None):
+    """Extract text from the paragraph tags of an HTML document."""
+    soup = BeautifulSoup(body, 'html.parser', from_encoding=encoding)
+    return ' '.join(p.get_text() for p in soup.find_all('p'))
 
-    # Clean the extracted text
-    cleaned_text = ' '.join(text.splitlines()).strip()
+# Pages repeated across filings (disclaimers, risk factors) are extracted once
+page_cache = PageCache('.page_cache.sqlite')
 
-    # Prepare the name (starts with 'jefferies' followed by the current row number in the CSV)
-    name = f"jefferies{row_index}"
+# Open long prospectuses a window of pages at a time and keep this process
+# under the memory ceiling
+pdf_extractor = PDFExtractor(cache=page_cache, low_memory=True,
+                             max_rss_bytes=MAX_RSS_BYTES)
 
-    # Append the new data to the CSV
-    with open(csv_filename, mode='a', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow([name, url, cleaned_text])
+def extract_pdf(body, encoding=None):
+    """Extract the text of a PDF page by page, reusing cached pages."""
+    return '\n'.join(page.text for page in pdf_extractor.iter_pages(body))
 
-    row_index += 1
+# Route each document by its leading bytes (PDF, XML or HTML), keeping the
+# paragraph-only extraction this ground truth has always used for HTML
+dispatcher = ContentDispatcher()
+dispatcher.register('html', extract_paragraphs)
+dispatcher.register('pdf', extract_pdf)
 
-print(f"Text extracted and saved to {csv_filename}.")
+# Cache downloaded documents so reruns only revalidate unchanged filings, and
+# stream them into spooled files instead of holding them in memory
+cache = ResponseCache('.http_cache')
+extractor = URLTextExtractor(cache=cache, stream=True, max_bytes=MAX_DOCUMENT_BYTES,
+                             dispatcher=dispatcher)
+
+# Results are kept in an indexed store keyed by URL, so rerunning a URL
+# replaces its row instead of appending a duplicate, and the CSV is
+# written once at the end. The store and CSV are saved even if a URL
+# fails mid-run, so buffered results are not lost
+try:
+    with ResultsStore(store_filename) as store:
+        if len(store) == 0 and os.path.exists(csv_filename):
+            store.import_csv(csv_filename)
+
+        try:
+            # Process each URL
+            for url in urls:
+                text = extractor.extract_text(url)
+
+                # Clean the extracted text
+                cleaned_text = ' '.join(text.splitlines()).strip()
+
+                # Store it under its 'jefferies<N>' name, allocated on first sight
+                store.upsert(url, cleaned_text)
+        finally:
+            store.export_csv(csv_filename)
+            print(f"Text extracted and saved to {csv_filename}.")
+finally:
+    print(f"Response cache: {cache.stats()}")
+    print(f"Page cache: {page_cache.stats()}")
+    cache.close()
+    page_cache.close()
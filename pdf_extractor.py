@@ -0,0 +1,541 @@
+"""Page-parallel PDF text extraction.
+
+This module splits a PDF into page ranges and extracts each range in a
+separate process, so large filings scale with the number of cores. Every
+page is returned with its own text and timing, and the document text is
+joined once at the end. With a page cache, pages whose content has been
+extracted before, in this or any other document, are not extracted again.
+"""
+
+import contextlib
+import functools
+import gc
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from page_cache import PageCache
+
+logger = logging.getLogger(__name__)
+
+# Number of pages extracted by one task
+DEFAULT_PAGES_PER_TASK = 16
+
+# Documents with fewer pages than this are extracted in the calling process
+PARALLEL_MIN_PAGES = 32
+
+# Number of pages open at once in low-memory mode
+DEFAULT_WINDOW_PAGES = 32
+
+# Nesting depth followed when fingerprinting page resources; pages with
+# deeper resources are not cached
+MAX_FINGERPRINT_DEPTH = 12
+
+PDFSource = Union[str, os.PathLike, bytes, BinaryIO]
+
+class PDFExtractionError(Exception):
+    """Raised when a PDF cannot be opened or read."""
+    pass
+
+class PageResult(NamedTuple):
+    """Text extracted from a single PDF page."""
+    page_number: int
+    text: str
+    elapsed: float
+    error: Optional[str] = None
+    cached: bool = False
+    tier: str = "pdfplumber"
+
+    @property
+    def ok(self) -> bool:
+        """Whether the page was extracted without error."""
+        return self.error is None
+
+class PDFExtractionResult(NamedTuple):
+    """Text extracted from a PDF, page by page."""
+    pages: List[PageResult]
+    elapsed: float
+
+    @property
+    def text(self) -> str:
+        """Text of all pages, one page per block."""
+        return '\n'.join(page.text for page in self.pages)
+
+    @property
+    def cache_hits(self) -> int:
+        """Number of pages served from the page cache."""
+        return sum(1 for page in self.pages if page.cached)
+
+    @property
+    def failed_pages(self) -> List[int]:
+        """Numbers of the pages that could not be extracted."""
+        return [page.page_number for page in self.pages if not page.ok]
+
+def open_pdf(source: Union[str, BinaryIO], pages: Optional[List[int]] = None):
+    """Open a PDF with pdfplumber.
+
+    Args:
+        source: Path of the PDF, or a seekable binary file holding it
+        pages: 1-based numbers of the pages to load; all pages if omitted
+
+    Returns:
+        pdfplumber.PDF: The opened document
+
+    Raises:
+        PDFExtractionError: If the PDF cannot be opened
+    """
+    import pdfplumber
+
+    try:
+        return pdfplumber.open(source, pages=pages)
+    except Exception as e:
+        raise PDFExtractionError(f"Failed to open PDF: {str(e)}")
+
+def count_pages(source: Union[str, BinaryIO]) -> int:
+    """Count the pages of a PDF from its page tree, without parsing any page.
+
+    Uses pypdfium2, which pdfplumber already depends on, so counting a
+    1,000-page filing does not load 1,000 pdfplumber page objects.
+
+    Args:
+        source: Path of the PDF, or a seekable binary file holding it
+
+    Returns:
+        int: Number of pages
+
+    Raises:
+        PDFExtractionError: If the PDF cannot be opened
+    """
+    import pypdfium2
+
+    position = None if isinstance(source, str) else source.tell()
+    try:
+        document = pypdfium2.PdfDocument(source)
+    except Exception as e:
+        raise PDFExtractionError(f"Failed to open PDF: {str(e)}")
+    try:
+        return len(document)
+    finally:
+        document.close()
+        if position is not None:
+            source.seek(position)
+
+def extract_pages(pages: Iterable) -> List[PageResult]:
+    """Extract the text of already loaded pdfplumber pages.
+
+    A page that fails is recorded with its error instead of aborting the
+    document.
+
+    Args:
+        pages: pdfplumber pages
+
+    Returns:
+        List[PageResult]: One result per page, in the given order
+    """
+    results = []
+    for page in pages:
+        page_start = time.perf_counter()
+        try:
+            # Pages without a text layer yield None on older pdfplumber
+            text = page.extract_text() or ''
+            error = None
+        except Exception as e:
+            logger.warning(f"Failed to extract page {page.page_number}: {str(e)}")
+            text, error = '', str(e)
+        results.append(PageResult(
+            page.page_number, text, time.perf_counter() - page_start, error))
+        page.close()
+    return results
+
+def extract_page_list(path: str, page_numbers: List[int]) -> List[PageResult]:
+    """Extract the text of selected pages.
+
+    This is the unit of work run in each pool process.
+
+    Args:
+        path: Path of the PDF
+        page_numbers: 1-based numbers of the pages to extract, ascending
+
+    Returns:
+        List[PageResult]: One result per page, in page order
+
+    Raises:
+        PDFExtractionError: If the PDF cannot be opened
+    """
+    with open_pdf(path, pages=page_numbers) as pdf:
+        return extract_pages(pdf.pages)
+
+def extract_page_range(path: str, start: int, stop: int) -> List[PageResult]:
+    """Extract the text of a range of pages.
+
+    Args:
+        path: Path of the PDF
+        start: First page number, 1-based
+        stop: Page number after the last page to extract
+
+    Returns:
+        List[PageResult]: One result per page, in page order
+
+    Raises:
+        PDFExtractionError: If the PDF cannot be opened
+    """
+    return extract_page_list(path, list(range(start, stop)))
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes.
+
+    Returns:
+        Optional[int]: The RSS, or None if it cannot be measured here
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+@contextlib.contextmanager
+def prepared_source(source: PDFSource) -> Iterator[Union[str, BinaryIO]]:
+    """Normalize a PDF source to a path or a seekable binary file.
+
+    Raw bytes are wrapped in a spooled temporary file that is closed on exit.
+
+    Args:
+        source: Path of the PDF, its raw bytes, or a seekable binary file
+
+    Yields:
+        Union[str, BinaryIO]: The path or file to open
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        body = tempfile.SpooledTemporaryFile()
+        body.write(source)
+        body.seek(0)
+        with body:
+            yield body
+    elif isinstance(source, os.PathLike):
+        yield os.fspath(source)
+    else:
+        yield source
+
+@functools.lru_cache(maxsize=None)
+def extractor_id() -> str:
+    """Name and version of the text extractor, part of every page fingerprint."""
+    import pdfplumber
+
+    return f"pdfplumber-{pdfplumber.__version__}/extract_text"
+
+class _FingerprintTooDeep(Exception):
+    """Raised when page resources nest deeper than MAX_FINGERPRINT_DEPTH."""
+    pass
+
+def _hash_object(obj: Any, hasher: "hashlib._Hash", memo: Dict[int, bytes], depth: int = 0) -> None:
+    """Feed a PDF object into a hash, following references.
+
+    Referenced objects are hashed by content, not object number, so the same
+    font embedded in two files hashes the same. ``memo`` caches the digest
+    of every referenced object already seen in the document.
+
+    Raises:
+        _FingerprintTooDeep: If the object nests deeper than
+            ``MAX_FINGERPRINT_DEPTH``; a truncated digest could match a page
+            that differs below the cutoff, so none is memoized
+    """
+    from pdfminer.pdftypes import PDFObjRef, PDFStream
+
+    if depth > MAX_FINGERPRINT_DEPTH:
+        raise _FingerprintTooDeep()
+    if isinstance(obj, PDFObjRef):
+        digest = memo.get(obj.objid)
+        if digest is None:
+            sub = hashlib.sha256()
+            _hash_object(obj.resolve(), sub, memo, depth + 1)
+            digest = memo[obj.objid] = sub.digest()
+        hasher.update(digest)
+    elif isinstance(obj, PDFStream):
+        _hash_object(obj.attrs, hasher, memo, depth + 1)
+        hasher.update(hashlib.sha256(obj.get_rawdata() or b"").digest())
+    elif isinstance(obj, dict):
+        hasher.update(b"{")
+        for key in sorted(obj, key=str):
+            # Back-references to the page tree would hash the whole document
+            if key != "Parent":
+                hasher.update(str(key).encode())
+                _hash_object(obj[key], hasher, memo, depth + 1)
+        hasher.update(b"}")
+    elif isinstance(obj, (list, tuple)):
+        hasher.update(b"[")
+        for item in obj:
+            _hash_object(item, hasher, memo, depth + 1)
+        hasher.update(b"]")
+    else:
+        hasher.update(repr(obj).encode())
+
+def page_fingerprint(page, memo: Optional[Dict[int, bytes]] = None) -> Optional[str]:
+    """Fingerprint everything that determines a page's extracted text.
+
+    The fingerprint covers the page's content streams, its font and
+    XObject resources, its crop box and rotation, and the extractor
+    version, so identical boilerplate pages in different files share a key.
+
+    Args:
+        page: A pdfplumber page
+        memo: Digests of referenced objects already hashed in this document
+
+    Returns:
+        Optional[str]: Hex SHA-256 digest, or None if the page's resources
+        nest too deeply to fingerprint and the page must not be cached
+    """
+    memo = {} if memo is None else memo
+    page_obj = page.page_obj
+    hasher = hashlib.sha256(extractor_id().encode())
+    hasher.update(repr((tuple(page.bbox), page.rotation)).encode())
+    try:
+        for stream in page_obj.contents:
+            _hash_object(stream, hasher, memo)
+        resources = page_obj.resources or {}
+        for kind in ("Font", "XObject"):
+            hasher.update(kind.encode())
+            _hash_object(resources.get(kind), hasher, memo)
+    except _FingerprintTooDeep:
+        logger.debug(f"Page {page.page_number} resources too deep to fingerprint, not caching")
+        return None
+    return hasher.hexdigest()
+
+class PDFExtractor:
+    """Extracts PDF text by sharding page ranges across a process pool."""
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 pages_per_task: int = DEFAULT_PAGES_PER_TASK,
+                 parallel_min_pages: int = PARALLEL_MIN_PAGES,
+                 executor: Optional[Executor] = None,
+                 cache: Optional[PageCache] = None,
+                 low_memory: bool = False,
+                 window_pages: int = DEFAULT_WINDOW_PAGES,
+                 max_rss_bytes: Optional[int] = None):
+        """Initialize the PDF extractor.
+
+        Args:
+            max_workers: Number of worker processes; defaults to the
+                number of available cores
+            pages_per_task: Number of pages extracted by one task
+            parallel_min_pages: Documents with fewer pages are extracted
+                in the calling process, where a pool would not pay off
+            executor: Pool to run page ranges in; a process pool is
+                created for each document if omitted
+            cache: Page text cache; pages whose fingerprint is cached are
+                not extracted again
+            low_memory: Make :meth:`extract` open the document one window
+                of pages at a time, as :meth:`iter_pages` does
+            window_pages: Number of pages open at once in low-memory mode
+            max_rss_bytes: Resident memory ceiling for this process in
+                low-memory mode; windows shrink when it is reached
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task
+        self.parallel_min_pages = parallel_min_pages
+        self.executor = executor
+        self.cache = cache
+        self.low_memory = low_memory
+        self.window_pages = window_pages
+        self.max_rss_bytes = max_rss_bytes
+
+    def page_batches(self, page_numbers: List[int]) -> List[List[int]]:
+        """Split pages into batches of at most ``pages_per_task``.
+
+        Batches are shrunk so every worker gets at least one when there
+        are few pages relative to the pool.
+
+        Args:
+            page_numbers: 1-based page numbers, ascending
+
+        Returns:
+            List[List[int]]: Consecutive batches covering every page once
+        """
+        count = len(page_numbers)
+        per_task = max(1, min(self.pages_per_task, -(-count // self.max_workers)))
+        return [page_numbers[start:start + per_task] for start in range(0, count, per_task)]
+
+    def extract(self, source: PDFSource) -> PDFExtractionResult:
+        """Extract the text of every page of a PDF.
+
+        Args:
+            source: Path of the PDF, its raw bytes, or a seekable binary
+                file holding it
+
+        Returns:
+            PDFExtractionResult: Per-page results in page order
+
+        Raises:
+            PDFExtractionError: If the PDF cannot be opened
+        """
+        start = time.perf_counter()
+        if self.low_memory:
+            return PDFExtractionResult(list(self.iter_pages(source)),
+                                       time.perf_counter() - start)
+
+        with prepared_source(source) as source:
+            with open_pdf(source) as pdf:
+                keys, cached = self._cached_pages(pdf.pages)
+                missing = [page.page_number for page in pdf.pages
+                           if page.page_number not in cached]
+                parallel = self._parallel(len(missing))
+                if not parallel:
+                    extracted = extract_pages(pdf.pages[number - 1] for number in missing)
+            if parallel:
+                with self._as_path(source) as path, self._pool() as executor:
+                    extracted = self._run_batches(path, missing, executor)
+
+        self._store_pages(keys, extracted)
+        pages = sorted(list(cached.values()) + extracted, key=lambda page: page.page_number)
+        return PDFExtractionResult(pages, time.perf_counter() - start)
+
+    def iter_pages(self, source: PDFSource) -> Iterator[PageResult]:
+        """Extract a PDF lazily, holding at most one window of pages open.
+
+        The document is opened ``window_pages`` pages at a time and closed
+        between windows, which releases pdfplumber's parsed page objects and
+        layout caches. Each page's text is yielded as soon as it is ready.
+        When the process's RSS exceeds ``max_rss_bytes``, the current window
+        is cut short and later windows are halved.
+
+        Args:
+            source: Path of the PDF, its raw bytes, or a seekable binary
+                file holding it
+
+        Yields:
+            PageResult: One result per page, in page order
+
+        Raises:
+            PDFExtractionError: If the PDF cannot be opened, or RSS is still
+                above ``max_rss_bytes`` once windows are down to one page
+        """
+        with prepared_source(source) as source:
+            page_count = count_pages(source)
+            if self._parallel(min(page_count, self.window_pages)):
+                with self._as_path(source) as path, self._pool() as executor:
+                    yield from self._iter_windows(path, page_count, executor)
+            else:
+                yield from self._iter_windows(source, page_count, None)
+
+    def _iter_windows(self, source: Union[str, BinaryIO], page_count: int,
+                      executor: Optional[Executor]) -> Iterator[PageResult]:
+        """Yield the pages of a document one window at a time."""
+        window = self.window_pages
+        next_page = 1
+        while next_page <= page_count:
+            numbers = list(range(next_page, min(next_page + window, page_count + 1)))
+            for page in self._extract_window(source, numbers, executor):
+                next_page = page.page_number + 1
+                yield page
+            gc.collect()
+
+            rss = current_rss()
+            if self.max_rss_bytes is not None and rss is not None and rss > self.max_rss_bytes:
+                if window == 1:
+                    raise PDFExtractionError(
+                        f"RSS {rss} bytes exceeds the {self.max_rss_bytes} byte ceiling")
+                window = max(1, window // 2)
+                logger.warning(f"RSS {rss} bytes over ceiling, window shrunk to {window} pages")
+
+    def _extract_window(self, source: Union[str, BinaryIO], numbers: List[int],
+                        executor: Optional[Executor]) -> Iterator[PageResult]:
+        """Yield the pages of one window in order, stopping early over the RSS ceiling."""
+        with open_pdf(source, pages=numbers) as pdf:
+            keys, cached = self._cached_pages(pdf.pages)
+            missing = [page for page in pdf.pages if page.page_number not in cached]
+            if executor is not None and self._parallel(len(missing)):
+                extracted = self._run_batches(
+                    source, [page.page_number for page in missing], executor)
+                self._store_pages(keys, extracted)
+                pages = sorted(list(cached.values()) + extracted,
+                               key=lambda page: page.page_number)
+                yield from pages
+                return
+
+            for page in pdf.pages:
+                result = cached.get(page.page_number)
+                if result is None:
+                    result = extract_pages([page])[0]
+                    self._store_pages(keys, [result])
+                yield result
+                if self._over_ceiling():
+                    return
+
+    def _cached_pages(self, pages: List) -> Tuple[Dict[int, str], Dict[int, PageResult]]:
+        """Fingerprint pages and look them up in the page cache.
+
+        Returns:
+            Tuple[Dict[int, str], Dict[int, PageResult]]: Fingerprints of
+            the cacheable pages and cached results, both by page number
+        """
+        if self.cache is None:
+            return {}, {}
+        memo: Dict[int, bytes] = {}
+        keys = {page.page_number: page_fingerprint(page, memo) for page in pages}
+        keys = {number: key for number, key in keys.items() if key is not None}
+        found = self.cache.get_many(keys.values())
+        cached = {number: PageResult(number, found[key], 0.0, cached=True)
+                  for number, key in keys.items() if key in found}
+        return keys, cached
+
+    def _store_pages(self, keys: Dict[int, str], pages: List[PageResult]) -> None:
+        """Write newly extracted pages to the page cache."""
+        if self.cache is not None:
+            self.cache.put_many((keys[page.page_number], page.text)
+                                for page in pages if page.ok and page.page_number in keys)
+
+    def _parallel(self, page_count: int) -> bool:
+        """Whether extracting ``page_count`` pages is worth a pool."""
+        return page_count >= self.parallel_min_pages and self.max_workers > 1
+
+    def _over_ceiling(self) -> bool:
+        """Whether this process's RSS is above ``max_rss_bytes``."""
+        if self.max_rss_bytes is None:
+            return False
+        rss = current_rss()
+        return rss is not None and rss > self.max_rss_bytes
+
+    def _run_batches(self, path: str, page_numbers: List[int],
+                     executor: Executor) -> List[PageResult]:
+        """Submit every page batch of ``path`` and collect the pages in order."""
+        futures = [executor.submit(extract_page_list, path, batch)
+                   for batch in self.page_batches(page_numbers)]
+        return [page for future in futures for page in future.result()]
+
+    @contextlib.contextmanager
+    def _pool(self) -> Iterator[Executor]:
+        """Provide the configured executor, or a process pool for one document."""
+        if self.executor is not None:
+            yield self.executor
+            return
+        executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        try:
+            yield executor
+        finally:
+            executor.shutdown()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _as_path(source: Union[str, BinaryIO]) -> Iterator[str]:
+        """Provide a path to the document for pool processes to open.
+
+        File objects are written out once rather than pickled into every
+        task.
+        """
+        if isinstance(source, str):
+            yield source
+            return
+        with tempfile.NamedTemporaryFile(suffix='.pdf') as spilled:
+            source.seek(0)
+            shutil.copyfileobj(source, spilled)
+            spilled.flush()
+            yield spilled.name
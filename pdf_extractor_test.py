@@ -0,0 +1,315 @@
+"""Tests for the page-parallel PDF extractor."""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from page_cache import PageCache
+from pdf_extractor import (
+    MAX_FINGERPRINT_DEPTH,
+    PDFExtractionError,
+    PDFExtractor,
+    current_rss,
+    extract_page_range,
+    open_pdf,
+    page_fingerprint,
+)
+
+# 1x1 grey image drawn on image-only pages
+IMAGE_OBJECT = (b"<< /Type /XObject /Subtype /Image /Width 1 /Height 1 "
+                b"/ColorSpace /DeviceGray /BitsPerComponent 8 /Length 1 >>\nstream\n\x80\nendstream")
+
+def make_pdf(page_texts):
+    """Build a minimal PDF with Helvetica text on each page.
+
+    A page given as a string holds one line of text; a list of strings is
+    laid out as separate, widely spaced text blocks. Pages with empty text
+    have no text layer at all, and pages given as None hold only an image.
+    """
+    page_count = len(page_texts)
+    first_page = 5
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            b" ".join(b"%d 0 R" % (first_page + 2 * i) for i in range(page_count)),
+            page_count),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        IMAGE_OBJECT,
+    ]
+    for i, text in enumerate(page_texts):
+        if text is None:
+            stream = b"q 200 0 0 200 72 500 cm /Im1 Do Q"
+        elif isinstance(text, list):
+            stream = b" ".join(
+                b"BT /F1 10 Tf %d %d Td (%s) Tj ET" % (
+                    72 + 160 * (j % 3), 760 - 30 * (j // 3), line.encode("latin-1"))
+                for j, line in enumerate(text))
+        else:
+            stream = (b"BT /F1 12 Tf 72 720 Td (%s) Tj ET" % text.encode("latin-1")
+                      if text else b"")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> /XObject << /Im1 4 0 R >> >> "
+                       b"/Contents %d 0 R >>" % (first_page + 2 * i + 1))
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, xref)
+    return bytes(pdf)
+
+class TestPDFExtractor(unittest.TestCase):
+    """Test cases for PDFExtractor class."""
+
+    def setUp(self):
+        self.texts = [f"Page {i} of the prospectus" for i in range(1, 11)]
+        self.pdf = make_pdf(self.texts)
+        handle, self.path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(handle, "wb") as file:
+            file.write(self.pdf)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_inline_extraction_from_path(self):
+        """Test that small documents are extracted page by page in order."""
+        result = PDFExtractor().extract(self.path)
+        self.assertEqual([page.page_number for page in result.pages], list(range(1, 11)))
+        self.assertEqual([page.text for page in result.pages], self.texts)
+        self.assertEqual(result.text, "\n".join(self.texts))
+        self.assertTrue(all(page.elapsed >= 0 for page in result.pages))
+
+    def test_extraction_from_bytes_and_file(self):
+        """Test that raw bytes and open files are accepted."""
+        self.assertEqual(PDFExtractor().extract(self.pdf).text, "\n".join(self.texts))
+        with open(self.path, "rb") as file:
+            self.assertEqual(PDFExtractor().extract(file).text, "\n".join(self.texts))
+            self.assertFalse(file.closed)
+
+    def test_parallel_extraction_matches_serial(self):
+        """Test that sharded extraction returns the same pages in order."""
+        extractor = PDFExtractor(max_workers=3, pages_per_task=2, parallel_min_pages=1,
+                                 executor=ThreadPoolExecutor(max_workers=3))
+        self.assertEqual(extractor.extract(self.path).text, "\n".join(self.texts))
+        with open(self.path, "rb") as file:
+            self.assertEqual(extractor.extract(file).text, "\n".join(self.texts))
+
+    def test_parallel_extraction_in_process_pool(self):
+        """Test extraction with the default process pool."""
+        extractor = PDFExtractor(max_workers=2, parallel_min_pages=1)
+        result = extractor.extract(self.pdf)
+        self.assertEqual([page.text for page in result.pages], self.texts)
+
+    def test_page_without_text_layer(self):
+        """Test that pages without text yield empty text rather than failing."""
+        result = PDFExtractor().extract(make_pdf(["First", "", "Third"]))
+        self.assertEqual([page.text for page in result.pages], ["First", "", "Third"])
+        self.assertEqual(result.failed_pages, [])
+
+    def test_page_batches(self):
+        """Test that page batches cover every page exactly once."""
+        extractor = PDFExtractor(max_workers=4, pages_per_task=16)
+        self.assertEqual(extractor.page_batches(list(range(1, 11))),
+                         [[1, 2, 3], [4, 5, 6], [7, 8, 9], [10]])
+        batches = extractor.page_batches(list(range(1, 301)))
+        self.assertEqual(batches[0], list(range(1, 17)))
+        self.assertEqual(batches[-1], list(range(289, 301)))
+        self.assertEqual(sum(batches, []), list(range(1, 301)))
+        self.assertEqual(extractor.page_batches([2, 5, 9]), [[2], [5], [9]])
+
+    def test_extract_page_range(self):
+        """Test extracting a slice of a document."""
+        pages = extract_page_range(self.path, 4, 7)
+        self.assertEqual([page.page_number for page in pages], [4, 5, 6])
+        self.assertEqual(pages[0].text, "Page 4 of the prospectus")
+
+    def test_invalid_pdf(self):
+        """Test that unreadable documents raise PDFExtractionError."""
+        with self.assertRaises(PDFExtractionError):
+            PDFExtractor().extract(b"not a pdf")
+
+class TestLowMemoryExtraction(unittest.TestCase):
+    """Test cases for windowed, low-memory PDF extraction."""
+
+    def setUp(self):
+        self.texts = [f"Page {i}" for i in range(1, 11)]
+        self.pdf = make_pdf(self.texts)
+
+    def opened_windows(self, extractor, source):
+        """Run ``iter_pages`` and record the page windows it opens."""
+        windows = []
+
+        def recording_open(source, pages=None):
+            windows.append(pages)
+            return open_pdf(source, pages=pages)
+
+        with mock.patch("pdf_extractor.open_pdf", side_effect=recording_open):
+            pages = list(extractor.iter_pages(source))
+        return pages, windows
+
+    def test_iter_pages_opens_windows(self):
+        """Test that pages are yielded in order from bounded windows."""
+        pages, windows = self.opened_windows(PDFExtractor(window_pages=4), self.pdf)
+
+        self.assertEqual([page.text for page in pages], self.texts)
+        # The whole document is never opened, not even to count its pages
+        self.assertEqual(windows, [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10]])
+
+    def test_iter_pages_is_lazy(self):
+        """Test that later windows are not opened before they are needed."""
+        pages = PDFExtractor(window_pages=2).iter_pages(self.pdf)
+        self.assertEqual(next(pages).text, "Page 1")
+        pages.close()
+
+    def test_low_memory_extract(self):
+        """Test that low-memory mode returns the same result as the default."""
+        extractor = PDFExtractor(low_memory=True, window_pages=3)
+        self.assertEqual(extractor.extract(self.pdf).text, "\n".join(self.texts))
+
+    def test_low_memory_parallel(self):
+        """Test windowed extraction through a pool."""
+        extractor = PDFExtractor(max_workers=2, pages_per_task=2, parallel_min_pages=1,
+                                 window_pages=4, executor=ThreadPoolExecutor(max_workers=2))
+        self.assertEqual([page.text for page in extractor.iter_pages(self.pdf)], self.texts)
+
+    def test_rss_ceiling_shrinks_windows(self):
+        """Test that windows are cut short and halved over the RSS ceiling."""
+        rss = iter([100] * 3 + [10] * 100)
+        extractor = PDFExtractor(window_pages=4, max_rss_bytes=50)
+        with mock.patch("pdf_extractor.current_rss", side_effect=lambda: next(rss)):
+            pages, windows = self.opened_windows(extractor, self.pdf)
+
+        self.assertEqual([page.text for page in pages], self.texts)
+        self.assertEqual(windows[:3], [[1, 2, 3, 4], [2, 3], [3, 4]])
+
+    def test_rss_ceiling_exceeded(self):
+        """Test that extraction stops when single-page windows stay over the ceiling."""
+        extractor = PDFExtractor(window_pages=2, max_rss_bytes=50)
+        with mock.patch("pdf_extractor.current_rss", return_value=100):
+            with self.assertRaises(PDFExtractionError):
+                list(extractor.iter_pages(self.pdf))
+
+    def test_current_rss(self):
+        """Test that the RSS of this process can be measured."""
+        self.assertGreater(current_rss(), 0)
+
+def write_pages(cache_path, worker):
+    """Store pages from a separate process, as an extraction worker does."""
+    cache = PageCache(cache_path)
+    for i in range(50):
+        cache.put(f"{worker}-{i}", f"Page {i} of worker {worker}")
+    cache.close()
+
+class TestPageCache(unittest.TestCase):
+    """Test cases for PDF extraction with a page cache."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = PageCache(os.path.join(self.tmp_dir, "pages.sqlite"))
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_repeated_pages_are_served_from_cache(self):
+        """Test that boilerplate pages shared between documents hit the cache."""
+        extractor = PDFExtractor(cache=self.cache)
+        first = extractor.extract(make_pdf(["Cover A", "Risk factors", "Disclaimer"]))
+        self.assertEqual(first.cache_hits, 0)
+
+        second = extractor.extract(make_pdf(["Cover B", "Risk factors", "Disclaimer"]))
+        self.assertEqual(second.text, "Cover B\nRisk factors\nDisclaimer")
+        self.assertEqual([page.cached for page in second.pages], [False, True, True])
+        self.assertEqual(second.cache_hits, 2)
+
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 4))
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 6)
+        self.assertEqual(stats["entries"], 4)
+
+    def test_cached_pages_skip_parallel_extraction(self):
+        """Test that only uncached pages are sent to the pool."""
+        extractor = PDFExtractor(max_workers=2, pages_per_task=2, parallel_min_pages=1,
+                                 executor=ThreadPoolExecutor(max_workers=2),
+                                 cache=self.cache)
+        texts = [f"Page {i}" for i in range(1, 7)]
+        extractor.extract(make_pdf(texts[:3]))
+
+        result = extractor.extract(make_pdf(texts))
+        self.assertEqual(result.text, "\n".join(texts))
+        self.assertEqual(result.cache_hits, 3)
+
+    def test_fingerprint_depends_on_content(self):
+        """Test that different pages never share a fingerprint."""
+        pdf = make_pdf(["Same", "Same", "Different"])
+        with open_pdf(io.BytesIO(pdf)) as document:
+            keys = [page_fingerprint(page) for page in document.pages]
+        self.assertEqual(keys[0], keys[1])
+        self.assertNotEqual(keys[0], keys[2])
+
+    def test_deep_resources_are_not_fingerprinted(self):
+        """Test that pages nesting past the depth cutoff get no fingerprint."""
+        pdf = make_pdf(["Same"])
+        with open_pdf(io.BytesIO(pdf)) as document:
+            page = document.pages[0]
+            shallow = page_fingerprint(page)
+            deep = {"Leaf": 1}
+            for _ in range(MAX_FINGERPRINT_DEPTH + 1):
+                deep = {"Next": deep}
+            with mock.patch.object(page.page_obj, "resources", {"XObject": deep}):
+                self.assertIsNone(page_fingerprint(page))
+        self.assertIsNotNone(shallow)
+
+    def test_concurrent_writer_processes(self):
+        """Test that worker processes sharing the cache file do not lock each other out."""
+        from concurrent.futures import ProcessPoolExecutor
+
+        path = os.path.join(self.tmp_dir, "pages.sqlite")
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            list(executor.map(write_pages, [path] * 4, range(4)))
+        self.assertEqual(self.cache.stats()["entries"], 200)
+
+    def test_locked_database_is_a_miss(self):
+        """Test that a write lock held past the timeout skips writes instead of raising."""
+        import sqlite3
+
+        path = os.path.join(self.tmp_dir, "pages.sqlite")
+        self.cache.put("a", "cached")
+        cache = PageCache(path, timeout=0.1)
+        other = sqlite3.connect(path)
+        other.execute("BEGIN EXCLUSIVE")
+        try:
+            cache.put("b", "not stored")
+            self.assertEqual(cache.get_many(["a", "b"]), {})
+            self.assertEqual(cache.stats()["misses"], 2)
+        finally:
+            other.rollback()
+            other.close()
+        self.assertEqual(cache.get("a"), "cached")
+        self.assertIsNone(cache.get("b"))
+        cache.close()
+
+    def test_eviction(self):
+        """Test that the least recently used pages are evicted over the size cap."""
+        cache = PageCache(os.path.join(self.tmp_dir, "small.sqlite"), max_bytes=10)
+        cache.put("a", "12345")
+        cache.put("b", "12345")
+        cache.get("a")
+        cache.put("c", "12345")
+
+        self.assertEqual(cache.get_many(["a", "b", "c"]), {"a": "12345", "c": "12345"})
+        self.assertEqual(cache.stats()["evictions"], 1)
+        cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,364 @@
+"""Shared rate limiting for remote model calls.
+
+A token bucket holds calls to the per-minute quota, and an AIMD
+concurrency window decides how many calls may be in flight: it grows
+by one slot per window's worth of successful calls and halves whenever
+the endpoint throttles; other failures leave it unchanged. One limiter
+can be shared by every thread and asyncio task that calls the same
+endpoint.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, Type, Union
+
+logger = logging.getLogger(__name__)
+
+class RetriesExhausted(Exception):
+    """Raised when a call still fails after every retry."""
+    pass
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at a fixed rate."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """Initialize a full bucket.
+
+        Args:
+            rate_per_minute: Tokens added per minute
+            capacity: Largest burst of tokens; defaults to one, so no
+                minute-long window holds more than ``rate_per_minute`` calls
+            clock: Monotonic clock in seconds
+            sleep: Blocks for a number of seconds
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else 1.0
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, possibly from the future.
+
+        Returns:
+            float: Seconds to wait before the token may be used
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self) -> None:
+        """Take a token, waiting until one is available."""
+        wait = self.reserve()
+        if wait > 0:
+            logger.debug(f"Rate limit reached, waiting {wait:.2f} seconds")
+            self._sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Take a token, waiting in the event loop until one is available."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+class _AsyncWaiter:
+    """An asyncio task queued for a concurrency slot."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future: "asyncio.Future[None]" = loop.create_future()
+        # Set, under the window's lock, once a slot is handed to this task
+        self.granted = False
+
+    def wake(self) -> None:
+        """Resolve the future; runs on the waiter's event loop."""
+        if not self.future.done():
+            self.future.set_result(None)
+
+class AdaptiveConcurrency:
+    """Thread-safe AIMD window of concurrent calls.
+
+    Threads wait on a condition variable. Asyncio tasks queue up in order
+    and are handed slots by ``release``, which resolves their futures on
+    their own event loops, so waiting tasks never poll.
+    """
+
+    def __init__(self, initial: int = 1, minimum: int = 1, maximum: int = 8,
+                 decrease_factor: float = 0.5):
+        """Initialize the window.
+
+        Args:
+            initial: Calls allowed in flight at first
+            minimum: Smallest window after throttling
+            maximum: Largest window
+            decrease_factor: Factor the window shrinks by when throttled
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.window = float(max(minimum, min(initial, maximum)))
+        self.in_flight = 0
+        self._condition = threading.Condition()
+        self._async_waiters: Deque[_AsyncWaiter] = deque()
+
+    @property
+    def limit(self) -> int:
+        """Calls currently allowed in flight."""
+        return int(self.window)
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free.
+
+        Returns:
+            bool: Whether a slot was taken
+        """
+        with self._condition:
+            if self.in_flight < self.limit:
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self) -> None:
+        """Take a slot, waiting until one is free."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def acquire_async(self) -> None:
+        """Take a slot, waiting in the event loop until one is free.
+
+        Tasks get slots in the order they asked for them.
+        """
+        with self._condition:
+            if not self._async_waiters and self.in_flight < self.limit:
+                self.in_flight += 1
+                return
+            waiter = _AsyncWaiter(asyncio.get_running_loop())
+            self._async_waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._condition:
+                granted = waiter.granted
+                if not granted:
+                    self._async_waiters.remove(waiter)
+            if granted:
+                # Cancelled after the slot was handed over; give it back
+                self.release(adjust=False)
+            raise
+
+    def release(self, throttled: bool = False, adjust: bool = True) -> None:
+        """Return a slot and adapt the window to the call's outcome.
+
+        Args:
+            throttled: Whether the endpoint throttled the call
+            adjust: Whether the outcome says anything about the endpoint's
+                capacity; the window is left as is when it does not
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if adjust and throttled:
+                self.window = max(float(self.minimum), self.window * self.decrease_factor)
+            elif adjust:
+                self.window = min(float(self.maximum), self.window + 1.0 / self.window)
+            self._wake_async_waiters()
+            self._condition.notify_all()
+
+    def _wake_async_waiters(self) -> None:
+        """Hand free slots to queued asyncio tasks, oldest first.
+
+        Called with the lock held.
+        """
+        while self._async_waiters and self.in_flight < self.limit:
+            waiter = self._async_waiters.popleft()
+            try:
+                waiter.loop.call_soon_threadsafe(waiter.wake)
+            except RuntimeError:
+                # The waiter's event loop has closed
+                continue
+            waiter.granted = True
+            self.in_flight += 1
+
+class RateLimiter:
+    """Limits calls to one endpoint by rate and by adaptive concurrency."""
+
+    def __init__(self, calls_per_minute: float, max_concurrency: int = 8,
+                 initial_concurrency: int = 1, burst: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """Initialize the limiter.
+
+        Args:
+            calls_per_minute: Calls allowed per minute by the endpoint's quota
+            max_concurrency: Largest number of calls in flight
+            initial_concurrency: Calls allowed in flight at first
+            burst: Calls that may start at once after an idle period;
+                defaults to one
+            clock: Monotonic clock in seconds
+            sleep: Blocks for a number of seconds
+        """
+        self.bucket = TokenBucket(calls_per_minute, burst, clock, sleep)
+        self.concurrency = AdaptiveConcurrency(initial_concurrency, maximum=max_concurrency)
+        self.calls = 0
+        self.throttles = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Wait for the rate limit, then for a concurrency slot.
+
+        The token is taken first so no slot sits idle while its holder
+        waits for the rate limit.
+        """
+        self.bucket.acquire()
+        self.concurrency.acquire()
+
+    async def acquire_async(self) -> None:
+        """Wait in the event loop for the rate limit, then for a concurrency slot."""
+        await self.bucket.acquire_async()
+        await self.concurrency.acquire_async()
+
+    def release(self, throttled: bool = False, adjust: bool = True) -> None:
+        """Finish a call taken with ``acquire``.
+
+        Args:
+            throttled: Whether the endpoint throttled the call
+            adjust: Whether to adapt the concurrency window to the outcome;
+                pass False for failures other than throttling
+        """
+        with self._lock:
+            self.calls += 1
+            if throttled:
+                self.throttles += 1
+        self.concurrency.release(throttled, adjust)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Return call counters and the current concurrency window.
+
+        Returns:
+            Dict[str, Union[int, float]]: Calls, throttled calls and window
+        """
+        with self._lock:
+            return {"calls": self.calls, "throttles": self.throttles,
+                    "concurrency": self.concurrency.window}
+
+def _backoff(attempt: int, min_backoff: float, max_backoff: float) -> float:
+    """Seconds to wait after a failed attempt, doubling per attempt with jitter."""
+    return min(max_backoff, min_backoff * 2 ** attempt) + random.uniform(0, 1)
+
+def _log_failure(error: Exception, throttled: bool, attempt: int, max_retries: int) -> None:
+    """Log a failed attempt."""
+    if throttled:
+        logger.warning(f"Throttled (attempt {attempt + 1} of {max_retries})")
+    else:
+        logger.error(f"Error during model invocation (attempt {attempt + 1}): {str(error)}")
+
+def call_with_retry(func: Callable[[], Any], limiter: RateLimiter,
+                    is_throttle: Callable[[Exception], bool],
+                    max_retries: int = 15, min_backoff: float = 5.0,
+                    max_backoff: float = 300.0,
+                    fatal: Tuple[Type[Exception], ...] = (ValueError,),
+                    sleep: Callable[[float], None] = time.sleep) -> Any:
+    """Call a remote endpoint through a limiter, retrying failures.
+
+    Each attempt holds a limiter slot only while the call runs; backoff
+    sleeps happen after the slot is released, so other callers keep the
+    endpoint busy. Only successes widen the concurrency window and only
+    throttles narrow it.
+
+    Args:
+        func: Makes the call
+        limiter: Limiter shared by every caller of the endpoint
+        is_throttle: Whether an exception means the endpoint throttled
+        max_retries: Attempts before giving up
+        min_backoff: Backoff after the first failure, doubling per attempt
+        max_backoff: Longest backoff
+        fatal: Exceptions raised immediately without retrying
+        sleep: Blocks for a number of seconds
+
+    Returns:
+        Any: The return value of ``func``
+
+    Raises:
+        RetriesExhausted: If every attempt was throttled
+        Exception: A fatal exception, or the last error once retries run out
+    """
+    for attempt in range(max_retries):
+        limiter.acquire()
+        throttled = False
+        succeeded = False
+        try:
+            result = func()
+            succeeded = True
+            return result
+        except fatal:
+            raise
+        except Exception as e:
+            throttled = is_throttle(e)
+            _log_failure(e, throttled, attempt, max_retries)
+            if not throttled and attempt == max_retries - 1:
+                raise
+        finally:
+            limiter.release(throttled, adjust=succeeded or throttled)
+        sleep(_backoff(attempt, min_backoff, max_backoff))
+
+    raise RetriesExhausted(f"Max retries ({max_retries}) reached. Try again later.")
+
+async def call_with_retry_async(func: Callable[[], Awaitable[Any]], limiter: RateLimiter,
+                                is_throttle: Callable[[Exception], bool],
+                                max_retries: int = 15, min_backoff: float = 5.0,
+                                max_backoff: float = 300.0,
+                                fatal: Tuple[Type[Exception], ...] = (ValueError,),
+                                sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+                                ) -> Any:
+    """Call a remote endpoint from an asyncio task through a limiter, retrying failures.
+
+    The asyncio counterpart of ``call_with_retry``; it may share one
+    limiter with threads calling the same endpoint.
+
+    Args:
+        func: Returns an awaitable making the call
+        limiter: Limiter shared by every caller of the endpoint
+        is_throttle: Whether an exception means the endpoint throttled
+        max_retries: Attempts before giving up
+        min_backoff: Backoff after the first failure, doubling per attempt
+        max_backoff: Longest backoff
+        fatal: Exceptions raised immediately without retrying
+        sleep: Waits in the event loop for a number of seconds
+
+    Returns:
+        Any: The result of ``func``
+
+    Raises:
+        RetriesExhausted: If every attempt was throttled
+        Exception: A fatal exception, or the last error once retries run out
+    """
+    for attempt in range(max_retries):
+        await limiter.acquire_async()
+        throttled = False
+        succeeded = False
+        try:
+            result = await func()
+            succeeded = True
+            return result
+        except fatal:
+            raise
+        except Exception as e:
+            throttled = is_throttle(e)
+            _log_failure(e, throttled, attempt, max_retries)
+            if not throttled and attempt == max_retries - 1:
+                raise
+        finally:
+            limiter.release(throttled, adjust=succeeded or throttled)
+        await sleep(_backoff(attempt, min_backoff, max_backoff))
+
+    raise RetriesExhausted(f"Max retries ({max_retries}) reached. Try again later.")
@@ -0,0 +1,343 @@
+"""Tests for the shared rate limiter."""
+
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from rate_limiter import (
+    AdaptiveConcurrency,
+    RateLimiter,
+    RetriesExhausted,
+    TokenBucket,
+    call_with_retry,
+    call_with_retry_async,
+)
+
+class ThrottlingException(Exception):
+    """Stands in for Bedrock's ThrottlingException."""
+    pass
+
+class FakeModelClient:
+    """Local endpoint that throttles calls beyond its concurrency quota."""
+
+    def __init__(self, quota: int, latency: float):
+        self.quota = quota
+        self.latency = latency
+        self.in_flight = 0
+        self.peak = 0
+        self.completed = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self.in_flight >= self.quota:
+                self.throttled += 1
+                raise ThrottlingException("Too many requests")
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    def _finish(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def invoke_model(self) -> str:
+        self._start()
+        try:
+            time.sleep(self.latency)
+            return "ok"
+        finally:
+            self._finish()
+
+    async def invoke_model_async(self) -> str:
+        self._start()
+        try:
+            await asyncio.sleep(self.latency)
+            return "ok"
+        finally:
+            self._finish()
+
+class FakeClock:
+    """Clock whose sleeps advance time instantly."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+class TestTokenBucket(unittest.TestCase):
+    """Test cases for TokenBucket."""
+
+    def test_burst_then_rate(self):
+        """Test that a full bucket allows a burst, then paces calls."""
+        clock = FakeClock()
+        bucket = TokenBucket(60, capacity=3, clock=clock, sleep=clock.sleep)
+        for _ in range(3):
+            bucket.acquire()
+        self.assertEqual(clock.now, 0)
+
+        bucket.acquire()
+        bucket.acquire()
+        self.assertAlmostEqual(clock.now, 2.0)
+
+    def test_reservations_queue_up(self):
+        """Test that concurrent reservations wait in turn."""
+        clock = FakeClock()
+        bucket = TokenBucket(30, capacity=1, clock=clock)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 2.0, 4.0])
+
+    def test_default_burst_keeps_quota(self):
+        """Test that no minute-long window exceeds the quota by default."""
+        clock = FakeClock()
+        bucket = TokenBucket(10, clock=clock, sleep=clock.sleep)
+        starts = []
+        for _ in range(30):
+            bucket.acquire()
+            starts.append(clock.now)
+        for start in starts:
+            self.assertLessEqual(sum(start <= t < start + 60 for t in starts), 10)
+
+    def test_refill_is_capped(self):
+        """Test that idle time does not build up more than the capacity."""
+        clock = FakeClock()
+        bucket = TokenBucket(60, capacity=2, clock=clock)
+        clock.now = 100.0
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 1.0])
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+    """Test cases for AdaptiveConcurrency."""
+
+    def test_additive_increase_multiplicative_decrease(self):
+        """Test that the window grows with successes and halves on throttling."""
+        window = AdaptiveConcurrency(initial=1, maximum=4)
+        for _ in range(20):
+            window.acquire()
+            window.release()
+        self.assertEqual(window.limit, 4)
+
+        window.acquire()
+        window.release(throttled=True)
+        self.assertEqual(window.limit, 2)
+        for _ in range(3):
+            window.acquire()
+            window.release(throttled=True)
+        self.assertEqual(window.limit, 1)
+
+    def test_async_slots_in_order(self):
+        """Test that queued asyncio tasks get slots in the order they asked."""
+        window = AdaptiveConcurrency(initial=1, maximum=1)
+        order = []
+
+        async def call(i):
+            await window.acquire_async()
+            order.append(i)
+
+        async def run():
+            await window.acquire_async()
+            tasks = [asyncio.ensure_future(call(i)) for i in range(5)]
+            await asyncio.sleep(0.01)
+            self.assertEqual(order, [])
+            for _ in range(5):
+                window.release()
+                await asyncio.sleep(0)
+                await asyncio.sleep(0)
+            await asyncio.gather(*tasks)
+
+        asyncio.run(run())
+        self.assertEqual(order, [0, 1, 2, 3, 4])
+        self.assertEqual(window.in_flight, 1)
+
+    def test_cancelled_async_waiters(self):
+        """Test that cancelled asyncio tasks leave the queue and return handed-over slots."""
+        window = AdaptiveConcurrency(initial=1, maximum=1)
+
+        async def run():
+            await window.acquire_async()
+            queued = asyncio.ensure_future(window.acquire_async())
+            await asyncio.sleep(0.01)
+            queued.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await queued
+
+            granted = asyncio.ensure_future(window.acquire_async())
+            await asyncio.sleep(0.01)
+            window.release()
+            # The slot is handed over, but the task is cancelled before it runs
+            granted.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await granted
+
+        asyncio.run(run())
+        self.assertEqual(window.in_flight, 0)
+        self.assertTrue(window.try_acquire())
+
+    def test_slots_are_bounded(self):
+        """Test that no more slots than the window are handed out."""
+        window = AdaptiveConcurrency(initial=2)
+        self.assertTrue(window.try_acquire())
+        self.assertTrue(window.try_acquire())
+        self.assertFalse(window.try_acquire())
+        window.release()
+        self.assertTrue(window.try_acquire())
+
+class TestRateLimiter(unittest.TestCase):
+    """Test cases for RateLimiter against a throttling endpoint."""
+
+    max_retries = 50
+
+    def invoke(self, client, limiter):
+        return call_with_retry(client.invoke_model, limiter,
+                               lambda e: isinstance(e, ThrottlingException),
+                               max_retries=self.max_retries, min_backoff=0.0, max_backoff=0.0,
+                               sleep=lambda seconds: None)
+
+    def test_throughput_reaches_quota(self):
+        """Test that concurrency grows to the endpoint's quota from one call at a time."""
+        client = FakeModelClient(quota=4, latency=0.02)
+        limiter = RateLimiter(calls_per_minute=100000, max_concurrency=8)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: self.invoke(client, limiter), range(80)))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(results, ["ok"] * 80)
+        self.assertEqual(client.peak, 4)
+        # Serially, 80 calls would take 1.6s
+        self.assertLess(elapsed, 80 * client.latency * 0.6)
+        stats = limiter.stats()
+        self.assertEqual(stats["throttles"], client.throttled)
+        self.assertEqual(stats["calls"], 80 + client.throttled)
+        self.assertLessEqual(stats["concurrency"], 8)
+
+    def test_rate_is_respected_across_threads(self):
+        """Test that threads sharing a limiter are spaced by the calls per minute."""
+        clock = FakeClock()
+        waits = []
+        limiter = RateLimiter(calls_per_minute=600, max_concurrency=4, initial_concurrency=4,
+                              burst=1, clock=clock, sleep=waits.append)
+
+        def call(_):
+            limiter.acquire()
+            limiter.release()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(call, range(21)))
+        # 600 calls a minute is one every 0.1s; the first is free
+        self.assertEqual(len(waits), 20)
+        for expected, wait in zip(range(1, 21), sorted(waits)):
+            self.assertAlmostEqual(wait, expected / 10)
+
+    def test_asyncio_tasks(self):
+        """Test that asyncio tasks share the concurrency window."""
+        limiter = RateLimiter(calls_per_minute=100000, max_concurrency=2, initial_concurrency=2)
+        running = []
+        peak = []
+
+        async def call():
+            await limiter.acquire_async()
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.pop()
+            limiter.release()
+
+        async def run():
+            await asyncio.gather(*(call() for _ in range(10)))
+
+        asyncio.run(run())
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(limiter.stats()["calls"], 10)
+
+    def test_asyncio_throughput_reaches_quota(self):
+        """Test that asyncio tasks retrying through one limiter finish every call."""
+        client = FakeModelClient(quota=4, latency=0.02)
+        limiter = RateLimiter(calls_per_minute=100000, max_concurrency=8)
+
+        async def run():
+            return await asyncio.gather(*(
+                call_with_retry_async(client.invoke_model_async, limiter,
+                                      lambda e: isinstance(e, ThrottlingException),
+                                      max_retries=self.max_retries, min_backoff=0.0,
+                                      max_backoff=0.0, sleep=lambda seconds: asyncio.sleep(0))
+                for _ in range(80)))
+
+        start = time.perf_counter()
+        results = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(results, ["ok"] * 80)
+        self.assertEqual(client.peak, 4)
+        self.assertLess(elapsed, 80 * client.latency * 0.6)
+        stats = limiter.stats()
+        self.assertEqual(stats["throttles"], client.throttled)
+        self.assertEqual(stats["calls"], 80 + client.throttled)
+        self.assertEqual(limiter.concurrency.in_flight, 0)
+
+    def test_retries_run_out(self):
+        """Test that a permanently throttled endpoint raises RetriesExhausted."""
+        client = FakeModelClient(quota=0, latency=0.0)
+        with self.assertRaises(RetriesExhausted):
+            self.invoke(client, RateLimiter(calls_per_minute=100000))
+        self.assertEqual(client.throttled, self.max_retries)
+
+    def test_errors_do_not_widen_window(self):
+        """Test that only successful calls grow the concurrency window."""
+        limiter = RateLimiter(calls_per_minute=100000)
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 4:
+                raise ConnectionError("Connection reset")
+            return "ok"
+
+        self.assertEqual(call_with_retry(flaky, limiter, lambda e: False,
+                                         min_backoff=0.0, sleep=lambda seconds: None), "ok")
+        with self.assertRaises(ValueError):
+            call_with_retry(lambda: int("x"), limiter, lambda e: False,
+                            sleep=lambda seconds: None)
+        self.assertEqual(limiter.stats()["concurrency"], 2.0)
+        self.assertEqual(limiter.concurrency.in_flight, 0)
+
+    def test_rate_limited_task_holds_no_slot(self):
+        """Test that a task waiting for the rate limit leaves the slots free."""
+        limiter = RateLimiter(calls_per_minute=60, initial_concurrency=1)
+
+        async def run():
+            await limiter.acquire_async()
+            limiter.release()
+            task = asyncio.ensure_future(limiter.acquire_async())
+            await asyncio.sleep(0.05)
+            self.assertEqual(limiter.concurrency.in_flight, 0)
+            self.assertTrue(limiter.concurrency.try_acquire())
+            limiter.concurrency.release(adjust=False)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        self.assertEqual(limiter.concurrency.in_flight, 0)
+
+    def test_fatal_errors_are_not_retried(self):
+        """Test that fatal errors are raised on the first attempt."""
+        calls = []
+
+        def oversized():
+            calls.append(1)
+            raise ValueError("Response exceeds maximum size")
+
+        with self.assertRaises(ValueError):
+            call_with_retry(oversized, RateLimiter(calls_per_minute=60),
+                            lambda e: False, sleep=lambda seconds: None)
+        self.assertEqual(len(calls), 1)
+
+if __name__ == '__main__':
+    unittest.main()
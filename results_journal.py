@@ -0,0 +1,233 @@
+"""Append-only journal of per-document results.
+
+Each result is appended to a JSONL file as soon as it is produced and the
+file is fsync'd every few records, so a crash loses at most the last
+unsynced batch. On startup only the IDs already in the journal are read,
+and reports are written from the journal one record at a time, so neither
+resuming nor reporting holds the documents' texts in memory. The same
+JSONL helpers resume the URL extractor's batch runs.
+"""
+
+import csv
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Set
+
+logger = logging.getLogger(__name__)
+
+# Number of records appended between fsyncs
+DEFAULT_SYNC_EVERY = 10
+
+# Bytes read at a time while looking for the last complete line
+SCAN_CHUNK_SIZE = 64 * 1024
+
+def truncate_partial_line(path: str) -> None:
+    """Drop a trailing line left incomplete by a crash mid-write."""
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            step = min(SCAN_CHUNK_SIZE, position)
+            f.seek(position - step)
+            chunk = f.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                position = position - step + newline + 1
+                break
+            position -= step
+        if position != end:
+            logger.warning(f"Dropping incomplete last line of {path}")
+            f.truncate(position)
+
+def load_completed_ids(output_path: str,
+                       key: Callable[[Dict[str, Any]], Optional[str]],
+                       include_errors: bool = True) -> Set[str]:
+    """Collect the IDs already present in a JSONL results file.
+
+    The file is scanned one line at a time and only the IDs are kept, so
+    resuming never holds the extracted texts in memory.
+
+    Args:
+        output_path: Path to the JSONL results file
+        key: Maps a record to its ID, or None if it has none
+        include_errors: Whether failed results count as completed
+
+    Returns:
+        Set[str]: IDs of the completed requests
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(record, dict):
+                continue
+            if not include_errors and record.get("error") is not None:
+                continue
+            value = key(record)
+            if value is not None:
+                completed.add(value)
+    return completed
+
+class ResultsJournal:
+    """JSONL results file that is appended to, synced in batches and resumable."""
+
+    def __init__(self, path: str, id_field: str = "sample_id",
+                 sync_every: int = DEFAULT_SYNC_EVERY):
+        """Open the journal, creating it if needed.
+
+        Args:
+            path: Path of the JSONL file
+            id_field: Record field identifying each document
+            sync_every: Records appended between fsyncs
+        """
+        self.path = path
+        self.id_field = id_field
+        self.sync_every = sync_every
+        if os.path.exists(path):
+            truncate_partial_line(path)
+        self.completed = load_completed_ids(path, self._record_id)
+        self._unsynced = 0
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _record_id(self, record: Dict[str, Any]) -> Optional[str]:
+        """Identify a record by its ID field."""
+        value = record.get(self.id_field)
+        return None if value is None else str(value)
+
+    def __contains__(self, record_id: str) -> bool:
+        return str(record_id) in self.completed
+
+    def __len__(self) -> int:
+        return len(self.completed)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append a result, syncing to disk once a batch is complete.
+
+        Args:
+            record: JSON-serializable result holding ``id_field``
+        """
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self.completed.add(str(record[self.id_field]))
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every:
+                self._sync()
+
+    def sync(self) -> None:
+        """Write every appended record through to disk."""
+        with self._lock:
+            self._sync()
+
+    def _sync(self) -> None:
+        """Flush and fsync the file. Caller holds the lock."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def import_json(self, path: str) -> int:
+        """Append the records of a JSON array report not yet in the journal.
+
+        Used once to carry results over from a report written before the
+        journal existed.
+
+        Args:
+            path: Path of the JSON report
+
+        Returns:
+            int: Number of records imported
+        """
+        with open(path, encoding="utf-8") as file:
+            records = json.load(file)
+        count = 0
+        for record in records:
+            if isinstance(record, dict) and self.id_field in record and record[self.id_field] not in self:
+                self.append(record)
+                count += 1
+        self.sync()
+        logger.info(f"Imported {count} results from {path} into {self.path}")
+        return count
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Read the journal back, one record at a time.
+
+        Yields:
+            Dict[str, Any]: Each record in the order it was appended
+        """
+        self.sync()
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def export_json(self, path: str, indent: Optional[int] = 4) -> int:
+        """Write the journal as a JSON array, streaming one record at a time.
+
+        The file is written beside its destination and moved into place, so
+        readers never see a partial report.
+
+        Args:
+            path: Path of the JSON report
+            indent: Indentation of the report
+
+        Returns:
+            int: Number of records written
+        """
+        count = 0
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write("[")
+            for record in self.records():
+                file.write("," if count else "")
+                file.write("\n" + json.dumps(record, indent=indent, ensure_ascii=False))
+                count += 1
+            file.write("\n]\n" if count else "]\n")
+        os.replace(temp_path, path)
+        return count
+
+    def export_csv(self, path: str, fields: Sequence[str],
+                   row: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None) -> int:
+        """Write the journal as a CSV report.
+
+        Args:
+            path: Path of the CSV report
+            fields: Column names
+            row: Maps a record to its CSV row; the record's own fields are
+                used if omitted
+
+        Returns:
+            int: Number of rows written
+        """
+        count = 0
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=list(fields), extrasaction="ignore")
+            writer.writeheader()
+            for record in self.records():
+                writer.writerow(row(record) if row is not None else record)
+                count += 1
+        os.replace(temp_path, path)
+        return count
+
+    def close(self) -> None:
+        """Sync and close the journal."""
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+    def __enter__(self) -> "ResultsJournal":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
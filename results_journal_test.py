@@ -0,0 +1,128 @@
+"""Tests for the append-only results journal."""
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from results_journal import ResultsJournal, load_completed_ids
+
+def make_result(sample_id, similarity=50.0):
+    """Build a result record."""
+    return {
+        "sample_id": sample_id,
+        "model_output": f"output of {sample_id}",
+        "ground_truth": f"truth of {sample_id}",
+        "metrics": {"weighted_token_similarity": similarity},
+    }
+
+class TestResultsJournal(unittest.TestCase):
+    """Test cases for ResultsJournal."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "pdfplumber_results.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_resume_skips_completed(self):
+        """Test that a reopened journal knows which samples are done."""
+        with ResultsJournal(self.path) as journal:
+            journal.append(make_result("jefferies8"))
+            journal.append(make_result("jefferies9"))
+            self.assertIn("jefferies8", journal)
+
+        with ResultsJournal(self.path) as journal:
+            self.assertEqual(len(journal), 2)
+            self.assertIn("jefferies9", journal)
+            self.assertNotIn("jefferies10", journal)
+            journal.append(make_result("jefferies10"))
+            self.assertEqual([record["sample_id"] for record in journal.records()],
+                             ["jefferies8", "jefferies9", "jefferies10"])
+
+    def test_partial_line_dropped(self):
+        """Test that a record cut off by a crash is dropped on reopen."""
+        with ResultsJournal(self.path) as journal:
+            journal.append(make_result("jefferies8"))
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write('{"sample_id": "jefferies9", "model_out')
+
+        with ResultsJournal(self.path) as journal:
+            self.assertNotIn("jefferies9", journal)
+            journal.append(make_result("jefferies9"))
+            self.assertEqual([record["sample_id"] for record in journal.records()],
+                             ["jefferies8", "jefferies9"])
+
+    def test_load_completed_ids_uses_key(self):
+        """Test that completed IDs are read with the caller's key function."""
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write(json.dumps({"doc": "a"}) + "\n")
+            file.write(json.dumps({"doc": "b", "error": "timeout"}) + "\n")
+            file.write(json.dumps({"url": "https://example.com"}) + "\n")
+
+        def key(record):
+            return record.get("doc")
+
+        self.assertEqual(load_completed_ids(self.path, key), {"a", "b"})
+        self.assertEqual(load_completed_ids(self.path, key, include_errors=False), {"a"})
+
+    def test_sync_batches(self):
+        """Test that records are fsync'd once per batch."""
+        with ResultsJournal(self.path, sync_every=3) as journal:
+            with patch("results_journal.os.fsync") as fsync:
+                for i in range(7):
+                    journal.append(make_result(f"jefferies{i}"))
+                self.assertEqual(fsync.call_count, 2)
+                journal.sync()
+                self.assertEqual(fsync.call_count, 3)
+
+    def test_export_json(self):
+        """Test that the JSON report is the array of journaled records."""
+        results = [make_result(f"jefferies{i}", i * 10.0) for i in range(3)]
+        report = os.path.join(self.tmp_dir, "report.json")
+        with ResultsJournal(self.path) as journal:
+            self.assertEqual(journal.export_json(report), 0)
+            with open(report, encoding="utf-8") as file:
+                self.assertEqual(json.load(file), [])
+
+            for result in results:
+                journal.append(result)
+            self.assertEqual(journal.export_json(report), 3)
+        with open(report, encoding="utf-8") as file:
+            self.assertEqual(json.load(file), results)
+        self.assertFalse(os.path.exists(f"{report}.tmp"))
+
+    def test_export_csv(self):
+        """Test that CSV rows are mapped from the journaled records."""
+        report = os.path.join(self.tmp_dir, "report.csv")
+        with ResultsJournal(self.path) as journal:
+            journal.append(make_result("jefferies8", 91.5))
+            count = journal.export_csv(report, ["sample_id", "weighted_token_similarity"],
+                                       row=lambda record: {
+                                           "sample_id": record["sample_id"],
+                                           "weighted_token_similarity":
+                                               record["metrics"]["weighted_token_similarity"],
+                                       })
+        self.assertEqual(count, 1)
+        with open(report, newline="", encoding="utf-8") as file:
+            self.assertEqual(list(csv.DictReader(file)),
+                             [{"sample_id": "jefferies8", "weighted_token_similarity": "91.5"}])
+
+    def test_import_json(self):
+        """Test that results from an earlier JSON report are carried over once."""
+        report = os.path.join(self.tmp_dir, "report.json")
+        with open(report, "w", encoding="utf-8") as file:
+            json.dump([make_result("jefferies8"), make_result("jefferies9")], file)
+
+        with ResultsJournal(self.path) as journal:
+            journal.append(make_result("jefferies9"))
+            self.assertEqual(journal.import_json(report), 1)
+            self.assertEqual(journal.import_json(report), 0)
+            self.assertEqual(len(list(journal.records())), 2)
+
+if __name__ == '__main__':
+    unittest.main()
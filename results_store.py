@@ -0,0 +1,204 @@
+"""Indexed store for extraction results.
+
+This module keeps extracted document text in SQLite, keyed by URL, so that
+allocating the next sample name and replacing a document's text are index
+lookups rather than scans of an ever-growing CSV. Writes are buffered and
+committed in batches, and the CSV is exported on demand.
+"""
+
+import csv
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Number of buffered writes committed in one transaction
+DEFAULT_BATCH_SIZE = 100
+
+# Largest text cell accepted when importing a CSV
+MAX_CSV_FIELD_BYTES = 2 ** 31 - 1
+
+# Header of the exported CSV
+CSV_HEADER = ["pdfName", "URL", "Extracted Text"]
+
+class ResultsStore:
+    """SQLite-backed store of extracted text, upserted by URL.
+
+    Each URL is given a stable sample name, ``<prefix><index>``, when it is
+    first stored; later writes for the same URL replace its text but keep
+    its name.
+    """
+
+    def __init__(self, db_path: str, prefix: str = "jefferies",
+                 first_index: int = 2, batch_size: int = DEFAULT_BATCH_SIZE):
+        """Initialize the results store.
+
+        Args:
+            db_path: Path of the SQLite database
+            prefix: Prefix of the generated sample names
+            first_index: Index of the first sample; the default matches the
+                first data row of the exported spreadsheet
+            batch_size: Number of buffered writes committed together
+        """
+        self.db_path = db_path
+        self.prefix = prefix
+        self.first_index = first_index
+        self.batch_size = batch_size
+        self._pending: List[Tuple[str, str, float]] = []
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS results (
+                idx INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                text TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._db.commit()
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        self.flush()
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def name(self, index: int) -> str:
+        """Build the sample name for an index."""
+        return f"{self.prefix}{index}"
+
+    def upsert(self, url: str, text: str) -> None:
+        """Store the text extracted from a URL.
+
+        The write is buffered and committed with the next batch.
+
+        Args:
+            url: The URL the text was extracted from
+            text: The extracted text
+        """
+        with self._lock:
+            self._pending.append((url, text, time.time()))
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit all buffered writes in a single transaction."""
+        with self._lock:
+            if not self._pending:
+                return
+            # The next index comes from the primary key index, so allocating
+            # it does not depend on how many results are stored
+            with self._db:
+                self._db.executemany(
+                    """INSERT INTO results (idx, url, text, updated_at)
+                       VALUES ((SELECT COALESCE(MAX(idx) + 1, ?) FROM results), ?, ?, ?)
+                       ON CONFLICT (url) DO UPDATE
+                       SET text = excluded.text, updated_at = excluded.updated_at""",
+                    [(self.first_index, url, text, updated_at)
+                     for url, text, updated_at in self._pending],
+                )
+            self._pending.clear()
+
+    def get(self, url: str) -> Optional[Dict[str, str]]:
+        """Look up the stored result for a URL.
+
+        Args:
+            url: The URL to look up
+
+        Returns:
+            Optional[Dict[str, str]]: The sample name, URL and text, or None
+            if the URL has not been stored
+        """
+        self.flush()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT idx, text FROM results WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"name": self.name(row[0]), "url": url, "text": row[1]}
+
+    def export_csv(self, csv_path: str) -> int:
+        """Write every stored result to a CSV file, ordered by sample index.
+
+        The file is written next to its destination and moved into place,
+        so readers never see a partial export.
+
+        Args:
+            csv_path: Destination of the CSV file
+
+        Returns:
+            int: Number of rows written
+        """
+        self.flush()
+        tmp_path = f"{csv_path}.tmp"
+        count = 0
+        with self._lock, open(tmp_path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(CSV_HEADER)
+            for idx, url, text in self._db.execute(
+                "SELECT idx, url, text FROM results ORDER BY idx"
+            ):
+                writer.writerow([self.name(idx), url, text])
+                count += 1
+        os.replace(tmp_path, csv_path)
+        return count
+
+    def import_csv(self, csv_path: str) -> int:
+        """Load results from a previously exported CSV file.
+
+        Sample names of the form ``<prefix><index>`` keep their index; rows
+        with any other name, or whose index is already taken, are given the
+        next free index. Rows for URLs that are already stored are skipped.
+
+        Args:
+            csv_path: The CSV file to load
+
+        Returns:
+            int: Number of rows imported
+        """
+        self.flush()
+        # Extracted documents easily exceed the csv module's default field limit
+        csv.field_size_limit(MAX_CSV_FIELD_BYTES)
+        name_pattern = re.compile(rf"^{re.escape(self.prefix)}(\d+)$")
+        count = 0
+        now = time.time()
+        with self._lock, open(csv_path, newline="", encoding="utf-8") as file, self._db:
+            reader = csv.reader(file)
+            next(reader, None)
+            for row in reader:
+                if len(row) < 3:
+                    continue
+                name, url, text = row[:3]
+                match = name_pattern.match(name)
+                index = int(match.group(1)) if match else None
+                if index is not None and self._db.execute(
+                    "SELECT 1 FROM results WHERE idx = ?", (index,)
+                ).fetchone():
+                    index = None
+                cursor = self._db.execute(
+                    """INSERT OR IGNORE INTO results (idx, url, text, updated_at)
+                       VALUES (COALESCE(?, (SELECT COALESCE(MAX(idx) + 1, ?) FROM results)),
+                               ?, ?, ?)""",
+                    (index, self.first_index, url, text, now),
+                )
+                count += cursor.rowcount
+        logger.info(f"Imported {count} results from {csv_path}")
+        return count
+
+    def close(self) -> None:
+        """Commit buffered writes and close the database."""
+        self.flush()
+        with self._lock:
+            self._db.close()
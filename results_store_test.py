@@ -0,0 +1,102 @@
+"""Unit tests for the indexed results store."""
+
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+from results_store import ResultsStore
+
+class TestResultsStore(unittest.TestCase):
+    """Test the results store component."""
+
+    def setUp(self):
+        """Set up test cases."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "results.sqlite")
+        self.csv_path = os.path.join(self.tmp_dir, "results.csv")
+        self.store = ResultsStore(self.db_path, batch_size=2)
+
+    def tearDown(self):
+        """Tear down test cases."""
+        self.store.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def read_csv(self):
+        with open(self.csv_path, newline="", encoding="utf-8") as file:
+            return list(csv.reader(file))
+
+    def test_names_are_allocated_in_order(self):
+        """Test that new URLs get consecutive sample names."""
+        self.store.upsert("https://example.com/a", "alpha")
+        self.store.upsert("https://example.com/b", "beta")
+        self.store.upsert("https://example.com/c", "gamma")
+
+        self.assertEqual(self.store.get("https://example.com/a")["name"], "jefferies2")
+        self.assertEqual(self.store.get("https://example.com/c")["name"], "jefferies4")
+        self.assertEqual(len(self.store), 3)
+
+    def test_upsert_keeps_name(self):
+        """Test that rewriting a URL replaces its text but keeps its name."""
+        self.store.upsert("https://example.com/a", "old")
+        self.store.upsert("https://example.com/b", "beta")
+        self.store.upsert("https://example.com/a", "new")
+
+        result = self.store.get("https://example.com/a")
+        self.assertEqual(result["name"], "jefferies2")
+        self.assertEqual(result["text"], "new")
+        self.assertEqual(len(self.store), 2)
+
+    def test_writes_are_batched(self):
+        """Test that writes are committed once a batch is full."""
+        self.store.upsert("https://example.com/a", "alpha")
+        other = ResultsStore(self.db_path)
+        self.assertEqual(len(other), 0)
+
+        self.store.upsert("https://example.com/b", "beta")
+        self.assertEqual(len(other), 2)
+        other.close()
+
+    def test_results_persist(self):
+        """Test that a reopened store continues numbering."""
+        self.store.upsert("https://example.com/a", "alpha")
+        self.store.close()
+
+        self.store = ResultsStore(self.db_path)
+        self.store.upsert("https://example.com/b", "beta")
+        self.assertEqual(self.store.get("https://example.com/b")["name"], "jefferies3")
+
+    def test_export_csv(self):
+        """Test exporting the results as a CSV file."""
+        self.store.upsert("https://example.com/a", "alpha")
+        self.store.upsert("https://example.com/b", "beta")
+        self.store.upsert("https://example.com/a", "new")
+
+        self.assertEqual(self.store.export_csv(self.csv_path), 2)
+        self.assertEqual(self.read_csv(), [
+            ["pdfName", "URL", "Extracted Text"],
+            ["jefferies2", "https://example.com/a", "new"],
+            ["jefferies3", "https://example.com/b", "beta"],
+        ])
+        self.assertFalse(os.path.exists(self.csv_path + ".tmp"))
+
+    def test_import_csv(self):
+        """Test seeding the store from a legacy CSV file."""
+        with open(self.csv_path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(["pdfName", "URL", "Extracted Text"])
+            writer.writerow(["jefferies2", "https://example.com/a", "alpha"])
+            writer.writerow(["jefferies3", "https://example.com/b", "x" * 200000])
+            writer.writerow(["jefferies3", "https://example.com/c", "gamma"])
+            writer.writerow(["jefferies4", "https://example.com/a", "duplicate"])
+
+        self.assertEqual(self.store.import_csv(self.csv_path), 3)
+        self.assertEqual(self.store.get("https://example.com/a")["text"], "alpha")
+        self.assertEqual(len(self.store.get("https://example.com/b")["text"]), 200000)
+        self.assertEqual(self.store.get("https://example.com/c")["name"], "jefferies4")
+
+        self.store.upsert("https://example.com/d", "delta")
+        self.assertEqual(self.store.get("https://example.com/d")["name"], "jefferies5")
+
+if __name__ == '__main__':
+    unittest.main()
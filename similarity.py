@@ -0,0 +1,198 @@
+"""Token similarity scores between extracted text and ground truth.
+
+The weighted token similarity is the share of ground-truth tokens, by
+weight, that also occur in the output, ignoring case, with numeric tokens
+weighted double. Each side is reduced once to a hashed profile, so scoring
+is linear in the size of the texts rather than quadratic.
+
+For comparing extraction methods over a whole corpus, ``corpus_similarity``
+scores every (method, document) pair at once from sparse count matrices
+over one shared vocabulary.
+"""
+
+import csv
+import functools
+import re
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Tuple
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Weight of numeric and other tokens
+NUMBER_WEIGHT = 2
+WORD_WEIGHT = 1
+
+# Columns of the method comparison table
+COMPARISON_CSV_HEADER = ["method", "sample_id", "cosine_similarity", "weighted_token_similarity"]
+
+class GroundTruthProfile(NamedTuple):
+    """Ground-truth tokens reduced to their total weight per lowercased token."""
+    weights: Dict[str, int]
+    total: int
+
+@functools.lru_cache(maxsize=65536)
+def is_number(token: str) -> bool:
+    """Check if a token is a number."""
+    try:
+        float(token)
+        return True
+    except ValueError:
+        return False
+
+def tokenize(text: str) -> List[str]:
+    """Split text into word tokens."""
+    return TOKEN_PATTERN.findall(text)
+
+def lowercase_tokens(text: str) -> List[str]:
+    """Split text into lowercased word tokens."""
+    return [token.lower() for token in tokenize(text)]
+
+def ground_truth_profile(text: str) -> GroundTruthProfile:
+    """Reduce ground-truth text to weighted token counts.
+
+    Args:
+        text: Ground-truth text
+
+    Returns:
+        GroundTruthProfile: Weight per lowercased token and the total weight
+    """
+    weights: Dict[str, int] = {}
+    total = 0
+    for token, count in Counter(tokenize(text)).items():
+        weight = (NUMBER_WEIGHT if is_number(token) else WORD_WEIGHT) * count
+        key = token.lower()
+        weights[key] = weights.get(key, 0) + weight
+        total += weight
+    return GroundTruthProfile(weights, total)
+
+def output_profile(text: str) -> FrozenSet[str]:
+    """Reduce output text to its set of lowercased tokens."""
+    return frozenset(lowercase_tokens(text))
+
+def profile_similarity(ground_truth: GroundTruthProfile, output: FrozenSet[str]) -> float:
+    """Score reduced profiles.
+
+    Args:
+        ground_truth: Profile of the ground truth
+        output: Profile of the output
+
+    Returns:
+        float: Matched share of ground-truth weight, in percent
+    """
+    if ground_truth.total <= 0:
+        return 0
+    matched = sum(weight for token, weight in ground_truth.weights.items() if token in output)
+    return (matched / ground_truth.total) * 100
+
+def weighted_token_similarity(ground_truth: str, output: str) -> float:
+    """Compute weighted similarity where numeric tokens have extra weight.
+
+    Args:
+        ground_truth: Ground-truth text
+        output: Extracted or generated text
+
+    Returns:
+        float: Matched share of ground-truth weight, in percent
+    """
+    return profile_similarity(ground_truth_profile(ground_truth), output_profile(output))
+
+def score_many(pairs: Iterable[Tuple[str, str]]) -> List[float]:
+    """Score many ``(ground_truth, output)`` pairs.
+
+    Each distinct text is tokenized and lowercased once, however many
+    pairs it appears in.
+
+    Args:
+        pairs: Ground-truth and output texts
+
+    Returns:
+        List[float]: One score per pair, in order
+    """
+    ground_truths: Dict[str, GroundTruthProfile] = {}
+    outputs: Dict[str, FrozenSet[str]] = {}
+    scores = []
+    for ground_truth, output in pairs:
+        gt_profile = ground_truths.get(ground_truth)
+        if gt_profile is None:
+            gt_profile = ground_truths[ground_truth] = ground_truth_profile(ground_truth)
+        out_profile = outputs.get(output)
+        if out_profile is None:
+            out_profile = outputs[output] = output_profile(output)
+        scores.append(profile_similarity(gt_profile, out_profile))
+    return scores
+
+class CorpusScore(NamedTuple):
+    """Scores of one method's output for one document, in percent."""
+    method: str
+    sample_id: str
+    cosine_similarity: float
+    weighted_token_similarity: float
+
+def corpus_similarity(ground_truths: Mapping[str, str],
+                      outputs: Mapping[str, Mapping[str, str]]) -> List[CorpusScore]:
+    """Score every method's output against the ground truth of each document.
+
+    All texts are counted into one sparse matrix over a shared vocabulary of
+    lowercased tokens, and both scores of every pair are computed with
+    row-wise sparse products. The weighted token similarity equals
+    ``weighted_token_similarity`` on the same texts.
+
+    Args:
+        ground_truths: Ground-truth text by sample id
+        outputs: Output text by sample id, by method; samples without a
+            ground truth are skipped
+
+    Returns:
+        List[CorpusScore]: One score per (method, sample) pair, by method
+        and then in output order
+    """
+    import numpy as np
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.preprocessing import normalize
+
+    pairs = [(method, sample_id) for method, texts in outputs.items()
+             for sample_id in texts if sample_id in ground_truths]
+    if not pairs:
+        return []
+
+    sample_ids = list(ground_truths)
+    row_of = {sample_id: row for row, sample_id in enumerate(sample_ids)}
+    vectorizer = CountVectorizer(analyzer=lowercase_tokens)
+    try:
+        counts = vectorizer.fit_transform(
+            [ground_truths[sample_id] for sample_id in sample_ids]
+            + [outputs[method][sample_id] for method, sample_id in pairs]
+        ).tocsr()
+    except ValueError:
+        # No text holds a single token
+        return [CorpusScore(method, sample_id, 0.0, 0.0) for method, sample_id in pairs]
+
+    gt_counts = counts[[row_of[sample_id] for _, sample_id in pairs]]
+    out_counts = counts[len(sample_ids):]
+    weights = np.array([NUMBER_WEIGHT if is_number(token) else WORD_WEIGHT
+                        for token in vectorizer.get_feature_names_out()])
+
+    total = gt_counts @ weights
+    matched = gt_counts.multiply(out_counts > 0) @ weights
+    weighted = np.divide(matched, total, out=np.zeros(len(pairs)), where=total > 0) * 100
+    cosine = np.asarray(
+        normalize(gt_counts).multiply(normalize(out_counts)).sum(axis=1)
+    ).ravel() * 100
+
+    return [CorpusScore(method, sample_id, float(cosine[i]), float(weighted[i]))
+            for i, (method, sample_id) in enumerate(pairs)]
+
+def write_comparison_csv(scores: Iterable[CorpusScore], path: str) -> None:
+    """Write corpus scores as one comparison table.
+
+    Args:
+        scores: Scores from ``corpus_similarity``
+        path: Path of the CSV file
+    """
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(COMPARISON_CSV_HEADER)
+        for score in scores:
+            writer.writerow([score.method, score.sample_id,
+                             round(score.cosine_similarity, 2),
+                             round(score.weighted_token_similarity, 2)])
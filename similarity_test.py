@@ -0,0 +1,153 @@
+"""Unit tests for the token similarity scores."""
+
+import csv
+import os
+import random
+import re
+import tempfile
+import unittest
+
+from similarity import (
+    COMPARISON_CSV_HEADER,
+    CorpusScore,
+    corpus_similarity,
+    ground_truth_profile,
+    is_number,
+    score_many,
+    weighted_token_similarity,
+    write_comparison_csv,
+)
+
+# Tokens on which float() parsing and lowercasing are easy to get wrong
+TRICKY_TOKENS = [
+    "1_000", "1e5", "1E5", "inf", "INF", "Infinity", "nan", "NaN", "0x10",
+    "١٢٣", "½", "²", "ǅ", "İstanbul", "ß", "Jefferies", "JEFFERIES", "_", "7",
+    "7.5", "007", "USD", "usd",
+]
+
+def legacy_weighted_token_similarity(ground_truth, output):
+    """The original quadratic similarity score, the reference for the new one."""
+    def is_float(token):
+        try:
+            float(token)
+            return True
+        except ValueError:
+            return False
+
+    total_weight = 0
+    matched_weight = 0
+    out_tokens = re.findall(r'\w+', output)
+    for token in re.findall(r'\w+', ground_truth):
+        weight = 2 if is_float(token) else 1
+        total_weight += weight
+        if token.lower() in (t.lower() for t in out_tokens):
+            matched_weight += weight
+    return (matched_weight / total_weight) * 100 if total_weight > 0 else 0
+
+def make_filing_text(tokens, seed=0):
+    """Build filing-like text of ``tokens`` words and figures."""
+    rng = random.Random(seed)
+    words = ["notes", "issuer", "coupon", "barrier", "Observation", "Date", "USD",
+             "principal", "Jefferies", "payment", "maturity", "underlying"]
+    return " ".join(
+        f"{rng.randint(1, 99999)}" if rng.random() < 0.3
+        else f"{rng.choice(words)}{rng.randint(0, 500)}" for _ in range(tokens))
+
+class TestWeightedTokenSimilarity(unittest.TestCase):
+    """Test the weighted token similarity score."""
+
+    def assert_same_score(self, ground_truth, output):
+        self.assertEqual(weighted_token_similarity(ground_truth, output),
+                         legacy_weighted_token_similarity(ground_truth, output),
+                         (ground_truth, output))
+
+    def test_matches_legacy_score(self):
+        """Test identical scores on filing-like text."""
+        for seed in range(20):
+            ground_truth = make_filing_text(300, seed)
+            output = make_filing_text(300, seed + 100)
+            self.assert_same_score(ground_truth, output)
+            self.assert_same_score(ground_truth, ground_truth.upper())
+
+    def test_matches_legacy_on_tricky_tokens(self):
+        """Test identical scores on numeric, unicode and mixed-case tokens."""
+        rng = random.Random(0)
+        for _ in range(200):
+            ground_truth = " ".join(rng.choices(TRICKY_TOKENS, k=rng.randint(0, 15)))
+            output = " ".join(rng.choices(TRICKY_TOKENS, k=rng.randint(0, 15)))
+            self.assert_same_score(ground_truth, output)
+
+    def test_edge_cases(self):
+        """Test empty inputs and full matches."""
+        self.assert_same_score("", "anything")
+        self.assert_same_score("...", "")
+        self.assertEqual(weighted_token_similarity("Coupon 7.5%", "coupon 7 5"), 100)
+
+    def test_numbers_weigh_double(self):
+        """Test that numeric tokens carry twice the weight of words."""
+        self.assertAlmostEqual(weighted_token_similarity("coupon 1000", "1000"), 200 / 3)
+        self.assertEqual(ground_truth_profile("Coupon coupon 1000"),
+                         ({"coupon": 2, "1000": 2}, 4))
+        self.assertTrue(is_number("1e5"))
+        self.assertFalse(is_number("USD"))
+
+    def test_score_many(self):
+        """Test that batch scores match pairwise scores, in order."""
+        texts = [make_filing_text(200, seed) for seed in range(5)]
+        pairs = [(gt, out) for gt in texts for out in texts[:3]]
+
+        self.assertEqual(score_many(pairs),
+                         [legacy_weighted_token_similarity(gt, out) for gt, out in pairs])
+        self.assertEqual(score_many([]), [])
+
+class TestCorpusSimilarity(unittest.TestCase):
+    """Test the corpus-wide method comparison."""
+
+    def test_weighted_scores_match_pairwise(self):
+        """Test that matrix scores equal the pairwise score of every pair."""
+        rng = random.Random(1)
+        ground_truths = {f"jefferies{i}": " ".join(rng.choices(TRICKY_TOKENS, k=rng.randint(0, 15)))
+                         for i in range(50)}
+        outputs = {method: {sample_id: " ".join(rng.choices(TRICKY_TOKENS, k=rng.randint(0, 15)))
+                            for sample_id in ground_truths}
+                   for method in ("pdfplumber", "docling")}
+
+        scores = corpus_similarity(ground_truths, outputs)
+        self.assertEqual(len(scores), 100)
+        for score in scores:
+            self.assertEqual(score.weighted_token_similarity, weighted_token_similarity(
+                ground_truths[score.sample_id], outputs[score.method][score.sample_id]))
+
+    def test_cosine_scores(self):
+        """Test cosine scores of identical, disjoint and partial outputs."""
+        scores = corpus_similarity(
+            {"a": "Coupon 7 coupon", "b": "Maturity 2030"},
+            {"exact": {"a": "coupon COUPON 7"}, "other": {"a": "nothing else", "b": "maturity"}},
+        )
+        self.assertEqual([(score.method, score.sample_id) for score in scores],
+                         [("exact", "a"), ("other", "a"), ("other", "b")])
+        self.assertAlmostEqual(scores[0].cosine_similarity, 100)
+        self.assertEqual(scores[1].cosine_similarity, 0)
+        self.assertAlmostEqual(scores[2].cosine_similarity, 100 / 2 ** 0.5)
+        self.assertAlmostEqual(scores[2].weighted_token_similarity, 100 / 3)
+
+    def test_missing_and_empty_texts(self):
+        """Test that samples without ground truth are skipped and empty texts score 0."""
+        self.assertEqual(corpus_similarity({"a": "text"}, {"m": {"b": "text"}}), [])
+        self.assertEqual(corpus_similarity({"a": "..."}, {"m": {"a": ""}}),
+                         [CorpusScore("m", "a", 0.0, 0.0)])
+
+    def test_write_comparison_csv(self):
+        """Test that scores are written as one rounded table."""
+        handle, path = tempfile.mkstemp(suffix=".csv")
+        os.close(handle)
+        try:
+            write_comparison_csv([CorpusScore("docling", "jefferies8", 91.23456, 88.0)], path)
+            with open(path, newline="", encoding="utf-8") as file:
+                rows = list(csv.reader(file))
+        finally:
+            os.unlink(path)
+        self.assertEqual(rows, [COMPARISON_CSV_HEADER, ["docling", "jefferies8", "91.23", "88.0"]])
+
+if __name__ == '__main__':
+    unittest.main()
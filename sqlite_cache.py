@@ -0,0 +1,103 @@
+"""Size-capped SQLite index shared by the persistent caches.
+
+The page and model response caches keep one row per entry in a SQLite
+table with ``key``, ``size`` and ``accessed_at`` columns. This module owns
+the connection, the least-recently-used index, eviction under a byte cap
+and the session counters; each cache only defines its key scheme and the
+rest of its table.
+"""
+
+import logging
+import sqlite3
+import threading
+from typing import Dict, List, Union
+
+logger = logging.getLogger(__name__)
+
+# Default cache size cap for stored entries (256 MiB)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Seconds a connection waits for another process's write to finish
+DEFAULT_TIMEOUT = 60.0
+
+class SQLiteLRUCache:
+    """SQLite table of cache entries with LRU eviction under a size cap.
+
+    Subclasses set ``table`` and ``schema``, the table's column definitions,
+    which must include ``key TEXT PRIMARY KEY``, ``size INTEGER`` and
+    ``accessed_at REAL``.
+    """
+
+    table = ""
+    schema = ""
+
+    def __init__(self, cache_path: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 timeout: float = DEFAULT_TIMEOUT):
+        """Open the cache index, creating its table if needed.
+
+        The database runs in WAL mode so readers never wait for a writer.
+
+        Args:
+            cache_path: Path of the SQLite database
+            max_bytes: Size cap for stored entries; least recently used
+                entries are evicted once it is exceeded
+            timeout: Seconds to wait for another connection's write
+        """
+        self.cache_path = cache_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(cache_path, timeout=timeout, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({self.schema})")
+        self._db.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_lru ON {self.table} (accessed_at)")
+        self._db.commit()
+
+    def _total_bytes(self) -> int:
+        """Size of all stored entries. Called with the lock held."""
+        return self._db.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until under the size cap.
+
+        Called with the lock held, inside the caller's transaction.
+        """
+        excess = self._total_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        victims: List[str] = []
+        for key, size in self._db.execute(f"SELECT key, size FROM {self.table} ORDER BY accessed_at"):
+            victims.append(key)
+            excess -= size
+            if excess <= 0:
+                break
+        self._db.executemany(f"DELETE FROM {self.table} WHERE key = ?", [(key,) for key in victims])
+        self.evictions += len(victims)
+        logger.debug(f"Evicted {len(victims)} entries from {self.cache_path}")
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Return cache counters for this session.
+
+        Returns:
+            Dict[str, Union[int, float]]: Hits, misses, hit rate, evictions,
+            entry count and bytes stored
+        """
+        with self._lock:
+            entries = self._db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            total = self._total_bytes()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total,
+        }
+
+    def close(self) -> None:
+        """Close the cache index."""
+        with self._lock:
+            self._db.close()
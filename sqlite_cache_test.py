@@ -0,0 +1,56 @@
+"""Tests for the shared SQLite LRU cache index."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from sqlite_cache import SQLiteLRUCache
+
+class BlobCache(SQLiteLRUCache):
+    """Minimal cache storing text blobs."""
+
+    table = "blobs"
+    schema = "key TEXT PRIMARY KEY, size INTEGER NOT NULL, accessed_at REAL NOT NULL"
+
+    def put(self, key, size, accessed_at):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?)",
+                             (key, size, accessed_at))
+            self._evict()
+            self._db.commit()
+
+    def keys(self):
+        with self._lock:
+            return sorted(key for key, in self._db.execute("SELECT key FROM blobs"))
+
+class TestSQLiteLRUCache(unittest.TestCase):
+    """Test cases for SQLiteLRUCache."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "blobs.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_least_recently_used_evicted(self):
+        """Test that the oldest entries are evicted until under the cap."""
+        cache = BlobCache(self.path, max_bytes=100)
+        cache.put("a", 40, 1.0)
+        cache.put("b", 40, 3.0)
+        cache.put("c", 40, 2.0)
+        cache.put("d", 50, 4.0)
+        stats = cache.stats()
+        cache.close()
+
+        self.assertEqual(stats["evictions"], 2)
+        self.assertEqual((stats["entries"], stats["bytes"]), (2, 90))
+
+        reopened = BlobCache(self.path)
+        self.assertEqual(reopened.keys(), ["b", "d"])
+        self.assertEqual(reopened.stats()["hit_rate"], 0.0)
+        reopened.close()
+
+if __name__ == '__main__':
+    unittest.main()
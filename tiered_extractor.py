@@ -0,0 +1,271 @@
+"""Tiered PDF text extraction.
+
+Most pages of a filing have a clean text layer that PyMuPDF reads an order of
+magnitude faster than pdfplumber's layout analysis. This module reads every
+page with PyMuPDF first and escalates only the pages whose text looks
+unreliable: fragmented, table-like pages go to pdfplumber, and pages with
+no usable text layer (scans, broken font encodings) go to OCR.
+"""
+
+import io
+import logging
+import threading
+import time
+import unicodedata
+from typing import BinaryIO, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from pdf_extractor import (
+    PDFExtractionError,
+    PDFExtractionResult,
+    PDFSource,
+    PageResult,
+    extract_pages,
+    open_pdf,
+    prepared_source,
+)
+
+logger = logging.getLogger(__name__)
+
+# Extraction tiers, cheapest first
+TIER_PYMUPDF = "pymupdf"
+TIER_PDFPLUMBER = "pdfplumber"
+TIER_OCR = "ocr"
+TIERS = (TIER_PYMUPDF, TIER_PDFPLUMBER, TIER_OCR)
+
+# Pages with fewer characters than this have no usable text layer
+MIN_PAGE_CHARS = 20
+
+# Pages where more than this share of characters is unprintable or U+FFFD
+# come from a broken font encoding
+MAX_GARBLED_RATIO = 0.1
+
+# Pages with at least this many text lines averaging fewer words than
+# FRAGMENTED_LINE_WORDS are laid out as tables, whose cells PyMuPDF emits
+# one per line in content-stream order
+FRAGMENTED_MIN_LINES = 30
+FRAGMENTED_LINE_WORDS = 3.0
+
+# Resolution pages are rendered at for OCR
+OCR_DPI = 300
+
+class PageSignals(NamedTuple):
+    """Quality signals of a page's PyMuPDF text layer."""
+    chars: int
+    garbled_ratio: float
+    lines: int
+    words_per_line: float
+    images: int
+
+def page_signals(page) -> PageSignals:
+    """Measure the quality of a PyMuPDF page's text layer.
+
+    Args:
+        page: A PyMuPDF page
+
+    Returns:
+        PageSignals: Character count, garbled share, line layout and image count
+    """
+    lines = [" ".join(span["text"] for span in line["spans"])
+             for block in page.get_text("dict")["blocks"] if block["type"] == 0
+             for line in block["lines"]]
+    visible = [char for line in lines for char in line if not char.isspace()]
+    garbled = sum(1 for char in visible
+                  if char == "\ufffd" or unicodedata.category(char) in ("Cc", "Co", "Cn"))
+    words = sum(len(line.split()) for line in lines)
+    return PageSignals(
+        chars=len(visible),
+        garbled_ratio=garbled / len(visible) if visible else 0.0,
+        lines=len(lines),
+        words_per_line=words / len(lines) if lines else 0.0,
+        images=len(page.get_image_info()),
+    )
+
+def choose_tier(signals: PageSignals) -> str:
+    """Decide which tier a page's text should come from.
+
+    Args:
+        signals: Quality signals of the page's PyMuPDF text layer
+
+    Returns:
+        str: One of ``TIERS``
+    """
+    if signals.chars < MIN_PAGE_CHARS:
+        # A blank page needs nothing more; an image-only page is a scan
+        return TIER_OCR if signals.images else TIER_PYMUPDF
+    if signals.garbled_ratio > MAX_GARBLED_RATIO:
+        return TIER_OCR
+    if (signals.lines >= FRAGMENTED_MIN_LINES
+            and signals.words_per_line < FRAGMENTED_LINE_WORDS):
+        return TIER_PDFPLUMBER
+    return TIER_PYMUPDF
+
+def tesseract_ocr(image: bytes) -> str:
+    """Recognize the text of a rendered page with Tesseract.
+
+    Args:
+        image: PNG image of the page
+
+    Returns:
+        str: Recognized text
+    """
+    import pytesseract
+    from PIL import Image
+
+    return pytesseract.image_to_string(Image.open(io.BytesIO(image)))
+
+class TieredPDFExtractor:
+    """Extracts PDF text with PyMuPDF, escalating weak pages to slower tiers."""
+
+    def __init__(self, ocr: Optional[Callable[[bytes], str]] = tesseract_ocr,
+                 ocr_dpi: int = OCR_DPI):
+        """Initialize the tiered extractor.
+
+        Args:
+            ocr: Recognizes the text of a PNG page image; pages are kept at
+                their best text-layer tier if omitted
+            ocr_dpi: Resolution pages are rendered at for OCR
+        """
+        self.ocr = ocr
+        self.ocr_dpi = ocr_dpi
+        self.page_counts: Dict[str, int] = {tier: 0 for tier in TIERS}
+        self.seconds: Dict[str, float] = {tier: 0.0 for tier in TIERS}
+        self._lock = threading.Lock()
+
+    def extract(self, source: PDFSource) -> PDFExtractionResult:
+        """Extract the text of every page of a PDF.
+
+        Args:
+            source: Path of the PDF, its raw bytes, or a seekable binary
+                file holding it
+
+        Returns:
+            PDFExtractionResult: Per-page results in page order, each
+            tagged with the tier its text came from
+
+        Raises:
+            PDFExtractionError: If the PDF cannot be opened
+        """
+        return self.extract_with_stats(source)[0]
+
+    def extract_with_stats(self, source: PDFSource
+                           ) -> Tuple[PDFExtractionResult, Dict[str, Dict[str, float]]]:
+        """Extract the text of every page of a PDF and report this PDF's tier totals.
+
+        The totals are also added to the extractor's lifetime ``stats``;
+        returning them lets a caller in another process add them up.
+
+        Args:
+            source: Path of the PDF, its raw bytes, or a seekable binary
+                file holding it
+
+        Returns:
+            Tuple[PDFExtractionResult, Dict[str, Dict[str, float]]]: Per-page
+            results in page order, and pages handled and seconds spent by tier
+
+        Raises:
+            PDFExtractionError: If the PDF cannot be opened
+        """
+        import pymupdf
+
+        start = time.perf_counter()
+        totals = {tier: {"pages": 0, "seconds": 0.0} for tier in TIERS}
+        with prepared_source(source) as source:
+            try:
+                if isinstance(source, str):
+                    document = pymupdf.open(source)
+                else:
+                    source.seek(0)
+                    document = pymupdf.open(stream=source.read(), filetype="pdf")
+            except Exception as e:
+                raise PDFExtractionError(f"Failed to open PDF: {str(e)}")
+
+            with document:
+                pages = self._extract_fast(document, totals)
+                escalated = {tier: [page.page_number for page in pages if page.tier == tier]
+                             for tier in (TIER_PDFPLUMBER, TIER_OCR)}
+                if escalated[TIER_OCR] and self.ocr is not None:
+                    self._replace(pages, self._extract_ocr(document, escalated[TIER_OCR], totals))
+            if escalated[TIER_PDFPLUMBER]:
+                self._replace(pages, self._extract_pdfplumber(source, escalated[TIER_PDFPLUMBER],
+                                                              totals))
+
+        with self._lock:
+            for tier, total in totals.items():
+                self.page_counts[tier] += total["pages"]
+                self.seconds[tier] += total["seconds"]
+        return PDFExtractionResult(pages, time.perf_counter() - start), totals
+
+    def _extract_fast(self, document, totals: Dict[str, Dict[str, float]]) -> List[PageResult]:
+        """Read every page's text layer with PyMuPDF and pick its tier."""
+        pages = []
+        for page in document:
+            page_start = time.perf_counter()
+            text = page.get_text().strip()
+            tier = choose_tier(page_signals(page))
+            if tier == TIER_OCR and self.ocr is None:
+                tier = TIER_PYMUPDF
+            elapsed = time.perf_counter() - page_start
+            self._record(totals, TIER_PYMUPDF, 1, elapsed)
+            pages.append(PageResult(page.number + 1, text, elapsed, tier=tier))
+        return pages
+
+    def _extract_pdfplumber(self, source: Union[str, BinaryIO], page_numbers: List[int],
+                            totals: Dict[str, Dict[str, float]]) -> List[PageResult]:
+        """Re-extract table-like pages with pdfplumber's layout analysis."""
+        if not isinstance(source, str):
+            source.seek(0)
+        start = time.perf_counter()
+        with open_pdf(source, pages=page_numbers) as pdf:
+            pages = extract_pages(pdf.pages)
+        self._record(totals, TIER_PDFPLUMBER, len(pages), time.perf_counter() - start)
+        return [page._replace(tier=TIER_PDFPLUMBER) for page in pages]
+
+    def _extract_ocr(self, document, page_numbers: List[int],
+                     totals: Dict[str, Dict[str, float]]) -> List[PageResult]:
+        """Render pages without a usable text layer and OCR them."""
+        pages = []
+        for number in page_numbers:
+            page_start = time.perf_counter()
+            try:
+                image = document[number - 1].get_pixmap(dpi=self.ocr_dpi).tobytes("png")
+                text, error = self.ocr(image).strip(), None
+            except Exception as e:
+                logger.warning(f"OCR failed for page {number}: {str(e)}")
+                text, error = "", str(e)
+            elapsed = time.perf_counter() - page_start
+            self._record(totals, TIER_OCR, 1, elapsed)
+            pages.append(PageResult(number, text, elapsed, error, tier=TIER_OCR))
+        return pages
+
+    @staticmethod
+    def _replace(pages: List[PageResult], replacements: List[PageResult]) -> None:
+        """Swap escalated pages into the fast-path results.
+
+        A page whose slower tier fails keeps its PyMuPDF text.
+        """
+        for page in replacements:
+            fast = pages[page.page_number - 1]
+            if page.ok:
+                pages[page.page_number - 1] = page._replace(elapsed=fast.elapsed + page.elapsed)
+            else:
+                pages[page.page_number - 1] = fast._replace(tier=TIER_PYMUPDF, error=page.error)
+
+    @staticmethod
+    def _record(totals: Dict[str, Dict[str, float]], tier: str, pages: int,
+                seconds: float) -> None:
+        """Add pages and time to a tier's totals for the current PDF."""
+        totals[tier]["pages"] += pages
+        totals[tier]["seconds"] += seconds
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return per-tier totals for this extractor's lifetime.
+
+        Every page is read by the PyMuPDF tier; the other tiers count only
+        the pages escalated to them.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Pages handled and seconds spent, by tier
+        """
+        with self._lock:
+            return {tier: {"pages": self.page_counts[tier], "seconds": self.seconds[tier]}
+                    for tier in TIERS}
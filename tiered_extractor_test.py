@@ -0,0 +1,127 @@
+"""Tests for the tiered PDF extractor."""
+
+import io
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pdf_extractor_test import make_pdf
+from tiered_extractor import (
+    TIER_OCR,
+    TIER_PDFPLUMBER,
+    TIER_PYMUPDF,
+    PageSignals,
+    TieredPDFExtractor,
+    choose_tier,
+)
+
+PROSE = "The notes are senior unsecured obligations of the issuer"
+TABLE = [f"{70 + i}.00%" for i in range(60)]
+
+class TestChooseTier(unittest.TestCase):
+    """Test cases for the tier escalation rules."""
+
+    def signals(self, **overrides):
+        values = dict(chars=500, garbled_ratio=0.0, lines=20, words_per_line=10.0, images=0)
+        values.update(overrides)
+        return PageSignals(**values)
+
+    def test_clean_text_layer(self):
+        self.assertEqual(choose_tier(self.signals()), TIER_PYMUPDF)
+
+    def test_blank_page(self):
+        self.assertEqual(choose_tier(self.signals(chars=0, lines=0)), TIER_PYMUPDF)
+
+    def test_scanned_page(self):
+        self.assertEqual(choose_tier(self.signals(chars=0, lines=0, images=1)), TIER_OCR)
+
+    def test_garbled_text_layer(self):
+        self.assertEqual(choose_tier(self.signals(garbled_ratio=0.5)), TIER_OCR)
+
+    def test_table_layout(self):
+        self.assertEqual(choose_tier(self.signals(lines=60, words_per_line=1.0)),
+                         TIER_PDFPLUMBER)
+
+class TestTieredPDFExtractor(unittest.TestCase):
+    """Test cases for TieredPDFExtractor class."""
+
+    def setUp(self):
+        self.ocr_calls = []
+
+        def fake_ocr(image):
+            self.ocr_calls.append(image)
+            return "Scanned text"
+
+        self.extractor = TieredPDFExtractor(ocr=fake_ocr, ocr_dpi=20)
+
+    def test_pages_take_the_cheapest_sufficient_tier(self):
+        """Test that only weak pages are escalated."""
+        result = self.extractor.extract(make_pdf([PROSE, TABLE, None, PROSE]))
+
+        self.assertEqual([page.tier for page in result.pages],
+                         [TIER_PYMUPDF, TIER_PDFPLUMBER, TIER_OCR, TIER_PYMUPDF])
+        self.assertEqual(result.pages[0].text, PROSE)
+        self.assertIn("70.00%", result.pages[1].text)
+        self.assertEqual(result.pages[2].text, "Scanned text")
+        self.assertEqual(len(self.ocr_calls), 1)
+        self.assertTrue(self.ocr_calls[0].startswith(b"\x89PNG"))
+
+    def test_stats(self):
+        """Test that per-tier page counts and timings are reported."""
+        self.extractor.extract(make_pdf([PROSE, TABLE, None]))
+        self.extractor.extract(make_pdf([PROSE]))
+
+        stats = self.extractor.stats()
+        self.assertEqual({tier: stats[tier]["pages"] for tier in stats},
+                         {TIER_PYMUPDF: 4, TIER_PDFPLUMBER: 1, TIER_OCR: 1})
+        self.assertTrue(all(stats[tier]["seconds"] >= 0 for tier in stats))
+
+    def test_per_document_stats(self):
+        """Test that each PDF's tier totals are returned and added to the lifetime totals."""
+        _, first = self.extractor.extract_with_stats(make_pdf([PROSE, TABLE, None]))
+        result, second = self.extractor.extract_with_stats(make_pdf([PROSE]))
+
+        self.assertEqual(result.text, PROSE)
+        self.assertEqual({tier: first[tier]["pages"] for tier in first},
+                         {TIER_PYMUPDF: 3, TIER_PDFPLUMBER: 1, TIER_OCR: 1})
+        self.assertEqual({tier: second[tier]["pages"] for tier in second},
+                         {TIER_PYMUPDF: 1, TIER_PDFPLUMBER: 0, TIER_OCR: 0})
+        stats = self.extractor.stats()
+        for tier in stats:
+            self.assertAlmostEqual(stats[tier]["seconds"],
+                                   first[tier]["seconds"] + second[tier]["seconds"])
+
+    def test_concurrent_stats(self):
+        """Test that totals are not lost when threads share the extractor."""
+        pdf = make_pdf([PROSE, PROSE])
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: self.extractor.extract(pdf), range(20)))
+        self.assertEqual(self.extractor.stats()[TIER_PYMUPDF]["pages"], 40)
+
+    def test_without_ocr(self):
+        """Test that scanned pages keep their text layer when OCR is disabled."""
+        result = TieredPDFExtractor(ocr=None).extract(make_pdf([PROSE, None]))
+        self.assertEqual([page.tier for page in result.pages], [TIER_PYMUPDF, TIER_PYMUPDF])
+        self.assertEqual(result.pages[1].text, "")
+
+    def test_failed_ocr_keeps_text_layer(self):
+        """Test that a failing OCR engine is recorded on the page."""
+        def broken_ocr(image):
+            raise RuntimeError("tesseract is not installed")
+
+        result = TieredPDFExtractor(ocr=broken_ocr, ocr_dpi=20).extract(make_pdf([None]))
+        self.assertEqual(result.pages[0].tier, TIER_PYMUPDF)
+        self.assertEqual(result.failed_pages, [1])
+
+    def test_sources(self):
+        """Test that paths, bytes and files are accepted."""
+        pdf = make_pdf([PROSE])
+        self.assertEqual(self.extractor.extract(pdf).text, PROSE)
+        self.assertEqual(self.extractor.extract(io.BytesIO(pdf)).text, PROSE)
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as file:
+            file.write(pdf)
+            file.flush()
+            self.assertEqual(self.extractor.extract(file.name).text, PROSE)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,28 +3,103 @@
 
 This module provides functionality to extract clean text content from web URLs.
 It handles URL validation, content fetching, and text extraction with error handling.
+
+The HTTP, validation and parsing libraries are imported on first use, so
+importing this module (or starting the CLI) stays cheap.
 """
 
+import argparse
+import atexit
+import functools
+import io
+import itertools
+import json
 import logging
+import os
+import re
 import sys
-from typing import Optional, Dict, Any
-import requests
-from bs4 import BeautifulSoup
-import validators
-import trafilatura
-from urllib.parse import urlparse
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional, Dict, Any, BinaryIO, Callable, Iterable, Iterator, List, NamedTuple, Set, TextIO, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from http_cache import CHUNK_SIZE, CachedResponse, ResponseCache, StreamedResponse
+from results_journal import truncate_partial_line
+from results_journal import load_completed_ids as _load_completed_ids
+
 logger = logging.getLogger(__name__)
 
+# Default number of concurrent workers for batch extraction
+DEFAULT_MAX_WORKERS = 8
+
+# Streamed bodies larger than this are spooled from memory to a temp file
+DEFAULT_SPOOL_BYTES = 4 * 1024 * 1024
+
+# Number of leading bytes inspected when sniffing a document's type
+SNIFF_BYTES = 1024
+
+# Number of URLs whose validation and canonical form are memoized
+CANONICAL_CACHE_SIZE = 65536
+
+# URL canonicalization rules
+DEFAULT_PORTS = {"http": 80, "https": 443}
+EDGAR_HOSTS = frozenset({"sec.gov", "www.sec.gov"})
+HTTPS_HOSTS = frozenset({"www.sec.gov", "d18rn0p25nwr6d.cloudfront.net"})
+TRACKING_PARAMS = frozenset({"fbclid", "gclid", "mc_cid", "mc_eid"})
+INDEX_PAGE_PATTERN = re.compile(r"/index\.html?$", re.IGNORECASE)
+EDGAR_CIK_PATTERN = re.compile(r"^(/Archives/edgar/data/)(\d+)(?=/|$)")
+
+# Number of result records written between flushes in JSONL batch mode
+DEFAULT_FLUSH_EVERY = 100
+
+# Documents with at least this many table cells holding this share of the
+# text are extracted without trafilatura
+TABLE_HEAVY_MIN_CELLS = 50
+TABLE_HEAVY_TEXT_RATIO = 0.6
+
 class URLExtractionError(Exception):
     """Base exception class for URL extraction errors."""
     pass
 
+class ExtractionResult(NamedTuple):
+    """Outcome of extracting a single URL in a batch."""
+    url: str
+    text: Optional[str] = None
+    error: Optional[URLExtractionError] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the extraction succeeded."""
+        return self.error is None
+
+class CanonicalURLs(NamedTuple):
+    """Canonical forms of a batch of URLs, aligned with the inputs."""
+    inputs: List[str]
+    canonical: List[Optional[str]]
+    errors: Dict[int, URLExtractionError]
+
+    @property
+    def unique(self) -> List[str]:
+        """Distinct canonical URLs in first-seen order."""
+        return list(dict.fromkeys(url for url in self.canonical if url is not None))
+
+    def groups(self) -> Dict[str, List[int]]:
+        """Map each distinct canonical URL to the indexes of its inputs."""
+        groups: Dict[str, List[int]] = {}
+        for index, url in enumerate(self.canonical):
+            if url is not None:
+                groups.setdefault(url, []).append(index)
+        return groups
+
+@functools.lru_cache(maxsize=CANONICAL_CACHE_SIZE)
+def _validate_cached(url: str) -> bool:
+    """Memoized ``validators.url`` check."""
+    import validators
+    
+    return bool(validators.url(url))
+
 class URLValidator:
     """Validates and normalizes URLs."""
     
@@ -41,28 +116,144 @@ class URLValidator:
         Raises:
             URLExtractionError: If URL is invalid
         """
-        # Basic URL validation
-        if not validators.url(url):
-            raise URLExtractionError(f"Invalid URL format: {url}")
-        
         # Parse and normalize URL
-        parsed = urlparse(url)
-        if not parsed.scheme:
+        if isinstance(url, str) and "://" not in url:
             url = f"https://{url}"
         
+        # Basic URL validation
+        if not isinstance(url, str) or not _validate_cached(url):
+            raise URLExtractionError(f"Invalid URL format: {url}")
+        
         return url
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=CANONICAL_CACHE_SIZE)
+    def canonicalize(url: str) -> str:
+        """Validate a URL and reduce it to a canonical form.
+        
+        Variants of the same document map to one URL: scheme and host are
+        lowercased, default ports, fragments and tracking parameters are
+        dropped, remaining query parameters are sorted, ``index.htm(l)`` and
+        trailing slashes are removed from the path. EDGAR URLs are moved to
+        https://www.sec.gov, lose leading zeros in the CIK path segment, and
+        drop query strings on static Archives documents.
+        
+        Args:
+            url: The URL to canonicalize
+            
+        Returns:
+            str: Canonical URL
+            
+        Raises:
+            URLExtractionError: If URL is invalid
+        """
+        url = URLValidator.validate(url.strip())
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "").rstrip(".")
+        try:
+            port = parts.port
+        except ValueError:
+            raise URLExtractionError(f"Invalid URL format: {url}")
+        
+        if host in EDGAR_HOSTS:
+            host = "www.sec.gov"
+        if host in HTTPS_HOSTS:
+            scheme = "https"
+        # IPv6 literals lose their brackets in parts.hostname
+        netloc = f"[{host}]" if ":" in host else host
+        if port is not None and DEFAULT_PORTS.get(scheme) != port:
+            netloc = f"{netloc}:{port}"
+        if parts.username:
+            userinfo = parts.username
+            if parts.password:
+                userinfo = f"{userinfo}:{parts.password}"
+            netloc = f"{userinfo}@{netloc}"
+        
+        path = parts.path or "/"
+        path = INDEX_PAGE_PATTERN.sub("/", path)
+        if len(path) > 1:
+            path = path.rstrip("/") or "/"
+        
+        query_pairs = [
+            (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+        ]
+        if host == "www.sec.gov":
+            path = EDGAR_CIK_PATTERN.sub(
+                lambda m: f"{m.group(1)}{int(m.group(2))}", path
+            )
+            if path.startswith("/Archives/"):
+                query_pairs = []
+        query = urlencode(sorted(query_pairs))
+        
+        return urlunsplit((scheme, netloc, path, query, ""))
+    
+    @staticmethod
+    def canonicalize_many(urls: Iterable[str]) -> CanonicalURLs:
+        """Canonicalize a batch of URLs, collapsing duplicates.
+        
+        Args:
+            urls: The URLs to canonicalize
+            
+        Returns:
+            CanonicalURLs: Canonical URL (or None) per input, with the error
+            for each invalid input keyed by its index
+        """
+        inputs = list(urls)
+        canonical: List[Optional[str]] = []
+        errors: Dict[int, URLExtractionError] = {}
+        for index, url in enumerate(inputs):
+            try:
+                canonical.append(URLValidator.canonicalize(url))
+            except (URLExtractionError, AttributeError) as e:
+                canonical.append(None)
+                errors[index] = e if isinstance(e, URLExtractionError) \
+                    else URLExtractionError(f"Invalid URL format: {url}")
+        return CanonicalURLs(inputs, canonical, errors)
 
 class ContentFetcher:
     """Handles fetching content from URLs."""
     
-    def __init__(self, timeout: int = 30):
+    def __init__(self, timeout: int = 30, pool_size: int = DEFAULT_MAX_WORKERS,
+                 cache: Optional[ResponseCache] = None, max_age: float = 0,
+                 max_bytes: Optional[int] = None,
+                 spool_bytes: int = DEFAULT_SPOOL_BYTES):
         """Initialize the content fetcher.
         
         Args:
             timeout: Request timeout in seconds
+            pool_size: Number of keep-alive connections kept per host
+            cache: Persistent response cache; responses are revalidated with
+                conditional requests instead of downloaded again
+            max_age: Seconds a cached response is served without revalidation
+            max_bytes: Largest body fetch_stream will download, or None
+                for no limit
+            spool_bytes: Size above which streamed bodies move from memory
+                to a temporary file
         """
         self.timeout = timeout
+        self.cache = cache
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.spool_bytes = spool_bytes
+        import requests
         self.session = requests.Session()
+        self.pool_size = 0
+        self.resize_pool(pool_size)
+    
+    def resize_pool(self, pool_size: int) -> None:
+        """Size the session's connection pool for the given concurrency.
+        
+        Args:
+            pool_size: Number of keep-alive connections kept per host
+        """
+        from requests.adapters import HTTPAdapter
+        
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.pool_size = pool_size
     
     def fetch(self, url: str) -> str:
         """Fetch content from a URL.
@@ -76,15 +267,157 @@ class ContentFetcher:
         Raises:
             URLExtractionError: If content cannot be fetched
         """
+        if self.cache is not None:
+            return self.fetch_response(url).text
+        import requests
         try:
             response = self.session.get(url, timeout=self.timeout)
             response.raise_for_status()
             return response.text
         except requests.exceptions.RequestException as e:
             raise URLExtractionError(f"Failed to fetch content: {str(e)}")
+    
+    def fetch_response(self, url: str) -> CachedResponse:
+        """Fetch the raw body and headers of a URL, using the cache if set.
+        
+        A cached entry younger than ``max_age`` is returned directly; older
+        entries are revalidated with If-None-Match/If-Modified-Since and
+        reused when the server answers 304 Not Modified.
+        
+        Args:
+            url: The URL to fetch content from
+            
+        Returns:
+            CachedResponse: Raw body, encoding and validators
+            
+        Raises:
+            URLExtractionError: If content cannot be fetched
+        """
+        import requests
+        
+        entry = self.cache.get(url) if self.cache is not None else None
+        if entry is not None and time.time() - entry.stored_at < self.max_age:
+            self.cache.record_hit(url)
+            return entry
+        
+        try:
+            response = self.session.get(
+                url,
+                timeout=self.timeout,
+                headers=ResponseCache.conditional_headers(entry),
+            )
+            if entry is not None and response.status_code == 304:
+                self.cache.record_hit(url, revalidated=True)
+                return entry
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise URLExtractionError(f"Failed to fetch content: {str(e)}")
+        
+        fetched = CachedResponse(
+            url=url,
+            content=response.content,
+            encoding=response.encoding,
+            content_type=response.headers.get("Content-Type", ""),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            stored_at=time.time(),
+        )
+        if self.cache is not None:
+            self.cache.put(url, fetched.content, fetched.encoding,
+                           fetched.content_type, fetched.etag,
+                           fetched.last_modified)
+        return fetched
+    
+    def fetch_stream(self, url: str) -> StreamedResponse:
+        """Fetch a URL into a seekable file without buffering it as a string.
+        
+        The body is downloaded with ``stream=True`` in chunks into a spooled
+        temporary file, so memory use stays at ``spool_bytes`` however large
+        the document is. Cache hits are served straight from the cache file.
+        
+        Args:
+            url: The URL to fetch content from
+            
+        Returns:
+            StreamedResponse: The body as an open binary file; close it (or
+            use it as a context manager) when done
+            
+        Raises:
+            URLExtractionError: If content cannot be fetched or exceeds
+                ``max_bytes``
+        """
+        import requests
+        from requests.utils import get_encoding_from_headers
+        
+        entry = self.cache.open(url) if self.cache is not None else None
+        if entry is not None and time.time() - entry.stored_at < self.max_age:
+            self.cache.record_hit(url)
+            return entry
+        
+        try:
+            with self.session.get(
+                url,
+                timeout=self.timeout,
+                headers=ResponseCache.conditional_headers(entry),
+                stream=True,
+            ) as response:
+                if entry is not None and response.status_code == 304:
+                    self.cache.record_hit(url, revalidated=True)
+                    return entry
+                if entry is not None:
+                    entry.close()
+                response.raise_for_status()
+                body = self._spool(url, response)
+        except requests.exceptions.RequestException as e:
+            if entry is not None:
+                entry.close()
+            raise URLExtractionError(f"Failed to fetch content: {str(e)}")
+        
+        streamed = StreamedResponse(
+            url=url,
+            body=body,
+            encoding=get_encoding_from_headers(response.headers),
+            content_type=response.headers.get("Content-Type", ""),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            stored_at=time.time(),
+        )
+        if self.cache is not None:
+            self.cache.put_stream(url, body, streamed.encoding,
+                                  streamed.content_type, streamed.etag,
+                                  streamed.last_modified)
+        return streamed
+    
+    def _spool(self, url: str, response: "requests.Response") -> BinaryIO:
+        """Copy a streamed response body into a spooled temporary file."""
+        declared = response.headers.get("Content-Length")
+        if self.max_bytes is not None and declared and declared.isdigit() \
+                and int(declared) > self.max_bytes:
+            raise URLExtractionError(
+                f"Response for {url} is {declared} bytes, over the "
+                f"{self.max_bytes} byte limit"
+            )
+        
+        body = tempfile.SpooledTemporaryFile(max_size=self.spool_bytes)
+        size = 0
+        for chunk in response.iter_content(CHUNK_SIZE):
+            size += len(chunk)
+            if self.max_bytes is not None and size > self.max_bytes:
+                body.close()
+                raise URLExtractionError(
+                    f"Response for {url} exceeds the {self.max_bytes} byte limit"
+                )
+            body.write(chunk)
+        body.seek(0)
+        return body
 
 class TextExtractor:
-    """Extracts clean text content from HTML."""
+    """Extracts clean text content from HTML.
+    
+    Each document is parsed once with lxml. The resulting tree is shared by
+    the trafilatura attempt and the plain-text fallback, and trafilatura is
+    skipped for table-heavy EDGAR filings where it never finds main content.
+    """
     
     @staticmethod
     def extract(html: str) -> str:
@@ -99,37 +432,385 @@ class TextExtractor:
         Raises:
             URLExtractionError: If text extraction fails
         """
+        import lxml.html
+        
+        try:
+            if not html.strip():
+                return ""
+            try:
+                tree = lxml.html.document_fromstring(html)
+            except ValueError:
+                # Unicode input with an XML encoding declaration
+                tree = lxml.html.document_fromstring(
+                    html.encode("utf-8"), lxml.html.HTMLParser(encoding="utf-8")
+                )
+            return TextExtractor.extract_tree(tree)
+        except Exception as e:
+            raise URLExtractionError(f"Text extraction failed: {str(e)}")
+    
+    @staticmethod
+    def extract_file(body: BinaryIO, encoding: Optional[str] = None) -> str:
+        """Extract clean text from an HTML document stored in a file.
+        
+        The file is parsed incrementally, so the raw document is never held
+        in memory as a string.
+        
+        Args:
+            body: Binary file holding the HTML document
+            encoding: Character encoding from the response headers, if known
+            
+        Returns:
+            str: Extracted text content
+            
+        Raises:
+            URLExtractionError: If text extraction fails
+        """
+        import lxml.html
+        
         try:
-            # Try trafilatura first for better content detection
-            text = trafilatura.extract(html)
-            
-            # Fall back to BeautifulSoup if trafilatura fails
-            if text is None:
-                soup = BeautifulSoup(html, 'html.parser')
-                # Remove script and style elements
-                for script in soup(["script", "style"]):
-                    script.decompose()
-                text = soup.get_text(separator='\n')
-                # Clean up whitespace
-                lines = (line.strip() for line in text.splitlines())
-                text = '\n'.join(line for line in lines if line)
-            
-            return text
+            parser = lxml.html.HTMLParser(encoding=encoding) if encoding else None
+            tree = lxml.html.parse(body, parser).getroot()
+            if tree is None:
+                return ""
+            return TextExtractor.extract_tree(tree)
         except Exception as e:
             raise URLExtractionError(f"Text extraction failed: {str(e)}")
+    
+    @staticmethod
+    def extract_tree(tree: "lxml.html.HtmlElement") -> str:
+        """Extract clean text from a parsed HTML tree.
+        
+        Args:
+            tree: Root element of the parsed document; the fallback path
+                removes script and style elements from it in place
+            
+        Returns:
+            str: Extracted text content
+        """
+        import trafilatura
+        
+        text = None
+        # Try trafilatura first for better content detection
+        if not TextExtractor.is_table_heavy(tree):
+            text = trafilatura.extract(tree)
+        
+        # Fall back to the plain text of the same tree
+        if text is None:
+            for element in list(tree.iter("script", "style")):
+                element.drop_tree()
+            text = '\n'.join(tree.itertext())
+            # Clean up whitespace
+            lines = (line.strip() for line in text.splitlines())
+            text = '\n'.join(line for line in lines if line)
+        
+        return text
+    
+    @staticmethod
+    def is_table_heavy(tree: "lxml.html.HtmlElement") -> bool:
+        """Check whether most of a document's text lives in tables.
+        
+        EDGAR filings such as 424B2 pricing supplements lay out nearly all of
+        their content as tables, which trafilatura discards as boilerplate.
+        
+        Args:
+            tree: Root element of the parsed document
+            
+        Returns:
+            bool: True if trafilatura should be skipped
+        """
+        cells = 0
+        for _ in tree.iter("td", "th"):
+            cells += 1
+            if cells >= TABLE_HEAVY_MIN_CELLS:
+                break
+        else:
+            return False
+        
+        table_chars = sum(
+            len(table.text_content())
+            for table in tree.xpath("//table[not(ancestor::table)]")
+        )
+        total_chars = len(tree.text_content())
+        return total_chars > 0 and table_chars / total_chars >= TABLE_HEAVY_TEXT_RATIO
+
+class XMLTextExtractor:
+    """Extracts text content from XML documents."""
+    
+    @staticmethod
+    def extract_file(body: BinaryIO, encoding: Optional[str] = None) -> str:
+        """Extract the text nodes of an XML document stored in a file.
+        
+        Elements are parsed incrementally and cleared once read, so memory
+        use does not grow with the size of the document.
+        
+        Args:
+            body: Binary file holding the XML document
+            encoding: Character encoding from the response headers, if known
+            
+        Returns:
+            str: Text of all elements, space separated
+            
+        Raises:
+            URLExtractionError: If the document cannot be parsed
+        """
+        from lxml import etree
+        
+        try:
+            # Reserve each element's slot at its start so text stays in
+            # document order, and fill it in once the element is complete
+            texts: List[Optional[str]] = []
+            slots = []
+            for event, element in etree.iterparse(body, events=("start", "end"),
+                                                  encoding=encoding, recover=True,
+                                                  huge_tree=True):
+                if event == "start":
+                    slots.append(len(texts))
+                    texts.append(None)
+                    continue
+                if element.text and element.text.strip():
+                    texts[slots[-1]] = element.text.strip()
+                slots.pop()
+                element.clear(keep_tail=True)
+            return ' '.join(text for text in texts if text)
+        except Exception as e:
+            raise URLExtractionError(f"XML extraction failed: {str(e)}")
+
+class PDFTextExtractor:
+    """Extracts text content from PDF documents.
+    
+    Long documents are split into page ranges that are extracted in
+    parallel by :class:`pdf_extractor.PDFExtractor`. Every document shares
+    one process pool, so concurrent downloads in ``extract_many`` never run
+    more extraction processes than there are cores. The pool is shut down by
+    :meth:`close`, which also runs at interpreter exit.
+    """
+    
+    _extractor = None
+    _close_registered = False
+    _lock = threading.Lock()
+    
+    @classmethod
+    def pdf_extractor(cls):
+        """Return the shared page-parallel extractor, creating it on first use.
+        
+        Returns:
+            PDFExtractor: Extractor backed by one process pool per process
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from pdf_extractor import PDFExtractor
+        
+        with cls._lock:
+            if cls._extractor is None:
+                max_workers = os.cpu_count() or 1
+                # Worker processes start on the first parallel document
+                cls._extractor = PDFExtractor(
+                    max_workers=max_workers,
+                    executor=ProcessPoolExecutor(max_workers=max_workers))
+                if not cls._close_registered:
+                    atexit.register(cls.close)
+                    cls._close_registered = True
+            return cls._extractor
+    
+    @classmethod
+    def close(cls) -> None:
+        """Shut down the shared process pool.
+        
+        A later PDF starts a new pool.
+        """
+        with cls._lock:
+            extractor, cls._extractor = cls._extractor, None
+        if extractor is not None:
+            extractor.executor.shutdown(wait=True)
+    
+    @classmethod
+    def extract_file(cls, body: BinaryIO, encoding: Optional[str] = None) -> str:
+        """Extract the text layer of a PDF stored in a file.
+        
+        Args:
+            body: Seekable binary file holding the PDF
+            encoding: Unused; accepted for a uniform extractor signature
+            
+        Returns:
+            str: Text of all pages, one page per block
+            
+        Raises:
+            URLExtractionError: If the PDF cannot be read
+        """
+        from pdf_extractor import PDFExtractionError
+        
+        try:
+            return cls.pdf_extractor().extract(body).text
+        except PDFExtractionError as e:
+            raise URLExtractionError(f"PDF extraction failed: {str(e)}")
+
+class BufferReader(io.RawIOBase):
+    """Seekable, read-only binary file over a bytes-like buffer.
+    
+    Reads copy only the bytes asked for, so a ``bytearray`` or
+    ``memoryview`` body is never copied whole, as ``io.BytesIO`` would.
+    """
+    
+    def __init__(self, buffer: Union[bytearray, memoryview]):
+        """Initialize the reader.
+        
+        Args:
+            buffer: C-contiguous buffer holding the document
+        """
+        self._view = memoryview(buffer).cast("B")
+        self._position = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def readinto(self, b) -> int:
+        count = max(0, min(len(b), len(self._view) - self._position))
+        b[:count] = self._view[self._position:self._position + count]
+        self._position += count
+        return count
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self._position = offset
+        return offset
+    
+    def tell(self) -> int:
+        return self._position
+
+class ContentDispatcher:
+    """Routes raw document bytes to a format-specific extractor.
+    
+    The format is sniffed from the document's leading bytes rather than
+    trusted from the Content-Type header, and the body is handed over as a
+    binary file so binary formats are never decoded to ``str``. Extractors
+    are callables taking ``(body, encoding)`` and can be replaced per
+    format with :meth:`register`.
+    
+    Extractors always receive a readable, seekable binary file positioned at
+    the start of the document: the caller's file as is, an ``io.BytesIO``
+    sharing a ``bytes`` body, or a :class:`BufferReader` over a
+    ``bytearray`` or ``memoryview``. No body is copied before extraction.
+    """
+    
+    def __init__(self):
+        """Initialize the dispatcher with the built-in extractors."""
+        self.extractors: Dict[str, Callable[[BinaryIO, Optional[str]], str]] = {
+            "html": TextExtractor.extract_file,
+            "xml": XMLTextExtractor.extract_file,
+            "pdf": PDFTextExtractor.extract_file,
+            "text": ContentDispatcher.extract_plain_text,
+        }
+    
+    def register(self, kind: str,
+                 extractor: Callable[[BinaryIO, Optional[str]], str]) -> None:
+        """Register the extractor used for a document format.
+        
+        Args:
+            kind: Format name as returned by :meth:`sniff`
+            extractor: Callable taking ``(body, encoding)`` and returning text
+        """
+        self.extractors[kind] = extractor
+    
+    @staticmethod
+    def sniff(head: bytes, content_type: str = "") -> str:
+        """Detect a document's format from its leading bytes.
+        
+        Args:
+            head: The first bytes of the document
+            content_type: Content-Type header, used only when the bytes
+                are inconclusive
+            
+        Returns:
+            str: One of ``pdf``, ``xml``, ``html`` or ``text``
+        """
+        if b"%PDF-" in head:
+            return "pdf"
+        start = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+        if start.startswith(b"<?xml"):
+            return "html" if b"<html" in start or b"<!doctype html" in start else "xml"
+        if start.startswith((b"<!doctype html", b"<html", b"<head", b"<body")) \
+                or b"<html" in start:
+            return "html"
+        declared = content_type.lower()
+        for kind in ("pdf", "html", "xml"):
+            if kind in declared:
+                return kind
+        return "html" if start.startswith(b"<") else "text"
+    
+    @staticmethod
+    def extract_plain_text(body: BinaryIO, encoding: Optional[str] = None) -> str:
+        """Decode a plain-text document.
+        
+        Args:
+            body: Binary file holding the document
+            encoding: Character encoding from the response headers, if known
+            
+        Returns:
+            str: The decoded text
+        """
+        return body.read().decode(encoding or "utf-8", errors="replace")
+    
+    def extract(self, data: Union[bytes, bytearray, memoryview, BinaryIO],
+                content_type: str = "", encoding: Optional[str] = None) -> str:
+        """Extract text from a document of any supported format.
+        
+        Args:
+            data: Raw document as bytes, a bytearray or memoryview, or a
+                seekable binary file
+            content_type: Content-Type header, used when sniffing is inconclusive
+            encoding: Character encoding from the response headers, if known
+            
+        Returns:
+            str: Extracted text content
+            
+        Raises:
+            URLExtractionError: If extraction fails
+        """
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            head = bytes(memoryview(data)[:SNIFF_BYTES])
+            # BytesIO shares an immutable bytes object but copies any other buffer
+            body = io.BytesIO(data) if isinstance(data, bytes) else BufferReader(data)
+        else:
+            body = data
+            head = body.read(SNIFF_BYTES)
+            body.seek(0)
+        kind = self.sniff(head, content_type)
+        logger.debug(f"Dispatching {kind} document to {self.extractors[kind]}")
+        return self.extractors[kind](body, encoding)
 
 class URLTextExtractor:
     """Main class for URL text extraction."""
     
-    def __init__(self, timeout: int = 30):
+    def __init__(self, timeout: int = 30, max_workers: int = DEFAULT_MAX_WORKERS,
+                 cache: Optional[ResponseCache] = None, stream: bool = False,
+                 max_bytes: Optional[int] = None,
+                 dispatcher: Optional[ContentDispatcher] = None):
         """Initialize the URL text extractor.
         
         Args:
             timeout: Request timeout in seconds
+            max_workers: Default number of concurrent workers for extract_many
+            cache: Persistent response cache shared by all fetches
+            stream: Download bodies into spooled temp files and parse them
+                from there instead of buffering each document in memory
+            max_bytes: Largest document accepted in streaming mode
+            dispatcher: Routes each document to the HTML, XML, PDF or text
+                extractor; a default dispatcher is created if omitted
         """
+        self.max_workers = max_workers
+        self.stream = stream
         self.validator = URLValidator()
-        self.fetcher = ContentFetcher(timeout=timeout)
+        self.fetcher = ContentFetcher(timeout=timeout, pool_size=max_workers,
+                                      cache=cache, max_bytes=max_bytes)
         self.extractor = TextExtractor()
+        self.dispatcher = dispatcher or ContentDispatcher()
     
     def extract_text(self, url: str) -> str:
         """Extract text content from a URL.
@@ -147,29 +828,330 @@ class URLTextExtractor:
             # Validate URL
             validated_url = self.validator.validate(url)
             
-            # Fetch content
-            html_content = self.fetcher.fetch(validated_url)
+            if self.stream:
+                with self.fetcher.fetch_stream(validated_url) as response:
+                    return self.dispatcher.extract(response.body, response.content_type,
+                                                   response.encoding)
+            
+            # Fetch content as raw bytes
+            response = self.fetcher.fetch_response(validated_url)
             
-            # Extract text
-            text_content = self.extractor.extract(html_content)
+            # Extract text with the extractor matching the document format
+            text_content = self.dispatcher.extract(response.content,
+                                                   response.content_type,
+                                                   response.encoding)
             
             return text_content
         
         except URLExtractionError as e:
             logger.error(f"Extraction failed for URL {url}: {str(e)}")
             raise
+    
+    def _extract_result(self, url: str) -> ExtractionResult:
+        """Extract a single URL, capturing failures in the result."""
+        try:
+            return ExtractionResult(url, text=self.extract_text(url))
+        except URLExtractionError as e:
+            return ExtractionResult(url, error=e)
+        except Exception as e:
+            logger.error(f"Unexpected failure for URL {url}: {str(e)}")
+            return ExtractionResult(url, error=URLExtractionError(str(e)))
+    
+    def extract_many(self, urls: Iterable[str],
+                     max_workers: Optional[int] = None,
+                     ordered: bool = True,
+                     deduplicate: bool = False) -> Iterator[ExtractionResult]:
+        """Extract text from many URLs concurrently.
+        
+        Validation, fetching and extraction for each URL run on a bounded
+        thread pool that shares one pooled HTTP session. At most twice
+        ``max_workers`` URLs are in flight at once, so ``urls`` may be a lazy
+        iterable of any length.
+        
+        Args:
+            urls: The URLs to extract text from
+            max_workers: Number of concurrent workers (defaults to the
+                value given at construction)
+            ordered: Yield results in input order if True, otherwise in
+                completion order
+            deduplicate: Canonicalize the whole batch first and fetch each
+                distinct document once; ``urls`` is read eagerly
+            
+        Yields:
+            ExtractionResult: One result per input URL; failures carry the
+            error instead of aborting the batch
+        """
+        if deduplicate:
+            yield from self._extract_deduplicated(urls, max_workers, ordered)
+            return
+        
+        workers = max_workers or self.max_workers
+        if workers > self.fetcher.pool_size:
+            self.fetcher.resize_pool(workers)
+        window = workers * 2
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for url in urls:
+                pending.append(executor.submit(self._extract_result, url))
+                if len(pending) < window:
+                    continue
+                if ordered:
+                    yield pending.popleft().result()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+                        yield future.result()
+            
+            if ordered:
+                while pending:
+                    yield pending.popleft().result()
+            else:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+                        yield future.result()
+
+    def _extract_deduplicated(self, urls: Iterable[str], max_workers: Optional[int],
+                              ordered: bool) -> Iterator[ExtractionResult]:
+        """Extract each distinct canonical URL once and fan results out."""
+        batch = self.validator.canonicalize_many(urls)
+        groups = batch.groups()
+        if len(groups) < len(batch.inputs) - len(batch.errors):
+            logger.info(f"Collapsed {len(batch.inputs) - len(batch.errors)} URLs "
+                        f"to {len(groups)} distinct documents")
+        
+        if not ordered:
+            for index, error in batch.errors.items():
+                yield ExtractionResult(batch.inputs[index], error=error)
+            for result in self.extract_many(list(groups), max_workers, ordered=False):
+                for index in groups[result.url]:
+                    yield result._replace(url=batch.inputs[index])
+            return
+        
+        unique_results = self.extract_many(list(groups), max_workers, ordered=True)
+        results: Dict[str, ExtractionResult] = {}
+        remaining = {url: len(indexes) for url, indexes in groups.items()}
+        for index, original in enumerate(batch.inputs):
+            canonical = batch.canonical[index]
+            if canonical is None:
+                yield ExtractionResult(original, error=batch.errors[index])
+                continue
+            while canonical not in results:
+                result = next(unique_results)
+                results[result.url] = result
+            result = results[canonical]
+            remaining[canonical] -= 1
+            if not remaining[canonical]:
+                del results[canonical]
+            yield result._replace(url=original)
+
+def _parse_request(line: str) -> Dict[str, Any]:
+    """Parse one serve-mode input line into a request record.
+    
+    Args:
+        line: A bare URL or a JSON object with a ``url`` field
+        
+    Returns:
+        Dict[str, Any]: The request record
+        
+    Raises:
+        URLExtractionError: If the line is not valid JSON or not an object
+    """
+    if not line.startswith("{"):
+        return {"url": line}
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise URLExtractionError(f"Invalid JSON request: {str(e)}")
+    if not isinstance(record, dict):
+        raise URLExtractionError("JSON request must be an object")
+    return record
+
+def serve(extractor: URLTextExtractor, input_stream: TextIO,
+          output_stream: TextIO) -> int:
+    """Extract URLs read from a stream, writing one JSON result per line.
+    
+    Each input line is a URL or a JSON object with a ``url`` field; any other
+    fields of a JSON request are echoed back in its result. Results are
+    flushed as soon as they are written, so a client can feed URLs to one
+    warm process interactively.
+    
+    Args:
+        extractor: The extractor to run requests through
+        input_stream: Stream of request lines
+        output_stream: Stream receiving JSON result lines
+        
+    Returns:
+        int: Number of requests that failed
+    """
+    failures = 0
+    for line in input_stream:
+        line = line.strip()
+        if not line:
+            continue
+        record = {"input": line}
+        try:
+            record = _parse_request(line)
+            if not isinstance(record.get("url"), str):
+                raise URLExtractionError("Request has no 'url' string")
+            result = dict(record, text=extractor.extract_text(record["url"]), error=None)
+        except URLExtractionError as e:
+            failures += 1
+            result = dict(record, text=None, error=str(e))
+        output_stream.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output_stream.flush()
+    return failures
+
+def _record_id(record: Dict[str, Any], id_field: str) -> Optional[str]:
+    """Identify a request record by its ID field, falling back to its URL."""
+    value = record.get(id_field, record.get("url"))
+    return None if value is None else str(value)
+
+def load_completed_ids(output_path: str, id_field: str = "id",
+                       include_errors: bool = True) -> Set[str]:
+    """Collect the request IDs already present in a JSONL results file.
+    
+    Args:
+        output_path: Path to the JSONL results file
+        id_field: Record field holding the request ID; the URL is used
+            when it is missing
+        include_errors: Whether failed results count as completed
+        
+    Returns:
+        Set[str]: IDs of the completed requests
+    """
+    return _load_completed_ids(output_path,
+                               functools.partial(_record_id, id_field=id_field),
+                               include_errors)
+
+def run_batch(extractor: URLTextExtractor, input_path: str, output_path: str,
+              id_field: str = "id", flush_every: int = DEFAULT_FLUSH_EVERY,
+              retry_errors: bool = False,
+              max_workers: Optional[int] = None) -> Dict[str, int]:
+    """Extract every request in a JSONL file, appending results to another.
+    
+    Input lines are URLs or JSON objects with a ``url`` field, in the same
+    one-record-per-line layout as ``requests.jsonl``. Inputs are read as a
+    stream and results are appended in input order, flushed to disk every
+    ``flush_every`` records. Requests whose ID already appears in the output
+    are skipped, so an interrupted run resumes where it stopped.
+    
+    Args:
+        extractor: The extractor to run requests through
+        input_path: Path to the JSONL request file
+        output_path: Path to the JSONL results file (appended to)
+        id_field: Record field holding the request ID; the URL is used
+            when it is missing
+        flush_every: Number of records written between flushes
+        retry_errors: Re-run requests whose previous result was an error
+        max_workers: Number of concurrent workers
+        
+    Returns:
+        Dict[str, int]: Counts of processed, skipped and failed requests
+    """
+    completed = load_completed_ids(output_path, id_field,
+                                   include_errors=not retry_errors)
+    if os.path.exists(output_path):
+        truncate_partial_line(output_path)
+    counts = {"processed": 0, "skipped": 0, "failed": 0}
+    
+    def pending_records() -> Iterator[Dict[str, Any]]:
+        with open(input_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = _parse_request(line)
+                except URLExtractionError as e:
+                    record = {"input": line, "parse_error": str(e)}
+                if _record_id(record, id_field) in completed:
+                    counts["skipped"] += 1
+                    continue
+                yield record
+    
+    records, url_records = itertools.tee(pending_records())
+    urls = (record.get("url") if isinstance(record.get("url"), str) else ""
+            for record in url_records)
+    
+    with open(output_path, "a", encoding="utf-8") as output:
+        for record, result in zip(records, extractor.extract_many(urls, max_workers)):
+            error = record.pop("parse_error", None) or \
+                (None if result.ok else str(result.error))
+            output.write(json.dumps(
+                dict(record, text=result.text if error is None else None, error=error),
+                ensure_ascii=False,
+            ) + "\n")
+            counts["processed"] += 1
+            if error is not None:
+                counts["failed"] += 1
+            if counts["processed"] % flush_every == 0:
+                output.flush()
+                os.fsync(output.fileno())
+                logger.info(f"Wrote {counts['processed']} results to {output_path}")
+        output.flush()
+        os.fsync(output.fileno())
+    
+    return counts
 
 def main():
     """Command line interface for URL text extraction."""
-    if len(sys.argv) != 2:
-        print("Usage: python url_extractor.py <url>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="Extract clean text content from web URLs."
+    )
+    parser.add_argument("url", nargs="?", help="URL to extract text from")
+    parser.add_argument(
+        "--serve", "--stdin", dest="serve", action="store_true",
+        help="keep one process running, reading URLs or JSON lines from stdin "
+             "and writing JSON results to stdout",
+    )
+    parser.add_argument("--input", help="JSONL file of URLs or {\"id\", \"url\"} requests")
+    parser.add_argument("--output", help="JSONL file results are appended to; "
+                                         "IDs already present are skipped")
+    parser.add_argument("--id-field", default="id",
+                        help="request field identifying each record (default: id)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS,
+                        help="number of concurrent workers in batch mode")
+    parser.add_argument("--flush-every", type=int, default=DEFAULT_FLUSH_EVERY,
+                        help="results written between flushes in batch mode")
+    parser.add_argument("--retry-errors", action="store_true",
+                        help="re-run requests whose previous result was an error")
+    parser.add_argument("--timeout", type=int, default=30,
+                        help="request timeout in seconds")
+    parser.add_argument("--cache-dir",
+                        help="directory for the persistent response cache")
+    args = parser.parse_args()
+    if sum((bool(args.url), args.serve, bool(args.input))) != 1:
+        parser.error("pass exactly one of a URL, --serve or --input")
+    if bool(args.input) != bool(args.output):
+        parser.error("--input and --output must be used together")
+    
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    cache = ResponseCache(args.cache_dir) if args.cache_dir else None
+    extractor = URLTextExtractor(timeout=args.timeout, max_workers=args.workers,
+                                 cache=cache)
+    
+    if args.serve:
+        serve(extractor, sys.stdin, sys.stdout)
+        return
     
-    url = sys.argv[1]
-    extractor = URLTextExtractor()
+    if args.input:
+        counts = run_batch(extractor, args.input, args.output,
+                           id_field=args.id_field, flush_every=args.flush_every,
+                           retry_errors=args.retry_errors)
+        logger.info(f"Batch complete: {counts}")
+        return
     
     try:
-        text = extractor.extract_text(url)
+        text = extractor.extract_text(args.url)
         print(text)
     except URLExtractionError as e:
         print(f"Error: {str(e)}", file=sys.stderr)
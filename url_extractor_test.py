@@ -1,14 +1,35 @@
 """Unit tests for URL text extraction functionality."""
 
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock, patch
+import lxml.html
 import requests
+from requests.structures import CaseInsensitiveDict
+from http_cache import CachedResponse
 from url_extractor import (
+    BufferReader,
     URLValidator,
     ContentFetcher,
     TextExtractor,
     URLTextExtractor,
-    URLExtractionError
+    URLExtractionError,
+    ExtractionResult,
+    ContentDispatcher,
+    XMLTextExtractor,
+    PDFTextExtractor,
+    load_completed_ids,
+    run_batch,
+    serve
 )
 
 class TestURLValidator(unittest.TestCase):
@@ -36,6 +57,46 @@ class TestURLValidator(unittest.TestCase):
         with self.assertRaises(URLExtractionError):
             self.validator.validate(url)
 
+class TestCanonicalization(unittest.TestCase):
+    """Test URL canonicalization and batch de-duplication."""
+
+    def test_generic_normalization(self):
+        """Test host case, default ports, fragments and query noise."""
+        url = "HTTP://Example.COM:80/a/b/?utm_source=x&b=2&a=1#section"
+        self.assertEqual(URLValidator.canonicalize(url), "http://example.com/a/b?a=1&b=2")
+        self.assertEqual(URLValidator.canonicalize("example.com:8443/x/index.html"),
+                         "https://example.com:8443/x")
+
+    def test_ipv6_host(self):
+        """Test that IPv6 literals keep their brackets."""
+        self.assertEqual(URLValidator.canonicalize("HTTPS://[::1]:8080/a/"), "https://[::1]:8080/a")
+        self.assertEqual(URLValidator.canonicalize("http://[2001:DB8::1]:80/"), "http://[2001:db8::1]/")
+
+    def test_edgar_rules(self):
+        """Test that EDGAR variants collapse to one URL."""
+        variants = [
+            "http://sec.gov/Archives/edgar/data/0000096223/000114036125006462/index.htm",
+            "https://www.sec.gov/Archives/edgar/data/96223/000114036125006462/",
+            "https://WWW.SEC.GOV/Archives/edgar/data/96223/000114036125006462?x=1",
+        ]
+        canonical = {URLValidator.canonicalize(url) for url in variants}
+        self.assertEqual(canonical, {
+            "https://www.sec.gov/Archives/edgar/data/96223/000114036125006462"
+        })
+
+    def test_canonicalize_many(self):
+        """Test batch canonicalization maps back to every input."""
+        batch = URLValidator.canonicalize_many([
+            "https://example.com/doc", "not-a-url", "https://example.com/doc/#top",
+            "https://example.com/other",
+        ])
+
+        self.assertEqual(batch.unique, ["https://example.com/doc",
+                                        "https://example.com/other"])
+        self.assertEqual(batch.groups()["https://example.com/doc"], [0, 2])
+        self.assertEqual(list(batch.errors), [1])
+        self.assertIsNone(batch.canonical[1])
+
 class TestContentFetcher(unittest.TestCase):
     """Test the content fetcher component."""
 
@@ -120,6 +181,141 @@ class TestTextExtractor(unittest.TestCase):
             with self.assertRaises(URLExtractionError):
                 self.extractor.extract(html)
 
+class TestSingleParseExtraction(unittest.TestCase):
+    """Test the shared-tree extraction pipeline."""
+
+    TABLE_HTML = ("<html><body><p>Pricing supplement</p><table>"
+                  + "<tr><td>Date</td><td>Barrier</td><td>70%</td></tr>" * 30
+                  + "</table></body></html>")
+
+    def test_trafilatura_receives_parsed_tree(self):
+        """Test that the document is parsed once and shared."""
+        html = "<html><body><article>Test content</article></body></html>"
+        with patch('trafilatura.extract', return_value="Test content") as extract, \
+                patch('bs4.BeautifulSoup') as soup:
+            TextExtractor.extract(html)
+        self.assertEqual(extract.call_args.args[0].tag, "html")
+        soup.assert_not_called()
+
+    def test_fallback_separates_blocks(self):
+        """Test that fallback text keeps block boundaries."""
+        html = "<html><body><p>One <b>bold</b></p><p>Two</p><style>p {}</style></body></html>"
+        with patch('trafilatura.extract', return_value=None):
+            result = TextExtractor.extract(html)
+        self.assertEqual(result, "One\nbold\nTwo")
+
+    def test_table_heavy_skips_trafilatura(self):
+        """Test that EDGAR-style table documents bypass trafilatura."""
+        with patch('trafilatura.extract') as extract:
+            result = TextExtractor.extract(self.TABLE_HTML)
+        extract.assert_not_called()
+        self.assertTrue(result.startswith("Pricing supplement\nDate\nBarrier\n70%"))
+
+    def test_prose_is_not_table_heavy(self):
+        """Test the heuristic on documents with small tables."""
+        html = ("<html><body>" + "<p>Long paragraph of prose text.</p>" * 200
+                + "<table>" + "<tr><td>a</td><td>b</td></tr>" * 30
+                + "</table></body></html>")
+        tree = lxml.html.document_fromstring(html)
+        self.assertFalse(TextExtractor.is_table_heavy(tree))
+
+    def test_empty_document(self):
+        """Test that empty input yields empty text."""
+        self.assertEqual(TextExtractor.extract("  "), "")
+
+class TestContentDispatcher(unittest.TestCase):
+    """Test format sniffing and routing of raw bytes."""
+
+    def setUp(self):
+        """Set up test cases."""
+        self.dispatcher = ContentDispatcher()
+
+    def test_sniff_magic_bytes(self):
+        """Test that leading bytes win over the declared Content-Type."""
+        sniff = ContentDispatcher.sniff
+        self.assertEqual(sniff(b"%PDF-1.7\n%\xe2\xe3", "text/html"), "pdf")
+        self.assertEqual(sniff(b"<?xml version='1.0'?><xbrl/>", "text/html"), "xml")
+        self.assertEqual(sniff(b"<?xml version='1.0'?>\n<html xmlns='x'>"), "html")
+        self.assertEqual(sniff(b"\xef\xbb\xbf  <!DOCTYPE html><html>", "application/pdf"),
+                         "html")
+        self.assertEqual(sniff(b"plain words", "application/xml"), "xml")
+        self.assertEqual(sniff(b"plain words"), "text")
+
+    def test_routes_bytes_without_decoding(self):
+        """Test that binary bodies reach the extractor as a binary file."""
+        received = []
+        self.dispatcher.register("pdf", lambda body, encoding:
+                                 received.append(body.read()) or "pdf text")
+        data = b"%PDF-1.4\n\xff\xfe binary"
+
+        self.assertEqual(self.dispatcher.extract(memoryview(data), "text/plain"), "pdf text")
+        self.assertEqual(received, [data])
+
+    def test_buffers_are_not_copied(self):
+        """Test that bytearray and memoryview bodies are read in place."""
+        data = bytearray(b"%PDF-1.4\n" + b"x" * (16 * 1024 * 1024))
+        received = []
+
+        def read_in_chunks(body, encoding):
+            received.append(type(body))
+            size = 0
+            for chunk in iter(lambda: body.read(64 * 1024), b""):
+                size += len(chunk)
+            body.seek(0)
+            return f"{size} {body.read(8)!r}"
+
+        self.dispatcher.register("pdf", read_in_chunks)
+        tracemalloc.start()
+        try:
+            for body in (data, memoryview(data)):
+                self.assertEqual(self.dispatcher.extract(body), f"{len(data)} b'%PDF-1.4'")
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, len(data) // 4)
+        self.assertEqual(received, [BufferReader, BufferReader])
+
+    def test_xml_extraction(self):
+        """Test text extraction from XML documents."""
+        data = b"<?xml version='1.0'?><root><a>First</a><b> Second <c>Third</c></b></root>"
+        self.assertEqual(self.dispatcher.extract(data), "First Second Third")
+        self.assertEqual(XMLTextExtractor.extract_file(io.BytesIO(data)),
+                         "First Second Third")
+
+    def test_pdf_documents_share_one_pool(self):
+        """Test that concurrent PDF extractions reuse one extractor and pool."""
+        from pdf_extractor_test import make_pdf
+
+        documents = [make_pdf([f"Document {i}", "Second page"]) for i in range(4)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            texts = list(executor.map(lambda pdf: PDFTextExtractor.extract_file(io.BytesIO(pdf)),
+                                      documents))
+
+        self.assertEqual(texts, [f"Document {i}\nSecond page" for i in range(4)])
+        self.assertIs(PDFTextExtractor.pdf_extractor(), PDFTextExtractor.pdf_extractor())
+        self.assertIsNotNone(PDFTextExtractor.pdf_extractor().executor)
+
+    def test_pdf_pool_closed(self):
+        """Test that close shuts the shared pool down and a new one starts."""
+        from pdf_extractor_test import make_pdf
+
+        executor = PDFTextExtractor.pdf_extractor().executor
+        PDFTextExtractor.close()
+        with self.assertRaises(RuntimeError):
+            executor.submit(int)
+
+        text = PDFTextExtractor.extract_file(io.BytesIO(make_pdf(["Reopened"])))
+        self.assertEqual(text, "Reopened")
+        self.assertIsNot(PDFTextExtractor.pdf_extractor().executor, executor)
+        PDFTextExtractor.close()
+
+    def test_html_file_extraction(self):
+        """Test that HTML read from a file goes through TextExtractor."""
+        body = io.BytesIO(b"<html><body><p>Test content</p></body></html>")
+        with patch('trafilatura.extract', return_value=None):
+            self.assertEqual(self.dispatcher.extract(body, "text/html", "utf-8"),
+                             "Test content")
+
 class TestURLTextExtractor(unittest.TestCase):
     """Test the main URL text extractor."""
 
@@ -150,5 +346,289 @@ class TestURLTextExtractor(unittest.TestCase):
         with self.assertRaises(URLExtractionError):
             self.extractor.extract_text("https://example.com")
 
+def _streamed_response(body, headers=None):
+    """Build a mock streaming response that yields ``body`` in chunks."""
+    response = Mock()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict(
+        headers or {"Content-Type": "text/html; charset=utf-8"})
+    response.raise_for_status.return_value = None
+    response.iter_content.side_effect = \
+        lambda size: (body[i:i + size] for i in range(0, len(body), size))
+    response.__enter__ = Mock(return_value=response)
+    response.__exit__ = Mock(return_value=False)
+    return response
+
+class TestStreamingFetch(unittest.TestCase):
+    """Test streamed, size-capped downloads."""
+
+    def setUp(self):
+        """Set up test cases."""
+        self.fetcher = ContentFetcher(max_bytes=1000, spool_bytes=100)
+        self.fetcher.session = Mock()
+
+    def test_spools_large_body_to_disk(self):
+        """Test that bodies over the spool size leave memory."""
+        body = b"<html>" + b"x" * 500 + b"</html>"
+        self.fetcher.session.get.return_value = _streamed_response(body)
+
+        with self.fetcher.fetch_stream("https://example.com") as response:
+            self.assertEqual(response.encoding, "utf-8")
+            self.assertTrue(response.body._rolled)
+            self.assertEqual(response.body.read(), body)
+        self.assertTrue(self.fetcher.session.get.call_args.kwargs["stream"])
+
+    def test_rejects_body_over_limit(self):
+        """Test that downloads stop once max_bytes is exceeded."""
+        self.fetcher.session.get.return_value = _streamed_response(b"x" * 2000)
+
+        with self.assertRaises(URLExtractionError):
+            self.fetcher.fetch_stream("https://example.com")
+
+    def test_rejects_declared_length_over_limit(self):
+        """Test that an oversized Content-Length is rejected up front."""
+        response = _streamed_response(b"", {"Content-Length": "5000"})
+        self.fetcher.session.get.return_value = response
+
+        with self.assertRaises(URLExtractionError):
+            self.fetcher.fetch_stream("https://example.com")
+        response.iter_content.assert_not_called()
+
+    def test_streaming_extraction(self):
+        """Test end-to-end extraction in streaming mode."""
+        extractor = URLTextExtractor(stream=True, max_bytes=1000)
+        extractor.fetcher.session = Mock()
+        extractor.fetcher.session.get.return_value = _streamed_response(
+            b"<html><body><script>var x;</script><p>Test content</p></body></html>"
+        )
+
+        with patch('trafilatura.extract', return_value=None):
+            result = extractor.extract_text("https://example.com")
+
+        self.assertEqual(result, "Test content")
+
+class TestExtractFile(unittest.TestCase):
+    """Test extraction from a file-like body."""
+
+    def test_extract_with_trafilatura(self):
+        """Test that trafilatura receives the parsed tree."""
+        body = io.BytesIO(b"<html><body><article>Test content</article></body></html>")
+        with patch('trafilatura.extract', return_value="Test content") as extract:
+            result = TextExtractor.extract_file(body, "utf-8")
+        self.assertEqual(result, "Test content")
+        self.assertEqual(extract.call_args.args[0].tag, "html")
+
+    def test_fallback_strips_script_and_style(self):
+        """Test the fallback path on the shared tree."""
+        body = io.BytesIO(b"<html><head><style>p {}</style></head>"
+                          b"<body><p> One </p>\n\n<p>Two</p></body></html>")
+        with patch('trafilatura.extract', return_value=None):
+            result = TextExtractor.extract_file(body)
+        self.assertEqual(result, "One\nTwo")
+
+class TestExtractMany(unittest.TestCase):
+    """Test concurrent batch extraction."""
+
+    def setUp(self):
+        """Set up test cases."""
+        self.extractor = URLTextExtractor(max_workers=4)
+        self.extractor.dispatcher.register(
+            "html", lambda body, encoding: body.read().decode().upper())
+
+    def use_fetch(self, fetch):
+        """Serve each URL's body from ``fetch(url)`` as an HTML response."""
+        self.extractor.fetcher.fetch_response = lambda url: CachedResponse(
+            url, fetch(url).encode(), "utf-8", "text/html", None, None, 0)
+
+    def test_results_in_input_order(self):
+        """Test that ordered results follow the input sequence."""
+        def fetch(url):
+            # Earlier URLs finish last
+            time.sleep(0.05 if url.endswith("/0") else 0)
+            return url
+        self.use_fetch(fetch)
+        urls = [f"https://example.com/{i}" for i in range(12)]
+
+        results = list(self.extractor.extract_many(urls))
+
+        self.assertEqual([r.url for r in results], urls)
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual(results[3].text, "HTTPS://EXAMPLE.COM/3")
+
+    def test_completion_order(self):
+        """Test that unordered results are all yielded."""
+        self.use_fetch(lambda url: url)
+        urls = [f"https://example.com/{i}" for i in range(12)]
+
+        results = list(self.extractor.extract_many(urls, ordered=False))
+
+        self.assertEqual(sorted(r.url for r in results), sorted(urls))
+
+    def test_errors_are_per_url(self):
+        """Test that a failing URL does not abort the batch."""
+        def fetch(url):
+            if "bad" in url:
+                raise URLExtractionError("Network error")
+            return url
+        self.use_fetch(fetch)
+        urls = ["https://example.com/a", "not-a-url", "https://example.com/bad"]
+
+        results = list(self.extractor.extract_many(urls))
+
+        self.assertIsInstance(results[0], ExtractionResult)
+        self.assertEqual([r.ok for r in results], [True, False, False])
+        self.assertIsInstance(results[2].error, URLExtractionError)
+
+    def test_deduplicate_fetches_once(self):
+        """Test that URL variants are fetched once and fanned back out."""
+        fetched = []
+        def fetch(url):
+            fetched.append(url)
+            return url
+        self.use_fetch(fetch)
+        urls = ["https://example.com/a", "HTTPS://example.com/a/#x", "not-a-url",
+                "https://example.com/b", "https://example.com:443/a"]
+
+        for ordered in (True, False):
+            fetched.clear()
+            results = list(self.extractor.extract_many(urls, ordered=ordered,
+                                                       deduplicate=True))
+
+            self.assertEqual(sorted(fetched), ["https://example.com/a",
+                                               "https://example.com/b"])
+            self.assertEqual(sorted(r.url for r in results), sorted(urls))
+            by_url = {r.url: r for r in results}
+            self.assertEqual(by_url["https://example.com:443/a"].text,
+                             "HTTPS://EXAMPLE.COM/A")
+            self.assertFalse(by_url["not-a-url"].ok)
+        ordered_results = list(self.extractor.extract_many(urls, deduplicate=True))
+        self.assertEqual([r.url for r in ordered_results], urls)
+
+    def test_pool_sized_for_workers(self):
+        """Test that the session pool grows to the requested concurrency."""
+        self.use_fetch(lambda url: url)
+        list(self.extractor.extract_many(["https://example.com"], max_workers=16))
+
+        adapter = self.extractor.fetcher.session.get_adapter("https://example.com")
+        self.assertEqual(adapter._pool_maxsize, 16)
+
+class TestServeMode(unittest.TestCase):
+    """Test the persistent stdin/stdout worker mode."""
+
+    def setUp(self):
+        """Set up test cases."""
+        self.extractor = Mock()
+        self.extractor.extract_text.side_effect = \
+            lambda url: f"text of {url}" if "good" in url else \
+            (_ for _ in ()).throw(URLExtractionError("Network error"))
+
+    def run_serve(self, lines):
+        """Feed lines through serve and parse the JSON output."""
+        output = io.StringIO()
+        failures = serve(self.extractor, io.StringIO("\n".join(lines) + "\n"), output)
+        return failures, [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_plain_urls(self):
+        """Test one result line per URL line."""
+        failures, results = self.run_serve(["https://good.com", "", "https://bad.com"])
+
+        self.assertEqual(failures, 1)
+        self.assertEqual(results[0], {"url": "https://good.com",
+                                      "text": "text of https://good.com", "error": None})
+        self.assertEqual(results[1]["error"], "Network error")
+
+    def test_json_requests_echo_fields(self):
+        """Test that JSON request fields are echoed in the result."""
+        failures, results = self.run_serve(['{"id": 7, "url": "https://good.com"}',
+                                            '{"id": 8}', '{broken'])
+
+        self.assertEqual(failures, 2)
+        self.assertEqual(results[0]["id"], 7)
+        self.assertEqual(results[0]["text"], "text of https://good.com")
+        self.assertEqual(results[1]["id"], 8)
+        self.assertIsNotNone(results[1]["error"])
+        self.assertEqual(results[2]["input"], "{broken")
+
+    def test_import_is_lazy(self):
+        """Test that importing the module does not load heavy dependencies."""
+        code = ("import sys, url_extractor; "
+                "print([m for m in ('requests', 'trafilatura', 'lxml', 'validators') "
+                "if m in sys.modules])")
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                                text=True, check=True).stdout
+        self.assertEqual(output.strip(), "[]")
+
+class TestRunBatch(unittest.TestCase):
+    """Test the resumable JSONL batch mode."""
+
+    def setUp(self):
+        """Set up test cases."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.input_path = os.path.join(self.tmp_dir, "urls.jsonl")
+        self.output_path = os.path.join(self.tmp_dir, "results.jsonl")
+        with open(self.input_path, "w") as f:
+            f.write('{"id": "a", "url": "https://example.com/a"}\n')
+            f.write('{"id": "b", "url": "https://example.com/bad"}\n')
+            f.write('https://example.com/c\n')
+            f.write('{"id": "d"}\n')
+        self.extractor = URLTextExtractor(max_workers=2)
+        self.calls = []
+
+        def extract_text(url):
+            self.calls.append(url)
+            if "bad" in url:
+                raise URLExtractionError("Network error")
+            if not url:
+                raise URLExtractionError("Invalid URL format: ")
+            return f"text of {url}"
+        self.extractor.extract_text = extract_text
+
+    def tearDown(self):
+        """Tear down test cases."""
+        shutil.rmtree(self.tmp_dir)
+
+    def read_output(self):
+        """Parse the results file."""
+        with open(self.output_path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_writes_one_record_per_input(self):
+        """Test that every input gets a result record in input order."""
+        counts = run_batch(self.extractor, self.input_path, self.output_path,
+                           flush_every=1)
+
+        results = self.read_output()
+        self.assertEqual(counts, {"processed": 4, "skipped": 0, "failed": 2})
+        self.assertEqual([r.get("id") or r["url"] for r in results],
+                         ["a", "b", "https://example.com/c", "d"])
+        self.assertEqual(results[0]["text"], "text of https://example.com/a")
+        self.assertEqual(results[1]["error"], "Network error")
+
+    def test_resume_skips_completed_ids(self):
+        """Test that a rerun only processes missing IDs."""
+        with open(self.output_path, "w") as f:
+            f.write('{"id": "a", "url": "https://example.com/a", "text": "x", "error": null}\n')
+            f.write('{"id": "b", "url": "https://example.com/ba')  # crashed mid-write
+
+        counts = run_batch(self.extractor, self.input_path, self.output_path)
+
+        self.assertEqual(counts["skipped"], 1)
+        self.assertNotIn("https://example.com/a", self.calls)
+        self.assertEqual([r.get("id") or r["url"] for r in self.read_output()],
+                         ["a", "b", "https://example.com/c", "d"])
+
+    def test_retry_errors(self):
+        """Test that failed results can be retried on resume."""
+        run_batch(self.extractor, self.input_path, self.output_path)
+        self.calls.clear()
+
+        counts = run_batch(self.extractor, self.input_path, self.output_path,
+                           retry_errors=True)
+
+        self.assertEqual(counts["skipped"], 2)
+        self.assertEqual(self.calls, ["https://example.com/bad", ""])
+        self.assertEqual(load_completed_ids(self.output_path, include_errors=False),
+                         {"a", "https://example.com/c"})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file